@@ -11,6 +11,13 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from ProductRegistration.connection_pool import warm_connection_pools
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BE.settings')
+# set ASYNC_READ_ENDPOINTS=True for this entry point to serve the read endpoints with
+# their async views, see ProductRegistration/views/async_views.py
 
 application = get_asgi_application()
+
+# open DB_POOL_MIN_SIZE connections before the first request of this worker
+warm_connection_pools()
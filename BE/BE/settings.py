@@ -35,6 +35,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its latency covers the rest of the stack
+    'ProductRegistration.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,7 +72,10 @@ WSGI_APPLICATION = 'BE.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        # DB_ENGINE=ProductRegistration.pooled_mysql is django.db.backends.mysql with a
+        # per-process connection pool (ProductRegistration/connection_pool.py); keep
+        # CONN_MAX_AGE at 0 so connections go back to the pool at the end of each request
+        'ENGINE': env('DB_ENGINE', default='django.db.backends.mysql'),
         'NAME': env('DB_NAME'),
         'USER': env('DB_USER'),
         'PASSWORD': env('DB_PASSWORD'),
@@ -79,9 +84,24 @@ DATABASES = {
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        # only read by ProductRegistration.pooled_mysql
+        'POOL': {
+            'SIZE': env.int('DB_POOL_SIZE', default=10),
+            # opened when the worker loads BE.wsgi / BE.asgi
+            'MIN_SIZE': env.int('DB_POOL_MIN_SIZE', default=2),
+            # seconds a checkout waits for a free connection
+            'TIMEOUT': env.float('DB_POOL_TIMEOUT', default=10),
+            # connections idle this long are pinged on checkout (0 = every checkout)
+            'CHECK_IDLE_SECONDS': env.float('DB_POOL_CHECK_IDLE_SECONDS', default=0),
+            'MAX_LIFETIME': env.int('DB_POOL_MAX_LIFETIME', default=3600),
+        },
     }
 }
 
+# implementation behind ProductRegistration.procedures.call_procedure;
+# ProductRegistration.procedures.InMemoryBackend runs without MySQL
+PROCEDURE_BACKEND = env('PROCEDURE_BACKEND', default='ProductRegistration.procedures.MySQLBackend')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -138,6 +158,11 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    # orjson-backed JSON when installed, same output as DRF's JSONRenderer
+    'DEFAULT_RENDERER_CLASSES': [
+        'ProductRegistration.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 
@@ -152,6 +177,59 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# per-process cache of authenticated users (seconds / entries)
+AUTH_CACHE_TTL = env.int('AUTH_CACHE_TTL', default=60)
+AUTH_CACHE_MAX_SIZE = env.int('AUTH_CACHE_MAX_SIZE', default=4096)
+
+# how get_customer_mappings lists mappings: "procedure" (get_serial_customer_details)
+# or "orm" (ProductRegistration.mapping_query, backed by the 0002_device_indexes indexes)
+MAPPING_LISTING_ENGINE = env('MAPPING_LISTING_ENGINE', default='procedure')
+
+# per-process cache of get_customer_mappings pages and counts (seconds / entries)
+MAPPING_CACHE_TTL = env.int('MAPPING_CACHE_TTL', default=30)
+MAPPING_CACHE_MAX_SIZE = env.int('MAPPING_CACHE_MAX_SIZE', default=512)
+
+# since= delta sync of get_serial_numbers/get_customer_mappings: how far behind the clock a
+# caught-up watermark is held, so rows of transactions still committing are not skipped
+DELTA_SETTLE_SECONDS = env.int('DELTA_SETTLE_SECONDS', default=5)
+
+# per-process cache of get_device_details lookups (seconds / entries)
+DEVICE_DETAILS_CACHE_TTL = env.int('DEVICE_DETAILS_CACHE_TTL', default=30)
+DEVICE_DETAILS_CACHE_MAX_SIZE = env.int('DEVICE_DETAILS_CACHE_MAX_SIZE', default=4096)
+
+# in-memory trigram index for the get_customer_mappings searchText filter (opt-in, every
+# worker keeps its own copy of the searched mapping columns)
+SEARCH_INDEX_ENABLED = env.bool('SEARCH_INDEX_ENABLED', default=False)
+SEARCH_INDEX_REFRESH_SECONDS = env.int('SEARCH_INDEX_REFRESH_SECONDS', default=5)
+SEARCH_INDEX_MAX_CANDIDATES = env.int('SEARCH_INDEX_MAX_CANDIDATES', default=5000)
+
+# async variants of get_customer_mappings/get_device_details for ASGI deployments (BE.asgi),
+# with their blocking database work on a pool of at most ASYNC_DB_THREADS threads per worker
+ASYNC_READ_ENDPOINTS = env.bool('ASYNC_READ_ENDPOINTS', default=False)
+ASYNC_DB_THREADS = env.int('ASYNC_DB_THREADS', default=10)
+
+# per-view latency, query and procedure metrics served at sil/metrics/ (Prometheus text
+# format). With METRICS_TOKEN set the endpoint also accepts "Authorization: Bearer <token>"
+# so a scraper doesn't need a login
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# per-process pool of pre-reserved serials behind getSerialNumber/
+ALLOCATION_POOL_ENABLED = env.bool('ALLOCATION_POOL_ENABLED', default=False)
+ALLOCATION_POOL_LOW_WATER = env.int('ALLOCATION_POOL_LOW_WATER', default=20)
+ALLOCATION_POOL_BATCH_SIZE = env.int('ALLOCATION_POOL_BATCH_SIZE', default=100)
+ALLOCATION_POOL_LEASE_SECONDS = env.int('ALLOCATION_POOL_LEASE_SECONDS', default=600)
+
+# background jobs (sil/jobs/): threads per worker running them (0 = only queue them, for a
+# separate `manage.py run_jobs` process), how often the runner polls the queue and saves
+# progress, after how long without a heartbeat a running job counts as dead, and where
+# downloadable results go (storage shared by every worker host: any of them may write a
+# result or serve its download)
+JOB_WORKERS = env.int('JOB_WORKERS', default=2)
+JOB_POLL_SECONDS = env.float('JOB_POLL_SECONDS', default=2)
+JOB_STALE_SECONDS = env.int('JOB_STALE_SECONDS', default=60)
+JOB_RESULTS_DIR = env('JOB_RESULTS_DIR', default=str(BASE_DIR / 'job_results'))
+
 # Cookie Settings for HTTP Testing
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
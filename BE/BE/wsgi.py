@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from ProductRegistration.connection_pool import warm_connection_pools
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BE.settings')
 
 application = get_wsgi_application()
+
+# open DB_POOL_MIN_SIZE connections before the first request of this worker
+warm_connection_pools()
@@ -0,0 +1,218 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import Now
+
+from .device_cache import invalidate_device_details
+from .models import Serialdata
+
+
+RESERVE_MAX_BATCH = 500
+
+# isallocated states, see "Device Lifecycle" in the README
+UNALLOCATED = 0
+FETCHED = 1
+ALLOCATED = 2
+DEACTIVATED = 3
+
+
+# Atomically claims up to `count` approved, unallocated serials (oldest first) and marks
+# them fetched. Rows locked by a concurrent reservation are skipped rather than waited
+# on, so parallel allocators each get a disjoint batch.
+def reserve_serials(count):
+    # inventory imports the states above from this module
+    from .inventory import track_inventory
+
+    with transaction.atomic():
+        candidates = Serialdata.objects.filter(isapproved=1, isallocated=UNALLOCATED)
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        else:
+            candidates = candidates.select_for_update()
+
+        serials = list(candidates.order_by('createdate', 'serialnumber').values_list('serialnumber', flat=True)[:count])
+        if serials:
+            with track_inventory(serials):
+                Serialdata.objects.filter(serialnumber__in=serials).update(isallocated=FETCHED, modifieddate=Now())
+
+    invalidate_device_details(*serials)
+    return serials
+
+
+# Returns serials that were reserved but never handed out to the unallocated state
+def release_serials(serials):
+    from .inventory import track_inventory
+
+    if not serials:
+        return 0
+    with track_inventory(serials):
+        released = Serialdata.objects.filter(serialnumber__in=serials, isallocated=FETCHED).update(isallocated=UNALLOCATED, modifieddate=Now())
+    invalidate_device_details(*serials)
+    return released
+
+
+# Per-process pool of pre-reserved serials for getSerialNumber.
+# A background thread tops the pool up to batch_size with reserve_serials() whenever it
+# drops below low_water, so handing out a serial is a dequeue. Entries not handed out
+# within lease_seconds, and everything left at shutdown, are released again.
+# Serials sitting in the pool are in the fetched state in the database; if the process
+# is killed without running its atexit hooks they stay fetched.
+class AllocationPool:
+    def __init__(self, low_water=20, batch_size=100, lease_seconds=600, check_interval=5):
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.check_interval = check_interval
+
+        self._items = deque()
+        self._expired = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+        self.allocations = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_errors = 0
+        self.released = 0
+        self.last_refill_seconds = None
+        self.max_refill_seconds = 0.0
+        self.total_refill_seconds = 0.0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='allocation-pool', daemon=True)
+            self._thread.start()
+        atexit.register(self.shutdown)
+
+    def acquire(self):
+        self.start()
+        now = time.monotonic()
+        serial = None
+
+        with self._lock:
+            while self._items:
+                candidate, expires_at = self._items.popleft()
+                if expires_at > now:
+                    serial = candidate
+                    break
+                self._expired.append(candidate)
+            if len(self._items) < self.low_water:
+                self._wakeup.set()
+
+        if serial is not None:
+            self.allocations += 1
+            return serial
+
+        # pool ran dry - reserve directly instead of waiting for the refill
+        self.misses += 1
+        serials = reserve_serials(1)
+        return serials[0] if serials else None
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.check_interval)
+            self._wakeup.clear()
+            if self._stopped:
+                break
+            try:
+                self._release_expired()
+                if len(self._items) < self.low_water:
+                    self._refill()
+            except Exception:
+                self.refill_errors += 1
+            finally:
+                # the thread keeps its own connection; don't hold it between cycles
+                connection.close()
+
+    def _refill(self):
+        start = time.perf_counter()
+        serials = reserve_serials(self.batch_size - len(self._items))
+        elapsed = time.perf_counter() - start
+
+        if self._stopped:
+            release_serials(serials)
+            return
+
+        expires_at = time.monotonic() + self.lease_seconds
+        with self._lock:
+            self._items.extend((serial, expires_at) for serial in serials)
+
+        self.refills += 1
+        self.last_refill_seconds = elapsed
+        self.total_refill_seconds += elapsed
+        self.max_refill_seconds = max(self.max_refill_seconds, elapsed)
+
+    def _release_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            # entries are appended in lease order, so the expired ones are at the front
+            while self._items and self._items[0][1] <= now:
+                self._expired.append(self._items.popleft()[0])
+            expired, self._expired = self._expired, []
+
+        if expired:
+            self.released += release_serials(expired)
+
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval)
+
+        with self._lock:
+            remaining = [serial for serial, _ in self._items] + self._expired
+            self._items.clear()
+            self._expired = []
+        try:
+            self.released += release_serials(remaining)
+        finally:
+            connection.close()
+
+    def stats(self):
+        return {
+            'depth': len(self._items),
+            'lowWater': self.low_water,
+            'batchSize': self.batch_size,
+            'leaseSeconds': self.lease_seconds,
+            'allocations': self.allocations,
+            'misses': self.misses,
+            'refills': self.refills,
+            'refillErrors': self.refill_errors,
+            'released': self.released,
+            'lastRefillSeconds': self.last_refill_seconds,
+            'maxRefillSeconds': self.max_refill_seconds,
+            'avgRefillSeconds': self.total_refill_seconds / self.refills if self.refills else None,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# The pool is opt-in (ALLOCATION_POOL_ENABLED) and created on first use, so management
+# commands and workers that never hand out serials don't reserve any
+def get_allocation_pool():
+    global _pool
+    if not getattr(settings, 'ALLOCATION_POOL_ENABLED', False):
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = AllocationPool(
+                    low_water=getattr(settings, 'ALLOCATION_POOL_LOW_WATER', 20),
+                    batch_size=getattr(settings, 'ALLOCATION_POOL_BATCH_SIZE', 100),
+                    lease_seconds=getattr(settings, 'ALLOCATION_POOL_LEASE_SECONDS', 600),
+                )
+    return _pool
+
+
+def allocation_pool_stats():
+    return _pool.stats() if _pool is not None else None
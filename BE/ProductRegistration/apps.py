@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ProductregistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ProductRegistration'
+
+    def ready(self):
+        from . import signals
+
+        if getattr(settings, 'METRICS_ENABLED', True):
+            from .metrics import install_query_counter
+            install_query_counter()
@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+# Bounded thread pool for the blocking database work of the async views.
+# Each pool thread keeps its own Django connection, so ASYNC_DB_THREADS is also the most
+# connections one ASGI worker opens; requests beyond that queue for a free thread
+# instead of piling more load onto MySQL. Connections are recycled between jobs the way
+# Django does between requests (CONN_MAX_AGE, broken connections).
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_completed = 0
+_counter_lock = threading.Lock()
+
+
+def db_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ASYNC_DB_THREADS', 10),
+                    thread_name_prefix='async-db',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    global _in_flight, _completed
+    with _counter_lock:
+        _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # run in a copy of the request's context, so its metrics count the queries
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(db_executor(), functools.partial(context.run, _run, func, args, kwargs))
+    finally:
+        with _counter_lock:
+            _in_flight -= 1
+            _completed += 1
+
+
+def async_db_stats():
+    if _executor is None:
+        return None
+    return {
+        'maxThreads': _executor._max_workers,
+        'inFlight': _in_flight,
+        'completed': _completed,
+    }
@@ -0,0 +1,244 @@
+import csv
+import io
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Now
+
+from .allocation import ALLOCATED, DEACTIVATED
+from .device_cache import invalidate_device_details
+from .inventory import track_inventory
+from .mapping_cache import invalidate_mappings
+from .models import Palmteccustomerdetails, Serialdata
+from .search_index import index_mapping
+from .serials import invalid_serial_indexes
+
+
+BULK_MAX_ROWS = 50000
+BULK_CHUNK_SIZE = 1000
+
+
+class BulkInputError(ValueError):
+    pass
+
+
+def chunked(items, size=BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def read_csv_upload(upload):
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    try:
+        return list(csv.DictReader(text))
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise BulkInputError(f'Invalid CSV file: {e}')
+    finally:
+        text.detach()
+
+
+# Rows come either from a CSV upload in the "file" field or from a JSON body that is
+# a list, or an object holding the list under list_key
+def read_bulk_rows(request, list_key):
+    upload = request.FILES.get('file')
+    if upload is not None:
+        rows = read_csv_upload(upload)
+    else:
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get(list_key)
+
+    if not isinstance(rows, list) or not rows:
+        raise BulkInputError(f'Expected a non-empty JSON array, "{list_key}" list or CSV file')
+
+    if len(rows) > BULK_MAX_ROWS:
+        raise BulkInputError(f'Too many rows, at most {BULK_MAX_ROWS} per request')
+
+    return rows
+
+
+def row_result(row_number, serialnumber, row_status, message):
+    return {'row': row_number, 'serialnumber': serialnumber, 'status': row_status, 'message': message}
+
+
+def summarize(results):
+    summary = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return summary
+
+
+# Inserts the rows and returns the primary keys written. A row inserted since the chunk
+# was read makes the multi-row INSERT fail; the rows are then inserted one by one and
+# the ones that conflict are left out.
+def _insert_rows(rows):
+    try:
+        with transaction.atomic():
+            rows[0]._meta.model.objects.bulk_create(rows)
+        return {row.pk for row in rows}
+    except IntegrityError:
+        pass
+
+    created = set()
+    for row in rows:
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+            created.add(row.pk)
+        except IntegrityError:
+            pass
+    return created
+
+
+# Validates every serial in one pass and inserts the valid ones, one transaction per
+# chunk. The chunk's registered serials are read (and their rows locked) first and only
+# the others are inserted, with the defaults save_serial_number writes (0/0); one
+# registered concurrently since is caught by _insert_rows. A serial counts as created
+# only if this call inserted it.
+# Returns one result per input row: success, duplicate or invalid.
+# progress(done, total) is called after every chunk, counting the valid rows.
+def register_serial_numbers(values, category='UPIPLUS', progress=None):
+    results = [None] * len(values)
+    pending = []
+    seen = set()
+
+    values = [value.get('serialnumber') if isinstance(value, dict) else value for value in values]
+    cleaned = [value.strip() if isinstance(value, str) else value for value in values]
+    invalid = set(invalid_serial_indexes(cleaned))
+
+    for index, serialnumber in enumerate(cleaned):
+        if index in invalid:
+            results[index] = row_result(index + 1, values[index], 'invalid', 'Serial number not following pattern')
+        elif serialnumber in seen:
+            results[index] = row_result(index + 1, serialnumber, 'duplicate', 'Serial number repeated in request')
+        else:
+            seen.add(serialnumber)
+            pending.append((index, serialnumber))
+
+    done = 0
+    for chunk in chunked(pending):
+        serials = [serialnumber for _, serialnumber in chunk]
+        with track_inventory(serials) as change:
+            existing = set(change.before)
+            new_rows = [
+                Serialdata(serialnumber=serialnumber, category=category, isapproved=0, isallocated=0,
+                           createdate=Now(), modifieddate=Now())
+                for serialnumber in serials if serialnumber not in existing
+            ]
+            created = _insert_rows(new_rows) if new_rows else set()
+
+        for index, serialnumber in chunk:
+            if serialnumber in created:
+                results[index] = row_result(index + 1, serialnumber, 'success', 'Serial number saved')
+            else:
+                results[index] = row_result(index + 1, serialnumber, 'duplicate', 'Serial number already exists')
+
+        done += len(chunk)
+        if progress:
+            progress(done, len(pending))
+
+    return results
+
+
+# request field -> mapping model field, as accepted by create_customer_mapping
+MAPPING_IMPORT_FIELDS = [
+    ('serialnumber', 'upideviceserialnumber'),
+    ('uniqueIdentifier', 'uniqueidentifier'),
+    ('customerCode', 'customercode'),
+    ('customerName', 'customername'),
+    ('company', 'company'),
+    ('devicetype', 'devicetype'),
+    ('licenseUrl', 'clicenseurl'),
+    ('versionDetails', 'versiondetails'),
+]
+
+
+# Checks one import row without touching the database.
+# Returns (model field values, None) or (None, error message).
+def _clean_mapping_row(row):
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+
+    values = {}
+    missing = []
+    for name, field in MAPPING_IMPORT_FIELDS:
+        value = row.get(name)
+        if value is None or not str(value).strip():
+            missing.append(name)
+            continue
+        value = str(value).strip()
+        max_length = Palmteccustomerdetails._meta.get_field(field).max_length
+        if max_length and len(value) > max_length:
+            return None, f'{name} longer than {max_length} characters'
+        values[field] = value
+
+    if missing:
+        return None, f'Missing values in input,{missing}'
+    try:
+        values['customercode'] = int(values['customercode'])
+    except ValueError:
+        return None, 'customerCode must be an integer'
+    return values, None
+
+
+# Creates customer mappings in bulk. Every row is validated before anything is written;
+# valid rows are then saved in chunks, each chunk one transaction that inserts the
+# mappings and marks their devices allocated. The device rows of a chunk are locked
+# first so concurrent imports of the same serials can't both succeed.
+# Returns one result per input row: success, duplicate, not_found, denied or invalid.
+# progress(done, total) is called after every chunk, counting the valid rows.
+def import_customer_mappings(rows, progress=None):
+    results = [None] * len(rows)
+    pending = []
+    seen = set()
+
+    for index, row in enumerate(rows):
+        values, error = _clean_mapping_row(row)
+        serialnumber = values['upideviceserialnumber'] if values else (row.get('serialnumber') if isinstance(row, dict) else None)
+        if error:
+            results[index] = row_result(index + 1, serialnumber, 'invalid', error)
+        elif serialnumber in seen:
+            results[index] = row_result(index + 1, serialnumber, 'duplicate', 'Serial number repeated in request')
+        else:
+            seen.add(serialnumber)
+            pending.append((index, values))
+
+    done = 0
+    for chunk in chunked(pending):
+        serials = [values['upideviceserialnumber'] for _, values in chunk]
+        with track_inventory(serials):
+            devices = dict(Serialdata.objects.select_for_update().filter(serialnumber__in=serials).values_list('serialnumber', 'isallocated'))
+            mapped = set(Palmteccustomerdetails.objects.filter(upideviceserialnumber__in=serials).values_list('upideviceserialnumber', flat=True))
+
+            new_rows = []
+            for index, values in chunk:
+                serialnumber = values['upideviceserialnumber']
+                if serialnumber not in devices:
+                    results[index] = row_result(index + 1, serialnumber, 'not_found', 'Serial number not found')
+                elif devices[serialnumber] == DEACTIVATED:
+                    results[index] = row_result(index + 1, serialnumber, 'denied', 'Device is deactivated')
+                elif serialnumber in mapped:
+                    results[index] = row_result(index + 1, serialnumber, 'duplicate', 'Mapping already exists for serial number')
+                else:
+                    new_rows.append((index, Palmteccustomerdetails(isapproved=0, isdeleted=0, createdon=Now(), modifiedon=Now(), **values)))
+
+            created = _insert_rows([row for _, row in new_rows]) if new_rows else set()
+            Serialdata.objects.filter(serialnumber__in=created).update(isallocated=ALLOCATED, modifieddate=Now())
+
+        for index, row in new_rows:
+            if row.upideviceserialnumber in created:
+                results[index] = row_result(index + 1, row.upideviceserialnumber, 'success', 'Mapping saved')
+            else:
+                results[index] = row_result(index + 1, row.upideviceserialnumber, 'duplicate', 'Mapping already exists for serial number')
+
+        if created:
+            invalidate_mappings()
+            invalidate_device_details(*created)
+            for _, row in new_rows:
+                if row.upideviceserialnumber in created:
+                    index_mapping(row.upideviceserialnumber, row.customercode, row.customername, row.company)
+
+        done += len(chunk)
+        if progress:
+            progress(done, len(pending))
+
+    return results
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Per-process LRU cache with a time-to-live on every entry.
+# Each worker process keeps its own copy, so entries written or invalidated in one
+# worker are only seen by the others once their TTL runs out.
+
+_registry = {}
+
+
+class TTLCache:
+    def __init__(self, name, max_size=1024, ttl=60):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxSize': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hitRatio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def cache_stats():
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,275 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+
+# Per-process pool of open database connections behind the ProductRegistration.pooled_mysql
+# backend. Django "closes" its connection at the end of every request (CONN_MAX_AGE=0);
+# the backend hands it back here instead, and the next request of any thread checks it
+# out again rather than paying for a new MySQL connect and authentication.
+#
+# At most SIZE connections are open; a checkout with none free waits up to TIMEOUT seconds
+# for one to be returned. Connections idle for CHECK_IDLE_SECONDS or more are pinged on
+# checkout and replaced when dead (wait_timeout, server restart), and connections older
+# than MAX_LIFETIME seconds are replaced instead of reused.
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class ConnectionPool:
+    def __init__(self, alias, connect, ping, size=10, min_size=0, timeout=10, check_idle_seconds=0, max_lifetime=3600):
+        self.alias = alias
+        self.size = size
+        self.min_size = min(min_size, size)
+        self.timeout = timeout
+        self.check_idle_seconds = check_idle_seconds
+        self.max_lifetime = max_lifetime
+        self._connect = connect
+        self._ping = ping
+
+        # (connection, returned at); checkouts take the most recently returned one
+        self._idle = deque()
+        self._created_at = {}
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.health_check_failures = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.peak_in_use = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _check_fork(self):
+        # a forked worker must not share the parent's sockets; drop them without
+        # closing, closing would end the parent's sessions too
+        if self._pid != os.getpid():
+            with self._cond:
+                if self._pid != os.getpid():
+                    self._idle.clear()
+                    self._created_at.clear()
+                    self._in_use = 0
+                    self._pid = os.getpid()
+
+    def _new(self):
+        connection = self._connect()
+        with self._cond:
+            self._created_at[id(connection)] = time.monotonic()
+            self.created += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+            self.discarded += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    # Returns the connection if it can be handed out, None after discarding it
+    def _checked(self, connection, returned_at):
+        now = time.monotonic()
+        if now - self._created_at.get(id(connection), now) >= self.max_lifetime:
+            self._discard(connection)
+            return None
+        if now - returned_at >= self.check_idle_seconds:
+            try:
+                self._ping(connection)
+            except Exception:
+                self.health_check_failures += 1
+                self._discard(connection)
+                return None
+        return connection
+
+    def acquire(self):
+        self._check_fork()
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        connection = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                    break
+                # reserve a slot, the connection is opened outside the lock
+                if len(self._idle) + self._in_use < self.size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise OperationalError(f'No free connection in the {self.alias!r} pool after {self.timeout}s (SIZE={self.size})')
+                waited = True
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self._in_use)
+            if waited:
+                wait_seconds = time.monotonic() - start
+                self.waits += 1
+                self.total_wait_seconds += wait_seconds
+                self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+        try:
+            if connection is not None:
+                connection = self._checked(connection, returned_at)
+            if connection is None:
+                connection = self._new()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    def release(self, connection, discard=False):
+        if self._pid != os.getpid():
+            return
+        if discard:
+            self._discard(connection)
+        with self._cond:
+            self._in_use -= 1
+            if not discard:
+                self._idle.append((connection, time.monotonic()))
+            self._cond.notify()
+
+    # Opens connections until MIN_SIZE are open, so the first requests of a worker
+    # don't pay for connecting
+    def warm(self):
+        self._check_fork()
+        opened = 0
+        while True:
+            with self._cond:
+                if len(self._idle) + self._in_use >= self.min_size:
+                    break
+                self._in_use += 1
+            try:
+                connection = self._new()
+            except BaseException:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            self.release(connection)
+            opened += 1
+        return opened
+
+    def close_idle(self):
+        with self._cond:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            in_use = self._in_use
+        return {
+            'size': self.size,
+            'minSize': self.min_size,
+            'open': idle + in_use,
+            'idle': idle,
+            'inUse': in_use,
+            'peakInUse': self.peak_in_use,
+            'utilization': round(in_use / self.size, 4),
+            'checkouts': self.checkouts,
+            'created': self.created,
+            'discarded': self.discarded,
+            'healthCheckFailures': self.health_check_failures,
+            'waits': self.waits,
+            'timeouts': self.timeouts,
+            'totalWaitSeconds': self.total_wait_seconds,
+            'maxWaitSeconds': self.max_wait_seconds,
+            'avgWaitSeconds': self.total_wait_seconds / self.waits if self.waits else None,
+        }
+
+
+def get_pool(alias, factory):
+    pool = _registry.get(alias)
+    if pool is None:
+        with _registry_lock:
+            pool = _registry.get(alias)
+            if pool is None:
+                pool = _registry[alias] = factory()
+    return pool
+
+
+def connection_pool_stats():
+    return {alias: pool.stats() for alias, pool in _registry.items()} or None
+
+
+# Called from BE.wsgi / BE.asgi when a worker loads the application. A database that
+# is down doesn't stop the worker from starting (the error is logged); its requests
+# fail until it is back.
+def warm_connection_pools():
+    for alias in connections:
+        wrapper = connections[alias]
+        if hasattr(wrapper, 'connection_pool'):
+            try:
+                wrapper.connection_pool().warm()
+            except Exception:
+                logger.exception('Could not open the connection pool of database %r', alias)
+
+
+# Turns a Django DatabaseWrapper into one whose connections come from, and go back to,
+# a ConnectionPool configured by the database's POOL settings.
+class PooledDatabaseWrapperMixin:
+    def connection_pool(self):
+        return get_pool(self.alias, self._create_pool)
+
+    def _create_pool(self):
+        options = self.settings_dict.get('POOL') or {}
+        conn_params = self.get_connection_params()
+        connect = super().get_new_connection
+        return ConnectionPool(
+            self.alias,
+            connect=lambda: connect(conn_params),
+            ping=self.ping_connection,
+            size=options.get('SIZE', 10),
+            min_size=options.get('MIN_SIZE', 0),
+            timeout=options.get('TIMEOUT', 10),
+            check_idle_seconds=options.get('CHECK_IDLE_SECONDS', 0),
+            max_lifetime=options.get('MAX_LIFETIME', 3600),
+        )
+
+    def ping_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def get_new_connection(self, conn_params):
+        return self.connection_pool().acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        # closed inside atomic(): Django keeps using self.connection until the block
+        # exits, so it can't go back to the pool
+        discard = self.in_atomic_block
+        # hand the connection back without an open transaction
+        if not discard and not self.autocommit:
+            try:
+                self.connection.rollback()
+            except Exception:
+                discard = True
+        if self.errors_occurred and not discard:
+            discard = not self.is_usable()
+        self.connection_pool().release(self.connection, discard=discard)
@@ -0,0 +1,119 @@
+import datetime
+import hashlib
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Q
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+# Delta sync and conditional requests for the list endpoints, driven by the row's
+# modification timestamp (Serialdata.modifieddate, Palmteccustomerdetails.modifiedon),
+# which the procedures and ORM writes stamp on every insert and update with the
+# database's NOW() (ORM writes pass Now(), never this process's clock).
+#
+# A watermark is an opaque (timestamp, primary key) position: "since=<watermark>" returns
+# the rows modified after it in (timestamp, key) order plus the watermark to send next.
+# A write whose transaction is still open is invisible while its timestamp is already
+# taken, so once a client is caught up the watermark is held DELTA_SETTLE_SECONDS behind
+# the clock; rows changed in that window are sent again on the next poll.
+#
+# ETags are derived from the latest timestamp and the row count of the table (a delete
+# moves the count, not the latest timestamp), one aggregate that only the listings
+# answering with the table or a cached page of it run. They are only issued once that
+# change is older than the settle window (timestamps may have one-second resolution, so
+# a newer change could still share it).
+#
+# As rows are stamped with the database's NOW(), the settle point is taken from the
+# database clock, not this process's: the offset between the two is read with one
+# query every CLOCK_CHECK_SECONDS.
+
+DELTA_SETTLE_SECONDS = getattr(settings, 'DELTA_SETTLE_SECONDS', 5)
+CLOCK_CHECK_SECONDS = 60
+
+_clock_offset = None
+_clock_checked_at = 0.0
+
+
+# How far the database clock, read the way Django reads DATETIME columns, is ahead of timezone.now()
+def db_clock_offset():
+    global _clock_offset, _clock_checked_at
+    if _clock_offset is None or time.monotonic() - _clock_checked_at > CLOCK_CHECK_SECONDS:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT CURRENT_TIMESTAMP')
+            db_now = cursor.fetchone()[0]
+        if isinstance(db_now, str):
+            db_now = datetime.datetime.fromisoformat(db_now)
+        if settings.USE_TZ and timezone.is_naive(db_now):
+            db_now = timezone.make_aware(db_now, connection.timezone)
+        _clock_offset = db_now - timezone.now()
+        _clock_checked_at = time.monotonic()
+    return _clock_offset
+
+
+def settled_at(extra_seconds=0):
+    return timezone.now() + db_clock_offset() - datetime.timedelta(seconds=DELTA_SETTLE_SECONDS + extra_seconds)
+
+
+def start_watermark(extra_seconds=0):
+    return encode_cursor(settled_at(extra_seconds), '')
+
+
+# Value tuples of `fields` for the rows of queryset changed after the watermark token, at
+# most limit of them. Returns (rows, next watermark, has_more); raises InvalidCursor for a bad token.
+def changed_since(queryset, field, token, limit, fields, extra_seconds=0):
+    since, since_key = decode_cursor(token, 2)
+    if not isinstance(since, datetime.datetime) or not isinstance(since_key, str):
+        raise InvalidCursor('Invalid watermark')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, datetime.timezone.utc)
+
+    key = queryset.model._meta.pk.name
+    # each row ends with its (field, key) position, cut off before returning
+    rows = list(
+        queryset.filter(Q(**{f'{field}__gt': since}) | Q(**{field: since, f'{key}__gt': since_key}))
+        .order_by(field, key).values_list(*fields, field, key)[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        watermark = encode_cursor(*rows[-1][-2:])
+    else:
+        # caught up: continue from the settle point, never go back
+        watermark = encode_cursor(*max((since, since_key), (settled_at(extra_seconds), '')))
+    return [row[:-2] for row in rows], watermark, has_more
+
+
+# Weak ETag of a listing: the request parameters plus the latest change and the row count
+# of the table. None while that change is too recent to be sure nothing else shares its timestamp.
+def list_etag(queryset, field, params, extra_seconds=0):
+    table = queryset.aggregate(latest=Max(field), rows=Count('pk'))
+    latest = table['latest']
+    if latest is not None and latest >= settled_at(extra_seconds):
+        return None
+    state = repr((latest.isoformat() if latest else None, table['rows'], sorted(params.lists())))
+    return 'W/"%s"' % hashlib.sha1(state.encode()).hexdigest()[:24]
+
+
+def etag_matches(request, etag):
+    if etag is None:
+        return False
+    header = request.headers.get('If-None-Match', '')
+    return header.strip() == '*' or etag in (value.strip() for value in header.split(','))
+
+
+def not_modified(etag):
+    return with_etag(HttpResponse(status=304), etag)
+
+
+def with_etag(response, etag):
+    if etag is not None and response.status_code in (200, 304):
+        response['ETag'] = etag
+        # browsers keep the body and revalidate it with If-None-Match on every fetch
+        response['Cache-Control'] = 'private, no-cache'
+    return response
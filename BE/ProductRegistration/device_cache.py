@@ -0,0 +1,40 @@
+import threading
+
+from django.conf import settings
+
+from .cache import TTLCache
+
+
+# get_device_details_by_serial results keyed by serial number. Only found devices are
+# cached; every write that touches a serial drops its entry.
+# A lookup that raced with an invalidation is not stored: callers take the generation
+# before querying and pass it back to store_device_details.
+# Invalidation only reaches this process's cache: another worker keeps serving its entry
+# for up to DEVICE_DETAILS_CACHE_TTL seconds after a write.
+
+device_details_cache = TTLCache(
+    'device_details',
+    max_size=getattr(settings, 'DEVICE_DETAILS_CACHE_MAX_SIZE', 4096),
+    ttl=getattr(settings, 'DEVICE_DETAILS_CACHE_TTL', 30),
+)
+
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def device_details_generation():
+    return _generation
+
+
+def store_device_details(serialnumber, details, generation):
+    with _generation_lock:
+        if generation == _generation:
+            device_details_cache.set(serialnumber, details)
+
+
+def invalidate_device_details(*serialnumbers):
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        for serialnumber in serialnumbers:
+            device_details_cache.delete(serialnumber)
@@ -0,0 +1,301 @@
+from collections import Counter, defaultdict, namedtuple
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Substr
+
+from .allocation import ALLOCATED, DEACTIVATED, FETCHED
+from .models import InventoryCounter, InventoryDelta, Palmteccustomerdetails, Serialdata
+from .procedures import call_procedure
+
+
+# Inventory rollups: for every value of each dimension, how many devices are registered,
+# approved, fetched, allocated, deactivated and mapped (to a customer, not deleted).
+#
+#   category     Serialdata.category
+#   month        the serial's YYYYMM prefix
+#   deviceType   the serial's AMP/API part
+#   company      the company of the device's mapping, mapped devices only
+#
+# ORM writes to the device tables run inside track_inventory(serials), which reads the
+# state of those serials before and after the write and inserts the difference as
+# InventoryDelta rows in the same transaction, so the counts move with the rows and a
+# rolled back write leaves them alone. Stored procedure writes commit on their own and
+# aren't wrapped: tracked_procedure() reads the serial's state before the call and, when
+# the procedure reports success, inserts the move to the state the caller asked for. A
+# write racing it between the read and the call can leave those counts off until the
+# next rebuild. Writers only insert, they never update a shared counter row; reads fold
+# the pending deltas into InventoryCounter (fold_deltas) and add whatever is left.
+# rebuild_inventory() recomputes everything from the tables.
+
+DIMENSIONS = ('category', 'month', 'deviceType', 'company')
+METRICS = ('registered', 'approved', 'fetched', 'allocated', 'deactivated', 'mapped')
+
+ALLOCATION_METRICS = {FETCHED: 'fetched', ALLOCATED: 'allocated', DEACTIVATED: 'deactivated'}
+
+# company is the mapping's company ('' for none) or None when the device isn't mapped
+DeviceState = namedtuple('DeviceState', ['category', 'isapproved', 'isallocated', 'company'])
+
+
+# Devices annotated with is_mapped and their mapping's company (None when unmapped)
+def annotated_devices():
+    mapping = Palmteccustomerdetails.objects.filter(upideviceserialnumber=OuterRef('serialnumber')).exclude(isdeleted=1)
+    return Serialdata.objects.annotate(is_mapped=Exists(mapping), company=Subquery(mapping.values('company')[:1]))
+
+
+# serial -> DeviceState for the serials that are registered. With lock, their device rows
+# are locked. Serials that don't exist yet aren't: on InnoDB a FOR UPDATE on a missing
+# key takes a gap lock, and concurrent inserts of new serials into the same gap deadlock
+# on it.
+def device_states(serials, lock=False):
+    devices = Serialdata.objects.filter(serialnumber__in=serials)
+    if lock:
+        existing = list(devices.values_list('serialnumber', flat=True))
+        if not existing:
+            return {}
+        devices = Serialdata.objects.filter(serialnumber__in=existing).select_for_update()
+    devices = list(devices.values_list('serialnumber', 'category', 'isapproved', 'isallocated'))
+
+    companies = dict(
+        Palmteccustomerdetails.objects.filter(upideviceserialnumber__in=[device[0] for device in devices])
+        .exclude(isdeleted=1).values_list('upideviceserialnumber', 'company')
+    )
+    return {
+        serial: DeviceState(category, isapproved, isallocated, (companies[serial] or '') if serial in companies else None)
+        for serial, category, isapproved, isallocated in devices
+    }
+
+
+# (dimension, value) keys and metrics one device counts towards
+def contributions(serial, state):
+    category, isapproved, isallocated, company = state
+    keys = [('category', category or ''), ('month', serial[:6]), ('deviceType', serial[6:9])]
+    metrics = ['registered']
+    if isapproved == 1:
+        metrics.append('approved')
+    if isallocated in ALLOCATION_METRICS:
+        metrics.append(ALLOCATION_METRICS[isallocated])
+    if company is not None:
+        keys.append(('company', company))
+        metrics.append('mapped')
+    return keys, metrics
+
+
+def state_deltas(before, after):
+    deltas = defaultdict(Counter)
+    for states, sign in ((before, -1), (after, 1)):
+        for serial, state in states.items():
+            keys, metrics = contributions(serial, state)
+            for key in keys:
+                for metric in metrics:
+                    deltas[key][metric] += sign
+    return {key: {metric: n for metric, n in change.items() if n} for key, change in deltas.items()}
+
+
+def _keys_filter(keys):
+    condition = Q()
+    for dimension, value in keys:
+        condition |= Q(dimension=dimension, value=value)
+    return condition
+
+
+# Inserts the deltas of one write, one row per key
+def record_deltas(deltas):
+    InventoryDelta.objects.bulk_create([
+        InventoryDelta(dimension=dimension, value=value, **change)
+        for (dimension, value), change in sorted(deltas.items()) if change
+    ])
+
+
+# Adds the deltas to the counters with one UPDATE per distinct change (a device moving
+# between states changes all its keys alike). Rows that don't exist yet are inserted (a
+# concurrent fold may get there first) and then updated like the others.
+def add_to_counters(deltas):
+    changes = defaultdict(list)
+    for key, change in sorted(deltas.items()):
+        if change:
+            changes[tuple(sorted(change.items()))].append(key)
+
+    for change, keys in changes.items():
+        expressions = {metric: F(metric) + n for metric, n in change}
+        if InventoryCounter.objects.filter(_keys_filter(keys)).update(**expressions) == len(keys):
+            continue
+        existing = set(InventoryCounter.objects.filter(_keys_filter(keys)).values_list('dimension', 'value'))
+        missing = [key for key in keys if key not in existing]
+        InventoryCounter.objects.bulk_create(
+            [InventoryCounter(dimension=dimension, value=value) for dimension, value in missing],
+            ignore_conflicts=True,
+        )
+        InventoryCounter.objects.filter(_keys_filter(missing)).update(**expressions)
+
+
+class InventoryChange:
+    def __init__(self, serials):
+        self.serials = serials
+        self.discarded = False
+        self.before = device_states(serials, lock=True)
+
+    # the write didn't happen (e.g. the procedure reported an error), count nothing
+    def discard(self):
+        self.discarded = True
+
+    def apply(self):
+        if not self.discarded:
+            record_deltas(state_deltas(self.before, device_states(self.serials)))
+
+
+# Wraps a write to the given serials' device or mapping rows in a transaction that
+# records the change as deltas. The registered serials' device rows are locked for the
+# duration, so concurrent writes to the same devices are counted one after another.
+@contextmanager
+def track_inventory(serials):
+    serials = list(dict.fromkeys(serials))
+    with transaction.atomic():
+        change = InventoryChange(serials)
+        yield change
+        change.apply()
+
+
+# DeviceState of one serial, None when it isn't registered, with one unlocked query
+def device_state(serial):
+    row = annotated_devices().filter(serialnumber=serial).values_list('category', 'isapproved', 'isallocated', 'is_mapped', 'company').first()
+    if row is None:
+        return None
+    category, isapproved, isallocated, is_mapped, company = row
+    return DeviceState(category, isapproved, isallocated, (company or '') if is_mapped else None)
+
+
+# Inserts the deltas of one device moving from before to after (None: not registered)
+def record_change(serial, before, after):
+    record_deltas(state_deltas({serial: before} if before else {}, {serial: after} if after else {}))
+
+
+# The state a write setting the DeviceState fields in changes leaves a device in, None
+# when the write isn't counted: a serial that wasn't registered is only counted by the
+# writes registering it (changes carry its category), a company only moves on a mapped device.
+def outcome_state(before, changes):
+    if before is None and 'category' not in changes:
+        return None
+    state = before or DeviceState('', 0, 0, None)
+    if state.company is None:
+        changes = {field: value for field, value in changes.items() if field != 'company'}
+    return state._replace(**changes)
+
+
+# call_procedure for a write to one serial that reports a status. changes are the
+# DeviceState fields the procedure sets; they are counted when it reports success.
+def tracked_procedure(serial, name, in_args, changes, out_params=0):
+    before = device_state(serial)
+    result = call_procedure(name, in_args, out_params=out_params)
+    if result.status == 'success':
+        record_change(serial, before, outcome_state(before, changes))
+    return result
+
+
+# Dimension values as SQL expressions on annotated_devices(), matching contributions()
+DIMENSION_EXPRESSIONS = {
+    'category': F('category'),
+    'month': Substr('serialnumber', 1, 6),
+    'deviceType': Substr('serialnumber', 7, 3),
+    'company': F('company'),
+}
+
+
+METRIC_AGGREGATES = {
+    'registered': Count('pk'),
+    'approved': Count('pk', filter=Q(isapproved=1)),
+    'fetched': Count('pk', filter=Q(isallocated=FETCHED)),
+    'allocated': Count('pk', filter=Q(isallocated=ALLOCATED)),
+    'deactivated': Count('pk', filter=Q(isallocated=DEACTIVATED)),
+    'mapped': Count('pk', filter=Q(is_mapped=True)),
+}
+
+
+FOLD_BATCH = 5000
+
+
+def _delete_deltas(ids):
+    deleted = 0
+    for start in range(0, len(ids), FOLD_BATCH):
+        deleted += InventoryDelta.objects.filter(pk__in=ids[start:start + FOLD_BATCH]).delete()[0]
+    return deleted
+
+
+# Moves up to `limit` of the oldest deltas into the counters and returns how many it
+# folded. The deltas are deleted by id first: if a concurrent fold or rebuild took some
+# of them, nothing is applied and they are left to it.
+def fold_deltas(limit=FOLD_BATCH):
+    rows = list(InventoryDelta.objects.order_by('pk').values_list('pk', 'dimension', 'value', *METRICS)[:limit])
+    if not rows:
+        return 0
+
+    sums = defaultdict(Counter)
+    for pk, dimension, value, *counts in rows:
+        sums[dimension, value].update(dict(zip(METRICS, counts)))
+
+    with transaction.atomic():
+        if _delete_deltas([row[0] for row in rows]) != len(rows):
+            transaction.set_rollback(True)
+            return 0
+        add_to_counters({key: {metric: n for metric, n in change.items() if n} for key, change in sums.items()})
+    return len(rows)
+
+
+# Recomputes every counter with one GROUP BY per dimension and replaces the table.
+# The device tables and the deltas are read from one snapshot (REPEATABLE READ on MySQL):
+# the deltas of writes committed before it are part of the totals and are dropped, later
+# ones stay pending and are folded on top. Returns the number of counter rows written.
+def rebuild_inventory():
+    devices = annotated_devices()
+
+    if connection.vendor == 'mysql' and not connection.in_atomic_block:
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+
+    with transaction.atomic():
+        counted = list(InventoryDelta.objects.values_list('pk', flat=True))
+
+        counters = defaultdict(Counter)
+        for dimension, expression in DIMENSION_EXPRESSIONS.items():
+            queryset = devices.filter(is_mapped=True) if dimension == 'company' else devices
+            for group in queryset.annotate(key=expression).values('key').annotate(**METRIC_AGGREGATES).order_by():
+                # NULL and '' are the same value, as in contributions()
+                counters[dimension, group['key'] or ''].update({metric: group[metric] for metric in METRICS})
+
+        # deltas first, in the order fold_deltas() locks them
+        _delete_deltas(counted)
+        InventoryCounter.objects.all().delete()
+        InventoryCounter.objects.bulk_create([
+            InventoryCounter(dimension=dimension, value=value, **counts)
+            for (dimension, value), counts in counters.items()
+        ], batch_size=1000)
+    return len(counters)
+
+
+# Totals over all devices (every device has exactly one deviceType) and
+# {dimension: [{value, metric counts...}]} for the requested dimensions, after folding a
+# batch of deltas; deltas still pending after that are added to the counters read.
+# Values left without devices (e.g. a company whose mappings all moved) are skipped.
+def inventory_counts(dimensions=DIMENSIONS):
+    fold_deltas()
+
+    wanted = set(dimensions) | {'deviceType'}
+    counters = defaultdict(Counter)
+    pending = (InventoryDelta.objects.filter(dimension__in=wanted).values('dimension', 'value')
+               .annotate(**{metric: Sum(metric) for metric in METRICS}).order_by())
+    for rows in (InventoryCounter.objects.filter(dimension__in=wanted).values('dimension', 'value', *METRICS), pending):
+        for row in rows:
+            counters[row['dimension'], row['value']].update({metric: row[metric] for metric in METRICS})
+
+    totals = dict.fromkeys(METRICS, 0)
+    groups = {dimension: [] for dimension in dimensions}
+    for (dimension, value), counts in sorted(counters.items()):
+        if not counts['registered']:
+            continue
+        if dimension == 'deviceType':
+            for metric in METRICS:
+                totals[metric] += counts[metric]
+        if dimension in groups:
+            groups[dimension].append({'value': value, **{metric: counts[metric] for metric in METRICS}})
+    return totals, groups
@@ -0,0 +1,320 @@
+import atexit
+import csv
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .bulk import import_customer_mappings, register_serial_numbers, summarize
+from .inventory import rebuild_inventory
+from .mapping_query import orm_mapping_count, parse_mapping_query, stream_mapping_rows
+from .models import Job
+from .sequences import generate_serials
+
+
+# Background jobs: bulk imports, exports and rebuilds that would outlast a request run on
+# a per-process thread pool instead. A job is a row in the job table (kind, params, status,
+# progress, result), so any worker can claim a queued job, and status and results are
+# still there after the process that ran it is gone. Downloadable output is written to
+# JOB_RESULTS_DIR.
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class JobContext:
+    def __init__(self, job):
+        self.id = job.pk
+        self.kind = job.kind
+        self.params = job.params
+        self.done = 0
+        self.total = None
+        self.result_file = ''
+        self.result_content_type = ''
+
+    # Only kept in memory: the handler may be inside a long transaction, so the runner
+    # writes progress to the job row from its own connection with the heartbeat
+    def progress(self, done, total=None):
+        self.done = done
+        self.total = total
+
+    def open_result(self, extension, content_type):
+        os.makedirs(settings.JOB_RESULTS_DIR, exist_ok=True)
+        self.result_file = f'{self.id}.{extension}'
+        self.result_content_type = content_type
+        return open(result_path(self.result_file), 'w', encoding='utf-8', newline='')
+
+    # per-row results of a bulk operation as CSV
+    def write_results(self, results):
+        with self.open_result('csv', 'text/csv') as output:
+            writer = csv.DictWriter(output, fieldnames=['row', 'serialnumber', 'status', 'message'])
+            writer.writeheader()
+            writer.writerows(results)
+
+
+def result_path(name):
+    return os.path.join(settings.JOB_RESULTS_DIR, name)
+
+
+def run_register_serial_numbers(job):
+    results = register_serial_numbers(job.params['serialnumbers'], progress=job.progress)
+    job.write_results(results)
+    return {'summary': summarize(results)}
+
+
+def run_import_customer_mappings(job):
+    results = import_customer_mappings(job.params['mappings'], progress=job.progress)
+    job.write_results(results)
+    return {'summary': summarize(results)}
+
+
+def run_generate_serial_numbers(job):
+    serials, results, shortfall = generate_serials(job.params['prefix'], job.params['count'], register=job.params['register'], progress=job.progress)
+    if results is not None:
+        job.write_results(results)
+        return {'summary': summarize(results), 'shortfall': shortfall, 'first': serials[0], 'last': serials[-1]}
+
+    with job.open_result('csv', 'text/csv') as output:
+        output.write('serialnumber\n' + '\n'.join(serials) + '\n')
+    return {'count': len(serials), 'first': serials[0], 'last': serials[-1]}
+
+
+def run_export_customer_mappings(job):
+    # the streaming export's encoders, written to the result file
+    from .views.mapping_views import EXPORT_FORMATS
+
+    query = parse_mapping_query(job.params)
+    chunks, content_type, extension = EXPORT_FORMATS[job.params.get('fileFormat', 'csv')]
+    total = orm_mapping_count(query)
+
+    def counted(rows):
+        for done, row in enumerate(rows, 1):
+            job.progress(done, total)
+            yield row
+
+    with job.open_result(extension, content_type) as output:
+        for chunk in chunks(counted(stream_mapping_rows(query))):
+            output.write(chunk)
+    return {'rows': job.done}
+
+
+def run_rebuild_inventory(job):
+    return {'rows': rebuild_inventory()}
+
+
+# kind -> handler(JobContext) returning the result summary
+JOB_KINDS = {
+    'register_serial_numbers': run_register_serial_numbers,
+    'import_customer_mappings': run_import_customer_mappings,
+    'generate_serial_numbers': run_generate_serial_numbers,
+    'export_customer_mappings': run_export_customer_mappings,
+    'rebuild_inventory': run_rebuild_inventory,
+}
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'[:64]
+
+
+# Marks the oldest queued job running for this worker and returns it (None if the queue
+# is empty). Jobs locked by another worker's claim are skipped, as in reserve_serials.
+def claim_job(worker):
+    with transaction.atomic():
+        queued = Job.objects.filter(status=QUEUED).order_by('created_at')
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        else:
+            queued = queued.select_for_update()
+
+        job = queued.first()
+        if job is None:
+            return None
+        job.status = RUNNING
+        job.worker = worker
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+
+# Jobs whose worker stopped sending heartbeats died with it (killed or crashed worker).
+# They are failed rather than rerun: a half-done import can't tell which of its rows it
+# already wrote.
+def fail_stale_jobs(stale_seconds):
+    now = timezone.now()
+    return Job.objects.filter(status=RUNNING, heartbeat_at__lt=now - timedelta(seconds=stale_seconds)).update(
+        status=FAILED, error='Worker stopped while the job was running, submit it again', finished_at=now,
+    )
+
+
+def submit_job(kind, params, created_by=''):
+    job = Job.objects.create(kind=kind, params=params, created_by=created_by)
+    runner = start_job_runner()
+    if runner is not None:
+        runner.wakeup()
+    return job
+
+
+# Per-process job runner: a dispatcher thread claims queued jobs while the pool has a free
+# thread, runs them there and, every poll_seconds, writes the running jobs' progress and
+# heartbeat and fails other workers' stale jobs.
+# At interpreter exit running jobs are finished first (the pool's threads are joined before
+# atexit hooks run); a killed worker's jobs are failed by the next runner's stale check.
+class JobRunner:
+    def __init__(self, workers=2, poll_seconds=2, stale_seconds=60):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.worker = worker_name()
+
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+        self.started = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.errors = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._thread = threading.Thread(target=self._run, name='job-runner', daemon=True)
+            self._thread.start()
+        atexit.register(self.shutdown)
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                self._heartbeat()
+                fail_stale_jobs(self.stale_seconds)
+                while not self._stopped and len(self._running) < self.workers:
+                    job = claim_job(self.worker)
+                    if job is None:
+                        break
+                    self._dispatch(job)
+            except Exception:
+                self.errors += 1
+            finally:
+                # the thread keeps its own connection; don't hold it between cycles
+                connection.close()
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+
+    def _dispatch(self, job):
+        context = JobContext(job)
+        with self._lock:
+            self._running[job.pk] = context
+        try:
+            self._executor.submit(self._execute, job, context)
+        except RuntimeError:
+            # interpreter shutting down, leave the job to another worker
+            with self._lock:
+                del self._running[job.pk]
+            Job.objects.filter(pk=job.pk).update(status=QUEUED, worker='', started_at=None, heartbeat_at=None)
+
+    def _heartbeat(self):
+        with self._lock:
+            running = list(self._running.values())
+        now = timezone.now()
+        for context in running:
+            Job.objects.filter(pk=context.id, status=RUNNING).update(progress=context.done, total=context.total, heartbeat_at=now)
+
+    def _execute(self, job, context):
+        self.started += 1
+        try:
+            handler = JOB_KINDS.get(job.kind)
+            if handler is None:
+                raise ValueError(f'Unknown job kind {job.kind!r}')
+            result, status, error = handler(context), SUCCEEDED, ''
+        except Exception as e:
+            result, status, error = None, FAILED, str(e)
+            if context.result_file:
+                with suppress(FileNotFoundError):
+                    os.remove(result_path(context.result_file))
+                context.result_file = context.result_content_type = ''
+
+        try:
+            # a job failed as stale meanwhile keeps that outcome
+            Job.objects.filter(pk=job.pk, status=RUNNING, worker=self.worker).update(
+                status=status, result=result, error=error, progress=context.done, total=context.total,
+                result_file=context.result_file, result_content_type=context.result_content_type,
+                finished_at=timezone.now(),
+            )
+        finally:
+            with self._lock:
+                del self._running[job.pk]
+            connection.close()
+            self._wakeup.set()
+
+        if status == SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def stats(self):
+        return {
+            'worker': self.worker,
+            'workers': self.workers,
+            'running': len(self._running),
+            'started': self.started,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+# The runner starts on the first job submitted or looked up in a worker. With JOB_WORKERS=0
+# this process only queues jobs and `manage.py run_jobs` runs them.
+def get_job_runner():
+    global _runner
+    if getattr(settings, 'JOB_WORKERS', 2) <= 0:
+        return None
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(
+                    workers=settings.JOB_WORKERS,
+                    poll_seconds=getattr(settings, 'JOB_POLL_SECONDS', 2),
+                    stale_seconds=getattr(settings, 'JOB_STALE_SECONDS', 60),
+                )
+    return _runner
+
+
+# Starts this process's runner if it has one, e.g. to pick up jobs queued before a restart
+def start_job_runner():
+    runner = get_job_runner()
+    if runner is not None:
+        runner.start()
+    return runner
+
+
+def job_runner_stats():
+    return _runner.stats() if _runner is not None else None
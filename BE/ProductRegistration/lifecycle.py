@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+from .allocation import ALLOCATED, DEACTIVATED
+from .bulk import chunked
+from .device_cache import invalidate_device_details
+from .inventory import device_states, outcome_state, record_deltas, state_deltas
+from .procedures import call_procedure
+
+
+# Device lifecycle transitions applied to many serials at once, see "Device Lifecycle"
+# in the README. Each serial goes through the stored procedure of the single-serial
+# endpoint, with the same arguments, so the rules and the status and message of every
+# serial are the procedure's own. changes are the DeviceState fields it sets, for the
+# inventory counts.
+
+Transition = namedtuple('Transition', ['procedure', 'args', 'changes'])
+
+TRANSITIONS = {
+    'approve': Transition('update_serial_number_approval', [1], {'isapproved': 1}),
+    'allocate': Transition('update_serial_number_allocate', [ALLOCATED], {'isallocated': ALLOCATED}),
+    'deactivate': Transition('deactivate_serial_number', [], {'isallocated': DEACTIVATED}),
+}
+
+
+# Calls the transition's procedure for every serial. Per chunk the devices' state is
+# read once before the calls and the moves of the serials the procedure accepted are
+# counted with one insert after them, as tracked_procedure does for one serial.
+# Returns (moved serials, rejected [{serialnumber, status, message}]).
+def apply_transition(name, serials):
+    transition = TRANSITIONS[name]
+    serials = [value.get('serialnumber') if isinstance(value, dict) else value for value in serials]
+    serials = list(dict.fromkeys(str(value).strip() for value in serials if value is not None and str(value).strip()))
+
+    moved = []
+    rejected = []
+    for chunk in chunked(serials):
+        before = device_states(chunk)
+        after = {}
+        chunk_moved = []
+        for serial in chunk:
+            result = call_procedure(transition.procedure, [serial, *transition.args], out_params=2)
+            if result.status != 'success':
+                rejected.append({'serialnumber': serial, 'status': result.status, 'message': result.message})
+                continue
+            chunk_moved.append(serial)
+            state = outcome_state(before.get(serial), transition.changes)
+            if state is not None:
+                after[serial] = state
+
+        record_deltas(state_deltas({serial: before[serial] for serial in after}, after))
+        invalidate_device_details(*chunk_moved)
+        moved.extend(chunk_moved)
+
+    return moved, rejected
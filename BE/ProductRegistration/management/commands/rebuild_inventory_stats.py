@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ProductRegistration.inventory import rebuild_inventory
+
+
+class Command(BaseCommand):
+    help = 'Recompute the inventory rollup counters (inventory_stats) from the device and mapping tables'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        rows = rebuild_inventory()
+        self.stdout.write(self.style.SUCCESS(f'{rows} inventory counters rebuilt in {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,23 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ProductRegistration.jobs import JobRunner
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (sil/jobs/) in this process until interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=max(settings.JOB_WORKERS, 1), help='jobs run at the same time')
+
+    def handle(self, *args, **options):
+        runner = JobRunner(workers=options['workers'], poll_seconds=settings.JOB_POLL_SECONDS, stale_seconds=settings.JOB_STALE_SECONDS)
+        runner.start()
+        self.stdout.write(f'Running jobs as {runner.worker} with {runner.workers} threads, Ctrl-C to stop')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping, waiting for running jobs to finish')
+            runner.shutdown()
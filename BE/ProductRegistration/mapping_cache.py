@@ -0,0 +1,63 @@
+import threading
+
+from django.conf import settings
+
+from .cache import TTLCache
+
+
+# Listing results of get_customer_mappings, keyed on the normalized MappingQuery.
+# Pages and total counts are cached separately: the count depends only on the filters,
+# so flipping pages or re-sorting reuses it. Every key carries the mapping version,
+# which is bumped by each successful mapping write; a page read while a write was in
+# flight is stored under the old version and never served.
+
+MAPPING_CACHE_TTL = getattr(settings, 'MAPPING_CACHE_TTL', 30)
+MAPPING_CACHE_MAX_SIZE = getattr(settings, 'MAPPING_CACHE_MAX_SIZE', 512)
+
+mapping_page_cache = TTLCache('mapping_pages', max_size=MAPPING_CACHE_MAX_SIZE, ttl=MAPPING_CACHE_TTL)
+mapping_count_cache = TTLCache('mapping_counts', max_size=MAPPING_CACHE_MAX_SIZE, ttl=MAPPING_CACHE_TTL)
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def mapping_version():
+    return _version
+
+
+def invalidate_mappings():
+    global _version
+    with _version_lock:
+        _version += 1
+    mapping_page_cache.clear()
+    mapping_count_cache.clear()
+
+
+def count_key(query):
+    return query._replace(page_number=0, page_size=0, sort_index=0, sort_direction=0)
+
+
+# fetch_page(query) -> (rows, total_count), called only when either part is missing
+def get_mapping_page(query, fetch_page):
+    version = _version
+    page_key = (version, query)
+    total_key = (version, count_key(query))
+
+    rows = mapping_page_cache.get(page_key)
+    total_count = mapping_count_cache.get(total_key)
+    if rows is None or total_count is None:
+        rows, total_count = fetch_page(query)
+        mapping_page_cache.set(page_key, rows)
+        mapping_count_cache.set(total_key, total_count)
+
+    return rows, total_count
+
+
+# count(query) -> total, for callers that fetch the rows themselves
+def get_mapping_count(query, count):
+    key = (_version, count_key(query))
+    total_count = mapping_count_cache.get(key)
+    if total_count is None:
+        total_count = count(query)
+        mapping_count_cache.set(key, total_count)
+    return total_count
@@ -0,0 +1,278 @@
+import datetime
+from collections import namedtuple
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Palmteccustomerdetails
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+
+try:
+    from MySQLdb.cursors import SSCursor
+    from django.db.backends.mysql.base import CursorWrapper as MySQLCursorWrapper
+except ImportError:
+    SSCursor = None
+
+
+# (response key, model field) in the column order returned by get_serial_customer_details
+MAPPING_COLUMNS = [
+    ('upiDeviceSerialNumber', 'upideviceserialnumber'),
+    ('uniqueIdentifier', 'uniqueidentifier'),
+    ('customerCode', 'customercode'),
+    ('customerName', 'customername'),
+    ('company', 'company'),
+    ('devicetype', 'devicetype'),
+    ('isApproved', 'isapproved'),
+    ('createdOn', 'createdon'),
+    ('modifiedOn', 'modifiedon'),
+    ('cLicenseURL', 'clicenseurl'),
+    ('versionDetails', 'versiondetails'),
+]
+MAPPING_KEYS = [key for key, _ in MAPPING_COLUMNS]
+MAPPING_FIELDS = [field for _, field in MAPPING_COLUMNS]
+FIELD_POSITIONS = {field: position for position, field in enumerate(MAPPING_FIELDS)}
+
+# sortingOrderIndex -> model field
+SORT_FIELDS = {
+    0: 'upideviceserialnumber',
+    1: 'customercode',
+    2: 'customername',
+    3: 'company',
+    4: 'devicetype',
+    5: 'isapproved',
+    6: 'createdon',
+    7: 'modifiedon',
+}
+DEFAULT_SORT_INDEX = 1
+
+STREAM_CHUNK_SIZE = 2000
+
+DEFAULT_FROM_DATE = '2020-01-01'
+DEFAULT_TO_DATE = '2099-12-31'
+
+
+# Normalized get_customer_mappings parameters, with the same defaults the view has always used
+MappingQuery = namedtuple('MappingQuery', [
+    'serial_number', 'customer_code', 'customer_name', 'company', 'device_type',
+    'from_date', 'to_date', 'approved_status', 'search_text',
+    'page_number', 'page_size', 'sort_index', 'sort_direction',
+])
+
+
+def _int_param(params, name, default):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def _date_param(params, name, default):
+    value = params.get(name) or default
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def parse_mapping_query(params):
+    return MappingQuery(
+        serial_number=(params.get('serialNumber') or '').strip() or None,
+        customer_code=_int_param(params, 'customerCode', 0),
+        customer_name=(params.get('customerName') or '').strip(),
+        company=(params.get('company') or '').strip(),
+        device_type=(params.get('deviceType') or '').strip(),
+        from_date=_date_param(params, 'fromDate', DEFAULT_FROM_DATE),
+        to_date=_date_param(params, 'toDate', DEFAULT_TO_DATE),
+        approved_status=_int_param(params, 'approvedStatus', -1),
+        search_text=(params.get('searchText') or '').strip(),
+        page_number=max(_int_param(params, 'pageNumber', 0), 0),
+        page_size=max(_int_param(params, 'pageSize', 10), 1),
+        sort_index=_int_param(params, 'sortingOrderIndex', DEFAULT_SORT_INDEX),
+        sort_direction=_int_param(params, 'sortingOrderDirection', 0),
+    )
+
+
+# IN parameters of get_serial_customer_details
+def procedure_args(query):
+    return [
+        query.serial_number,
+        query.customer_code,
+        query.customer_name,
+        query.company,
+        query.device_type,
+        query.from_date.isoformat(),
+        query.to_date.isoformat(),
+        query.approved_status,
+        query.search_text,
+        query.page_number,
+        query.page_size,
+        query.sort_index,
+        query.sort_direction,
+    ]
+
+
+def _day_start(date_value):
+    return timezone.make_aware(datetime.datetime.combine(date_value, datetime.time.min))
+
+
+# ORM equivalent of the filtering done by get_serial_customer_details
+def filter_mappings(query):
+    queryset = Palmteccustomerdetails.objects.filter(Q(isdeleted__isnull=True) | Q(isdeleted=0))
+
+    if query.serial_number:
+        queryset = queryset.filter(upideviceserialnumber__icontains=query.serial_number)
+    if query.customer_code:
+        queryset = queryset.filter(customercode=query.customer_code)
+    if query.customer_name:
+        queryset = queryset.filter(customername__icontains=query.customer_name)
+    if query.company:
+        queryset = queryset.filter(company__icontains=query.company)
+    if query.device_type:
+        queryset = queryset.filter(devicetype=query.device_type)
+    if query.approved_status != -1:
+        queryset = queryset.filter(isapproved=query.approved_status)
+
+    # The default window spans every mapping, so unless the caller narrows it only the
+    # NULL check is applied: a range on createdOn would otherwise lead the planner to scan
+    # that index and sort, instead of reading the sort column's index in order.
+    queryset = queryset.filter(createdon__isnull=False)
+    if query.from_date != datetime.date.fromisoformat(DEFAULT_FROM_DATE):
+        queryset = queryset.filter(createdon__gte=_day_start(query.from_date))
+    if query.to_date != datetime.date.fromisoformat(DEFAULT_TO_DATE):
+        queryset = queryset.filter(createdon__lt=_day_start(query.to_date + datetime.timedelta(days=1)))
+
+    if query.search_text:
+        text = query.search_text
+        queryset = queryset.filter(
+            Q(upideviceserialnumber__icontains=text)
+            | Q(customercode__icontains=text)
+            | Q(customername__icontains=text)
+            | Q(company__icontains=text)
+        )
+
+    return queryset
+
+
+def sort_field(query):
+    return SORT_FIELDS.get(query.sort_index, SORT_FIELDS[DEFAULT_SORT_INDEX])
+
+
+def sort_fields(query):
+    field = sort_field(query)
+    prefix = '-' if query.sort_direction == 1 else ''
+    # primary key as tie-breaker keeps the order total and stable
+    if field == 'upideviceserialnumber':
+        return [prefix + field]
+    return [prefix + field, prefix + 'upideviceserialnumber']
+
+
+def _mapping_queryset(query, serials):
+    queryset = filter_mappings(query)
+    if serials is not None:
+        queryset = queryset.filter(upideviceserialnumber__in=serials)
+    return queryset
+
+
+# One listing page through the ORM, optionally restricted to the given serials
+# (e.g. search candidates). Returns (value tuples in MAPPING_FIELDS order, total count).
+def orm_mapping_page(query, serials=None):
+    queryset = _mapping_queryset(query, serials)
+    total_count = queryset.count()
+    rows = queryset.order_by(*sort_fields(query)).values_list(*MAPPING_FIELDS)[query.page_number:query.page_number + query.page_size]
+    return list(rows), total_count
+
+
+def orm_mapping_count(query, serials=None):
+    return _mapping_queryset(query, serials).count()
+
+
+# Continuation token for the page after (or before) a listing row. It carries the sort
+# order it was issued for and the row's sort key (sort column value, serial number).
+def mapping_cursor(query, row, before=False):
+    value = row[FIELD_POSITIONS[sort_field(query)]]
+    # rows from the procedure carry naive UTC datetimes
+    if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    side = 'before' if before else 'after'
+    return encode_cursor(query.sort_index, query.sort_direction, side, value, row[FIELD_POSITIONS['upideviceserialnumber']])
+
+
+# Rows that come after (value, serial) in the listing order. NULLs sort first ascending
+# and last descending on both MySQL and SQLite, so reading backwards is the same
+# condition with the direction flipped.
+def _seek_condition(field, value, serial, descending):
+    op = 'lt' if descending else 'gt'
+    tie = Q(**{f'upideviceserialnumber__{op}': serial})
+    if field == 'upideviceserialnumber':
+        return tie
+    if value is None:
+        nulls = Q(**{f'{field}__isnull': True}) & tie
+        return nulls if descending else nulls | Q(**{f'{field}__isnull': False})
+
+    later = Q(**{f'{field}__{op}': value}) | (Q(**{field: value}) & tie)
+    return later | Q(**{f'{field}__isnull': True}) if descending else later
+
+
+# One listing page continuing from a mapping_cursor token, read with a seek on the sort
+# column's index instead of an offset, so every page costs the same at any depth.
+# Returns (value tuples in MAPPING_FIELDS order, next cursor, previous cursor).
+def orm_mapping_seek_page(query, token, serials=None):
+    sort_index, sort_direction, side, value, serial = decode_cursor(token, 5)
+    if (sort_index, sort_direction) != (query.sort_index, query.sort_direction) or side not in ('after', 'before'):
+        raise InvalidCursor('Cursor does not match the requested sort order')
+
+    before = side == 'before'
+    descending = query.sort_direction == 1
+    ordering = sort_fields(query)
+    if before:
+        ordering = [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+    queryset = _mapping_queryset(query, serials).filter(_seek_condition(sort_field(query), value, serial, descending != before))
+    rows = list(queryset.order_by(*ordering).values_list(*MAPPING_FIELDS)[:query.page_size + 1])
+    has_more = len(rows) > query.page_size
+    rows = rows[:query.page_size]
+    if before:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    # the token's own side always has rows (the one it was issued from)
+    next_cursor = mapping_cursor(query, rows[-1]) if before or has_more else None
+    prev_cursor = mapping_cursor(query, rows[0], before=True) if not before or has_more else None
+    return rows, next_cursor, prev_cursor
+
+
+# Yields value tuples without materializing the result. On MySQL the query runs on an
+# unbuffered server-side cursor so rows are read off the socket as they are consumed.
+# That cursor gets a database connection of its own (checked out of the pool with the
+# pooled backend), held until the generator is closed: the request's connection is
+# closed, and may be handed to another request, while the response is still streaming.
+def stream_mapping_rows(query):
+    queryset = filter_mappings(query).order_by(*sort_fields(query)).values_list(*MAPPING_FIELDS)
+
+    if connection.vendor != 'mysql' or SSCursor is None:
+        yield from queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        return
+
+    sql, params = queryset.query.sql_with_params()
+    stream_connection = connections.create_connection(connection.alias)
+    try:
+        stream_connection.ensure_connection()
+        # wrapped like the backend's own cursors, so the execute wrappers (query metrics) see it
+        cursor = stream_connection._prepare_cursor(MySQLCursorWrapper(stream_connection.connection.cursor(SSCursor)))
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    finally:
+        stream_connection.close()
@@ -0,0 +1,267 @@
+import contextvars
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+# Per-process request metrics, exported by /metrics/ in the Prometheus text format.
+# MetricsMiddleware times every request and labels it with the URL name of its view
+# (never the raw path, so unknown URLs can't grow the series); the database queries and
+# stored procedure calls made while handling it are counted through a context variable,
+# which also follows the async views' work onto the async_db threads.
+#
+# Every worker process keeps its own numbers, and a scrape reads the worker it reaches.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'query_seconds', 'procedures')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.procedures = 0
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries_per_request = Histogram(QUERY_COUNT_BUCKETS)
+        self.statuses = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.procedures = 0
+
+
+_views = {}
+_lock = threading.Lock()
+
+
+def record_request(view, method, status_code, elapsed, request_metrics):
+    with _lock:
+        entry = _views.get((view, method))
+        if entry is None:
+            entry = _views[(view, method)] = ViewMetrics()
+        entry.latency.observe(elapsed)
+        entry.queries_per_request.observe(request_metrics.queries)
+        entry.statuses[status_code] = entry.statuses.get(status_code, 0) + 1
+        entry.queries += request_metrics.queries
+        entry.query_seconds += request_metrics.query_seconds
+        entry.procedures += request_metrics.procedures
+
+
+def count_procedure_call():
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.procedures += 1
+
+
+# A query that doesn't go through the execute wrappers, i.e. cursor.callproc
+def record_query(seconds):
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.queries += 1
+        request_metrics.query_seconds += seconds
+
+
+def _count_query(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.queries += 1
+        request_metrics.query_seconds += time.perf_counter() - start
+
+
+def _add_query_counter(sender, connection, **kwargs):
+    # the wrapper object of a thread outlives its reconnects, add the counter once
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+# Called from AppConfig.ready when METRICS_ENABLED
+def install_query_counter():
+    connection_created.connect(_add_query_counter, weak=False)
+    for alias in connections:
+        _add_query_counter(None, connections[alias])
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - start, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._record(request, response, time.perf_counter() - start, request_metrics)
+        return response
+
+    def _record(self, request, response, elapsed, request_metrics):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match is not None else 'unmatched'
+        record_request(view, request.method, response.status_code, elapsed, request_metrics)
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_lines(name, histogram, **labels):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {histogram.total}')
+    lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+    return lines
+
+
+def _family(lines, name, kind, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    lines.extend(samples)
+
+
+# procedures / pools are procedure_stats() / connection_pool_stats()
+def render_metrics(procedures, pools):
+    with _lock:
+        # copy under the lock, requests finishing meanwhile must not tear the histograms
+        snapshot = [
+            (view, method, _copy(entry.latency), _copy(entry.queries_per_request), sorted(entry.statuses.items()),
+             entry.queries, entry.query_seconds, entry.procedures)
+            for (view, method), entry in sorted(_views.items())
+        ]
+
+    lines = []
+    _family(lines, 'sil_requests_total', 'counter', 'Requests handled, by view, method and status code.', [
+        f'sil_requests_total{_labels(view=view, method=method, status=code)} {count}'
+        for view, method, _, _, statuses, _, _, _ in snapshot for code, count in statuses
+    ])
+    _family(lines, 'sil_request_duration_seconds', 'histogram', 'Time from the middleware receiving a request to the response, by view.', [
+        line for view, method, latency, _, _, _, _, _ in snapshot
+        for line in _histogram_lines('sil_request_duration_seconds', latency, view=view, method=method)
+    ])
+    _family(lines, 'sil_request_db_queries', 'histogram', 'Database queries issued per request, by view.', [
+        line for view, method, _, queries, _, _, _, _ in snapshot
+        for line in _histogram_lines('sil_request_db_queries', queries, view=view, method=method)
+    ])
+    _family(lines, 'sil_db_queries_total', 'counter', 'Database queries issued while handling requests, by view.', [
+        f'sil_db_queries_total{_labels(view=view, method=method)} {queries}'
+        for view, method, _, _, _, queries, _, _ in snapshot
+    ])
+    _family(lines, 'sil_db_query_seconds_total', 'counter', 'Time spent executing database queries, by view.', [
+        f'sil_db_query_seconds_total{_labels(view=view, method=method)} {seconds}'
+        for view, method, _, _, _, _, seconds, _ in snapshot
+    ])
+    _family(lines, 'sil_view_procedure_calls_total', 'counter', 'Stored procedure calls made while handling requests, by view.', [
+        f'sil_view_procedure_calls_total{_labels(view=view, method=method)} {procedures}'
+        for view, method, _, _, _, _, _, procedures in snapshot
+    ])
+
+    procedures = sorted(procedures.items())
+    _family(lines, 'sil_procedure_calls_total', 'counter', 'Stored procedure calls, by procedure.', [
+        f'sil_procedure_calls_total{_labels(procedure=name)} {entry["calls"]}' for name, entry in procedures
+    ])
+    _family(lines, 'sil_procedure_errors_total', 'counter', 'Stored procedure calls that raised, by procedure.', [
+        f'sil_procedure_errors_total{_labels(procedure=name)} {entry["errors"]}' for name, entry in procedures
+    ])
+    _family(lines, 'sil_procedure_seconds_total', 'counter', 'Time spent in stored procedure calls, by procedure.', [
+        f'sil_procedure_seconds_total{_labels(procedure=name)} {entry["totalSeconds"]}' for name, entry in procedures
+    ])
+
+    pools = sorted((pools or {}).items())
+    _family(lines, 'sil_db_pool_connections', 'gauge', 'Open pooled database connections, by state.', [
+        f'sil_db_pool_connections{_labels(database=alias, state=state)} {pool[key]}'
+        for alias, pool in pools for state, key in (('idle', 'idle'), ('in_use', 'inUse'))
+    ])
+    _family(lines, 'sil_db_pool_size', 'gauge', 'Most connections the pool opens.', [
+        f'sil_db_pool_size{_labels(database=alias)} {pool["size"]}' for alias, pool in pools
+    ])
+    _family(lines, 'sil_db_pool_waits_total', 'counter', 'Checkouts that waited for a free connection.', [
+        f'sil_db_pool_waits_total{_labels(database=alias)} {pool["waits"]}' for alias, pool in pools
+    ])
+    _family(lines, 'sil_db_pool_wait_seconds_total', 'counter', 'Time checkouts spent waiting for a free connection.', [
+        f'sil_db_pool_wait_seconds_total{_labels(database=alias)} {pool["totalWaitSeconds"]}' for alias, pool in pools
+    ])
+    _family(lines, 'sil_db_pool_timeouts_total', 'counter', 'Checkouts that gave up waiting.', [
+        f'sil_db_pool_timeouts_total{_labels(database=alias)} {pool["timeouts"]}' for alias, pool in pools
+    ])
+
+    _family(lines, 'sil_process_info', 'gauge', 'Worker process the metrics were read from.', [
+        f'sil_process_info{_labels(pid=os.getpid())} 1'
+    ])
+    return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.total = histogram.total
+    copy.count = histogram.count
+    return copy
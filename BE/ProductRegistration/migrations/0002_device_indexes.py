@@ -0,0 +1,86 @@
+from django.db import migrations, models
+
+
+class AddTableIndex(migrations.AddIndex):
+    # AddIndex for the unmanaged device tables: Django skips schema changes on unmanaged
+    # models, but these tables are the ones the listing queries run against. The index is
+    # only created when the table exists and doesn't already have it, so the migration is
+    # safe on databases where the tables are created later or the index was added by hand.
+
+    def _existing(self, schema_editor, model):
+        connection = schema_editor.connection
+        table = model._meta.db_table
+        if table not in connection.introspection.table_names():
+            return None
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, table)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        existing = self._existing(schema_editor, model)
+        if existing is not None and self.index.name not in existing:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        existing = self._existing(schema_editor, model)
+        if existing is not None and self.index.name in existing:
+            schema_editor.remove_index(model, self.index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductRegistration', '0001_initial'),
+    ]
+
+    operations = [
+        AddTableIndex(
+            model_name='serialdata',
+            index=models.Index(fields=['createdate', 'serialnumber'], name='serial_created_idx'),
+        ),
+        AddTableIndex(
+            model_name='serialdata',
+            index=models.Index(fields=['isapproved', 'isallocated', 'createdate', 'serialnumber'], name='serial_alloc_idx'),
+        ),
+        AddTableIndex(
+            model_name='serialdata',
+            index=models.Index(fields=['modifieddate'], name='serial_modified_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['customercode', 'upideviceserialnumber'], name='mapping_code_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['customername', 'upideviceserialnumber'], name='mapping_name_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['company', 'upideviceserialnumber'], name='mapping_company_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['devicetype', 'upideviceserialnumber'], name='mapping_devicetype_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['isapproved', 'upideviceserialnumber'], name='mapping_approved_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['createdon', 'upideviceserialnumber'], name='mapping_created_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['modifiedon', 'upideviceserialnumber'], name='mapping_modified_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['devicetype', 'createdon'], name='mapping_type_created_idx'),
+        ),
+        AddTableIndex(
+            model_name='palmteccustomerdetails',
+            index=models.Index(fields=['isapproved', 'createdon'], name='mapping_appr_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductRegistration', '0002_device_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=16)),
+                ('value', models.CharField(max_length=32)),
+                ('registered', models.BigIntegerField(default=0)),
+                ('approved', models.BigIntegerField(default=0)),
+                ('fetched', models.BigIntegerField(default=0)),
+                ('allocated', models.BigIntegerField(default=0)),
+                ('deactivated', models.BigIntegerField(default=0)),
+                ('mapped', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'inventory_counter',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventorycounter',
+            constraint=models.UniqueConstraint(fields=('dimension', 'value'), name='inventory_counter_key'),
+        ),
+    ]
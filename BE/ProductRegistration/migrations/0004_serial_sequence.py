@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductRegistration', '0003_inventory_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerialSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=9, primary_key=True, serialize=False)),
+                ('next_sequence', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'serial_sequence',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:33
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductRegistration', '0004_serial_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=32)),
+                ('status', models.CharField(default='queued', max_length=16)),
+                ('params', models.JSONField(default=dict)),
+                ('created_by', models.CharField(blank=True, max_length=150)),
+                ('progress', models.IntegerField(default=0)),
+                ('total', models.IntegerField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('result_file', models.CharField(blank=True, max_length=255)),
+                ('result_content_type', models.CharField(blank=True, max_length=64)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'job',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='job_status_idx'), models.Index(fields=['created_by', 'created_at'], name='job_owner_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ProductRegistration', '0005_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryDelta',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('dimension', models.CharField(max_length=16)),
+                ('value', models.CharField(max_length=32)),
+                ('registered', models.BigIntegerField(default=0)),
+                ('approved', models.BigIntegerField(default=0)),
+                ('fetched', models.BigIntegerField(default=0)),
+                ('allocated', models.BigIntegerField(default=0)),
+                ('deactivated', models.BigIntegerField(default=0)),
+                ('mapped', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'inventory_delta',
+            },
+        ),
+    ]
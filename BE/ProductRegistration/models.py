@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -15,6 +17,14 @@ class Serialdata(models.Model):
     class Meta:
         managed = False
         db_table = 'serialdata'
+        # unmanaged, so migration 0002_device_indexes creates these on the existing table
+        indexes = [
+            # keyset listing of get_serial_numbers
+            models.Index(fields=['createdate', 'serialnumber'], name='serial_created_idx'),
+            # reservation of approved, unallocated serials oldest first
+            models.Index(fields=['isapproved', 'isallocated', 'createdate', 'serialnumber'], name='serial_alloc_idx'),
+            models.Index(fields=['modifieddate'], name='serial_modified_idx'),
+        ]
 
 
 class Palmteccustomerdetails(models.Model):
@@ -34,6 +44,21 @@ class Palmteccustomerdetails(models.Model):
     class Meta:
         managed = False
         db_table = 'palmteccustomerdetails'
+        # unmanaged, so migration 0002_device_indexes creates these on the existing table.
+        # One index per sortable listing column, with the primary key as tie-breaker
+        # so ORDER BY column, serial LIMIT n reads the index in order.
+        indexes = [
+            models.Index(fields=['customercode', 'upideviceserialnumber'], name='mapping_code_idx'),
+            models.Index(fields=['customername', 'upideviceserialnumber'], name='mapping_name_idx'),
+            models.Index(fields=['company', 'upideviceserialnumber'], name='mapping_company_idx'),
+            models.Index(fields=['devicetype', 'upideviceserialnumber'], name='mapping_devicetype_idx'),
+            models.Index(fields=['isapproved', 'upideviceserialnumber'], name='mapping_approved_idx'),
+            models.Index(fields=['createdon', 'upideviceserialnumber'], name='mapping_created_idx'),
+            models.Index(fields=['modifiedon', 'upideviceserialnumber'], name='mapping_modified_idx'),
+            # common filter combinations with the always-applied created date range
+            models.Index(fields=['devicetype', 'createdon'], name='mapping_type_created_idx'),
+            models.Index(fields=['isapproved', 'createdon'], name='mapping_appr_created_idx'),
+        ]
 
 
 class CustomUser(AbstractUser):
@@ -41,4 +66,82 @@ class CustomUser(AbstractUser):
     is_verified = models.BooleanField(default=False)
     
     class Meta:
-        db_table = 'custom_user'
\ No newline at end of file
+        db_table = 'custom_user'
+
+
+# Rollup counters of the device inventory, one row per (dimension, value), e.g.
+# ('month', '202505') or ('company', 'Palmtec'). Kept up to date by ProductRegistration.inventory
+# on every lifecycle write and rebuilt by the rebuild_inventory_stats command.
+class InventoryCounter(models.Model):
+    dimension = models.CharField(max_length=16)
+    value = models.CharField(max_length=32)
+    registered = models.BigIntegerField(default=0)
+    approved = models.BigIntegerField(default=0)
+    fetched = models.BigIntegerField(default=0)
+    allocated = models.BigIntegerField(default=0)
+    deactivated = models.BigIntegerField(default=0)
+    mapped = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'inventory_counter'
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value'], name='inventory_counter_key'),
+        ]
+
+
+# Signed changes to InventoryCounter rows, one row per (dimension, value) a write touched.
+# Writes only ever insert here, so concurrent writes never wait on a shared counter row;
+# the rows are folded into InventoryCounter on read (see ProductRegistration.inventory).
+class InventoryDelta(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    dimension = models.CharField(max_length=16)
+    value = models.CharField(max_length=32)
+    registered = models.BigIntegerField(default=0)
+    approved = models.BigIntegerField(default=0)
+    fetched = models.BigIntegerField(default=0)
+    allocated = models.BigIntegerField(default=0)
+    deactivated = models.BigIntegerField(default=0)
+    mapped = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'inventory_delta'
+
+
+# Next free sequence number per serial prefix (YYYYMM{AMP|API}), handed out in ranges by
+# ProductRegistration.sequences. Created on first use from the highest registered serial.
+class SerialSequence(models.Model):
+    prefix = models.CharField(max_length=9, primary_key=True)
+    next_sequence = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'serial_sequence'
+
+
+# A long-running bulk operation handed to the background runner (ProductRegistration.jobs).
+# The row is the job's only state, so any worker can pick it up and its status and result
+# outlive the process that ran it.
+class Job(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=32)
+    status = models.CharField(max_length=16, default='queued')
+    params = models.JSONField(default=dict)
+    created_by = models.CharField(max_length=150, blank=True)
+    progress = models.IntegerField(default=0)
+    total = models.IntegerField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    result_file = models.CharField(max_length=255, blank=True)
+    result_content_type = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'job'
+        indexes = [
+            # the runner's queue scan, oldest queued first
+            models.Index(fields=['status', 'created_at'], name='job_status_idx'),
+            models.Index(fields=['created_by', 'created_at'], name='job_owner_idx'),
+        ]
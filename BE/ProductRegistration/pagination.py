@@ -0,0 +1,52 @@
+import base64
+import datetime
+import json
+
+
+# Opaque continuation tokens for keyset (seek) pagination.
+# A token carries the sort key of the last row the client has seen, so the next
+# page is fetched with a "WHERE key > last_key ORDER BY key LIMIT n" query
+# instead of an OFFSET that forces the database to skip rows.
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(*key):
+    raw = json.dumps([_encode_value(value) for value in key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(key, list) or len(key) != size:
+            raise InvalidCursor('Invalid cursor')
+        return [_decode_value(value) for value in key]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def parse_limit(value, default, maximum):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
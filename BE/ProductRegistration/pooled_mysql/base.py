@@ -0,0 +1,10 @@
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from ..connection_pool import PooledDatabaseWrapperMixin
+
+
+# django.db.backends.mysql with pooled connections, see ProductRegistration/connection_pool.py
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def ping_connection(self, connection):
+        # mysqlclient's ping is one protocol round trip, no query to parse
+        connection.ping()
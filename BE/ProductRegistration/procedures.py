@@ -0,0 +1,282 @@
+import datetime
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+from .mapping_query import DEFAULT_SORT_INDEX, MAPPING_FIELDS, SORT_FIELDS
+from .metrics import count_procedure_call, record_query
+
+
+# Shared gateway for the stored procedures.
+# A call is one CALL plus (when the procedure has OUT parameters) one SELECT that
+# reads all of them at once, instead of one SELECT per OUT parameter.
+
+# status returned by a procedure -> HTTP status code. Anything unknown is a 400.
+STATUS_HTTP_CODES = {
+    'success': status.HTTP_200_OK,
+    'duplicate': status.HTTP_409_CONFLICT,
+    'not_found': status.HTTP_404_NOT_FOUND,
+    'denied': status.HTTP_403_FORBIDDEN,
+}
+
+
+def status_code_for(out_status, success_status=status.HTTP_200_OK):
+    if out_status == 'success':
+        return success_status
+    return STATUS_HTTP_CODES.get(out_status, status.HTTP_400_BAD_REQUEST)
+
+
+def procedure_response(out_status, out_message, success_status=status.HTTP_200_OK, **extra):
+    data = dict(extra) if out_status == 'success' else {}
+    data.update({"message": out_message, "status": out_status})
+    return Response(data, status=status_code_for(out_status, success_status))
+
+
+class ProcedureResult:
+    __slots__ = ('rows', 'columns', 'outputs')
+
+    def __init__(self, rows=None, columns=None, outputs=()):
+        self.rows = rows if rows is not None else []
+        self.columns = columns or []
+        self.outputs = tuple(outputs)
+
+    # most procedures end with OUT status, OUT message
+    @property
+    def status(self):
+        return self.outputs[-2]
+
+    @property
+    def message(self):
+        return self.outputs[-1]
+
+    def first_row_dict(self):
+        if not self.rows:
+            return None
+        return dict(zip(self.columns, self.rows[0]))
+
+
+class MySQLBackend:
+    def call(self, name, args, out_params, fetch_rows):
+        with connection.cursor() as cursor:
+            # callproc bypasses the execute wrappers that count queries for the metrics
+            start = time.perf_counter()
+            cursor.callproc(name, args)
+            record_query(time.perf_counter() - start)
+
+            rows, columns = None, None
+            if fetch_rows:
+                rows = cursor.fetchall()
+                columns = [field[0] for field in cursor.description or ()]
+
+            outputs = ()
+            if out_params:
+                # MySQLdb exposes OUT parameters as @_<procedure>_<position>
+                first = len(args) - out_params
+                cursor.execute("SELECT " + ", ".join(f"@_{name}_{index}" for index in range(first, len(args))))
+                outputs = cursor.fetchone()
+
+        return ProcedureResult(rows, columns, outputs)
+
+
+# Python stand-in for the database procedures, so the gateway and the views can be
+# exercised without MySQL. Tables are plain dicts keyed by serial number holding
+# model-field-named values.
+class InMemoryBackend:
+    def __init__(self, serials=None, mappings=None):
+        self.serials = serials if serials is not None else {}
+        self.mappings = mappings if mappings is not None else {}
+        self._lock = threading.Lock()
+
+    def call(self, name, args, out_params, fetch_rows):
+        handler = getattr(self, name, None)
+        if handler is None:
+            raise NotImplementedError(f'No in-memory stand-in for procedure {name}')
+
+        in_args = list(args[:len(args) - out_params])
+        with self._lock:
+            result = handler(*in_args)
+
+        rows, columns, outputs = result
+        return ProcedureResult(rows, columns, outputs)
+
+    def _save_serial(self, serialnumber, category, isapproved, isallocated):
+        if serialnumber in self.serials:
+            return None, None, ('duplicate', 'Serial number already exists')
+        now = timezone.now()
+        self.serials[serialnumber] = {
+            'serialnumber': serialnumber, 'category': category,
+            'isapproved': isapproved, 'isallocated': isallocated,
+            'createdate': now, 'modifieddate': now,
+            'deviceid': None, 'imei': None, 'imsi': None,
+        }
+        return None, None, ('success', 'Serial number saved successfully')
+
+    def _update_serial(self, serialnumber, **changes):
+        row = self.serials.get(serialnumber)
+        if row is None:
+            return None, None, ('not_found', 'Serial number not found')
+        row.update(changes, modifieddate=timezone.now())
+        return None, None, ('success', 'Serial number updated successfully')
+
+    def save_serial_number(self, serialnumber, category):
+        return self._save_serial(serialnumber, category, 0, 0)
+
+    def save_upi_pro_serial_number(self, serialnumber, category, isapproved, isallocated):
+        return self._save_serial(serialnumber, category, isapproved, isallocated)
+
+    def update_serial_number_approval(self, serialnumber, isapproved):
+        return self._update_serial(serialnumber, isapproved=int(isapproved))
+
+    def update_serial_number_allocate(self, serialnumber, isallocated):
+        return self._update_serial(serialnumber, isallocated=int(isallocated))
+
+    def deactivate_serial_number(self, serialnumber):
+        row = self.serials.get(serialnumber)
+        if row is None:
+            return None, None, ('not_found', 'Serial number not found')
+        if row['isapproved'] != 1 or row['isallocated'] != 0:
+            return None, None, ('denied', 'Only approved, unallocated devices can be deactivated')
+        return self._update_serial(serialnumber, isallocated=3)
+
+    def get_single_unallocated_approved_serial(self):
+        candidates = [row for row in self.serials.values() if row['isapproved'] == 1 and row['isallocated'] == 0]
+        if not candidates:
+            return None, None, (None, 'not_found', 'No approved unallocated serial number available')
+        row = min(candidates, key=lambda row: (row['createdate'] or datetime.datetime.min.replace(tzinfo=datetime.timezone.utc), row['serialnumber']))
+        return None, None, (row['serialnumber'], 'success', 'Serial number fetched successfully')
+
+    def get_device_details_by_serial(self, serialnumber):
+        row = self.serials.get(serialnumber)
+        columns = ['serialNumber', 'deviceId', 'IMEI', 'IMSI', 'category', 'isApproved', 'isAllocated']
+        if row is None:
+            return [], columns, ()
+        return [(row['serialnumber'], row['deviceid'], row['imei'], row['imsi'],
+                 row['category'], row['isapproved'], row['isallocated'])], columns, ()
+
+    def save_serial_customer_details(self, serialnumber, uniqueidentifier, customercode, customername,
+                                     company, devicetype, clicenseurl, versiondetails):
+        if serialnumber in self.mappings:
+            return None, None, ('duplicate', 'Mapping already exists for serial number')
+        now = timezone.now()
+        self.mappings[serialnumber] = {
+            'upideviceserialnumber': serialnumber, 'uniqueidentifier': uniqueidentifier,
+            'customercode': int(customercode), 'customername': customername,
+            'company': company, 'devicetype': devicetype,
+            'clicenseurl': clicenseurl, 'versiondetails': versiondetails,
+            'isapproved': 0, 'isdeleted': 0, 'createdon': now, 'modifiedon': now,
+        }
+        return None, None, ('success', 'Mapping saved successfully')
+
+    def update_customer_by_serial(self, serialnumber, customercode, uniqueidentifier, customername,
+                                  company, devicetype, clicenseurl, versiondetails):
+        row = self.mappings.get(serialnumber)
+        if row is None:
+            return None, None, ('not_found', 'Mapping not found for serial number')
+        row.update(customercode=int(customercode), uniqueidentifier=uniqueidentifier, customername=customername,
+                   company=company, devicetype=devicetype, clicenseurl=clicenseurl,
+                   versiondetails=versiondetails, modifiedon=timezone.now())
+        return None, None, ('success', 'Mapping updated successfully')
+
+    def get_serial_customer_details(self, serial_number, customer_code, customer_name, company, device_type,
+                                    from_date, to_date, approved_status, search_text,
+                                    page_number, page_size, sort_index, sort_direction):
+        def contains(value, text):
+            return text.lower() in str(value or '').lower()
+
+        from_date = datetime.date.fromisoformat(str(from_date))
+        to_date = datetime.date.fromisoformat(str(to_date))
+        rows = []
+        for row in self.mappings.values():
+            if row['isdeleted'] == 1:
+                continue
+            if serial_number and not contains(row['upideviceserialnumber'], serial_number):
+                continue
+            if int(customer_code or 0) and row['customercode'] != int(customer_code):
+                continue
+            if customer_name and not contains(row['customername'], customer_name):
+                continue
+            if company and not contains(row['company'], company):
+                continue
+            if device_type and row['devicetype'] != device_type:
+                continue
+            if int(approved_status) != -1 and row['isapproved'] != int(approved_status):
+                continue
+            if row['createdon'] is None or not from_date <= row['createdon'].date() <= to_date:
+                continue
+            if search_text and not any(contains(row[field], search_text) for field in
+                                       ('upideviceserialnumber', 'customercode', 'customername', 'company')):
+                continue
+            rows.append(row)
+
+        field = SORT_FIELDS.get(int(sort_index), SORT_FIELDS[DEFAULT_SORT_INDEX])
+        rows.sort(key=lambda row: (row[field] is not None, row[field], row['upideviceserialnumber']),
+                  reverse=int(sort_direction) == 1)
+
+        offset, size = int(page_number), int(page_size)
+        page = [tuple(row[field] for field in MAPPING_FIELDS) for row in rows[offset:offset + size]]
+        return page, list(MAPPING_FIELDS), (len(rows),)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, 'PROCEDURE_BACKEND', 'ProductRegistration.procedures.MySQLBackend')
+                _backend = import_string(backend_path)()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _record(name, elapsed, failed):
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {'calls': 0, 'errors': 0, 'totalSeconds': 0.0, 'maxSeconds': 0.0}
+        entry['calls'] += 1
+        entry['totalSeconds'] += elapsed
+        if elapsed > entry['maxSeconds']:
+            entry['maxSeconds'] = elapsed
+        if failed:
+            entry['errors'] += 1
+
+
+# Calls a stored procedure. in_args are the IN parameters; out_params is the number of
+# trailing OUT parameters, returned in order in result.outputs.
+def call_procedure(name, in_args, out_params=0, fetch_rows=False):
+    args = list(in_args) + [""] * out_params
+    count_procedure_call()
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = get_backend().call(name, args, out_params, fetch_rows)
+        failed = False
+        return result
+    finally:
+        _record(name, time.perf_counter() - start, failed)
+
+
+def procedure_stats():
+    with _stats_lock:
+        return {
+            name: dict(entry, avgSeconds=entry['totalSeconds'] / entry['calls'])
+            for name, entry in _stats.items()
+        }
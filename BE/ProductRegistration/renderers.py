@@ -0,0 +1,58 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# JSON encoding of API responses. With orjson installed responses are encoded by it in
+# one native pass, with the output DRF's JSONRenderer would give (floats aside, which may
+# be spelled differently): compact UTF-8, UTC datetimes ending in "Z", everything orjson
+# has no native form for (Decimal, lazy strings, ...) converted by DRF's JSONEncoder. Without orjson, and for indented
+# (browsable API) output, DRF's renderer is used as before.
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    _default = JSONEncoder().default
+
+
+def dumps(data):
+    if orjson is not None:
+        try:
+            # escaped like DRF's renderer, so the output stays a strict JavaScript subset
+            return orjson.dumps(data, default=_default, option=OPTIONS).replace(
+                b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the json module still encodes
+            pass
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+# Row layouts of the list endpoints (layout= query parameter): "objects", one object per
+# row keyed by column (the default), or "columns", the column names once and each row as
+# an array of values in that order, which skips building a dict per row and keeps the
+# keys out of every row of the response.
+LIST_LAYOUTS = ('objects', 'columns')
+
+
+def parse_layout(params):
+    layout = params.get('layout') or 'objects'
+    if layout not in LIST_LAYOUTS:
+        raise ValueError(f'layout must be one of {list(LIST_LAYOUTS)}')
+    return layout
+
+
+# Response fields carrying value tuples (in keys order) in the requested layout
+def list_data(keys, rows, layout):
+    if layout == 'columns':
+        return {'columns': keys, 'data': rows}
+    return {'data': [dict(zip(keys, row)) for row in rows]}
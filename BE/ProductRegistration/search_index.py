@@ -0,0 +1,204 @@
+import datetime
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import Palmteccustomerdetails
+
+
+# In-memory trigram index over the fields searched by the mapping searchText filter
+# (serial, customer code, customer name, company).
+# A search intersects the posting sets of the query's trigrams and checks the surviving
+# serials for a real substring match, so the table is only queried for the candidates.
+# The index is built in a background thread on first use and kept current incrementally:
+# writes in this process update it directly, and rows changed by other workers are pulled
+# in by a modifiedon delta query at most every refresh_interval seconds. Each delta reaches
+# settle_seconds back past the newest timestamp seen (as delta.py does), so rows whose
+# transaction committed after a newer row was read are still picked up, and rows without
+# a modifiedon are read every time.
+# The index only narrows searches down: until it is built, and whenever it finds nothing,
+# the listing runs its normal query instead.
+
+SEARCH_FIELDS = ('upideviceserialnumber', 'customercode', 'customername', 'company')
+MIN_QUERY_LENGTH = 3
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _normalize(values):
+    return tuple(str(value).lower() for value in values if value not in (None, ''))
+
+
+class TrigramIndex:
+    def __init__(self, refresh_interval=5, settle_seconds=5):
+        self.refresh_interval = refresh_interval
+        self.settle_seconds = settle_seconds
+        self._postings = defaultdict(set)
+        self._documents = {}
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._build_thread = None
+        self._built = False
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self.build_seconds = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    @property
+    def built(self):
+        return self._built
+
+    def add(self, serialnumber, values):
+        fields = _normalize(values)
+        with self._lock:
+            if self._documents.get(serialnumber) == fields:
+                return
+            self._remove(serialnumber)
+            self._documents[serialnumber] = fields
+            for field in fields:
+                for gram in trigrams(field):
+                    self._postings[gram].add(serialnumber)
+
+    def remove(self, serialnumber):
+        with self._lock:
+            self._remove(serialnumber)
+
+    def _remove(self, serialnumber):
+        fields = self._documents.pop(serialnumber, None)
+        if fields is None:
+            return
+        for field in fields:
+            for gram in trigrams(field):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(serialnumber)
+                    if not posting:
+                        del self._postings[gram]
+
+    # Serials whose indexed fields contain text (case-insensitive), or None when the text
+    # is too short to use trigrams
+    def search(self, text):
+        text = text.lower()
+        if len(text) < MIN_QUERY_LENGTH:
+            return None
+
+        with self._lock:
+            postings = []
+            for gram in trigrams(text):
+                posting = self._postings.get(gram)
+                if not posting:
+                    return set()
+                postings.append(posting)
+
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return candidates
+
+            documents = self._documents
+            return {serial for serial in candidates if any(text in field for field in documents[serial])}
+
+    # Loads rows changed since the last load (all rows the first time). The rows are read
+    # without holding the index lock and applied a batch at a time, so searches go on meanwhile.
+    def refresh(self):
+        with self._refresh_lock:
+            queryset = Palmteccustomerdetails.objects.all()
+            if self._watermark is not None:
+                since = self._watermark - datetime.timedelta(seconds=self.settle_seconds)
+                queryset = queryset.filter(Q(modifiedon__gte=since) | Q(modifiedon__isnull=True))
+
+            start = time.perf_counter()
+            watermark = self._watermark
+            batch = []
+            for row in queryset.values_list('modifiedon', 'isdeleted', *SEARCH_FIELDS).iterator(chunk_size=5000):
+                if row[0] is not None and (watermark is None or row[0] > watermark):
+                    watermark = row[0]
+                batch.append(row)
+                if len(batch) == 5000:
+                    self._apply(batch)
+                    batch = []
+            self._apply(batch)
+
+            self._watermark = watermark
+            if not self._built:
+                self._built = True
+                self.build_seconds = time.perf_counter() - start
+            self._refreshed_at = time.monotonic()
+
+    def _apply(self, rows):
+        with self._lock:
+            for row in rows:
+                if row[1] == 1:
+                    self._remove(row[2])
+                else:
+                    self.add(row[2], row[2:])
+
+    # Starts the first load in a background thread, so no request waits for the whole table
+    def build_in_background(self):
+        with self._lock:
+            if self._built or (self._build_thread is not None and self._build_thread.is_alive()):
+                return
+            self._build_thread = threading.Thread(target=self._build, name='search-index-build', daemon=True)
+            self._build_thread.start()
+
+    def _build(self):
+        try:
+            self.refresh()
+        finally:
+            connection.close()
+
+    def ensure_current(self):
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+
+    def stats(self):
+        return {
+            'built': self._built,
+            'documents': len(self._documents),
+            'trigrams': len(self._postings),
+            'buildSeconds': self.build_seconds,
+        }
+
+
+mapping_search_index = TrigramIndex(
+    refresh_interval=getattr(settings, 'SEARCH_INDEX_REFRESH_SECONDS', 5),
+    settle_seconds=getattr(settings, 'DELTA_SETTLE_SECONDS', 5),
+)
+
+
+# Candidate serials for a mapping searchText, or None when the index can't vouch for them
+# and the listing should run its normal query: disabled, not built yet, refresh failed,
+# query too short, no match (a row the index hasn't seen yet may still match) or too many
+# matches for an IN list
+def search_candidates(text):
+    if not getattr(settings, 'SEARCH_INDEX_ENABLED', False) or len(text) < MIN_QUERY_LENGTH:
+        return None
+
+    if not mapping_search_index.built:
+        mapping_search_index.build_in_background()
+        return None
+    try:
+        mapping_search_index.ensure_current()
+    except Exception:
+        return None
+
+    candidates = mapping_search_index.search(text)
+    if not candidates or len(candidates) > getattr(settings, 'SEARCH_INDEX_MAX_CANDIDATES', 5000):
+        return None
+    return candidates
+
+
+# Keeps the index current after a mapping write in this process
+def index_mapping(serialnumber, customercode, customername, company):
+    if mapping_search_index.built:
+        mapping_search_index.add(serialnumber, (serialnumber, customercode, customername, company))
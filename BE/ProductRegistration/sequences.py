@@ -0,0 +1,147 @@
+from itertools import chain, islice
+
+from django.db import DatabaseError, transaction
+
+from .bulk import BULK_MAX_ROWS, chunked, register_serial_numbers, row_result
+from .models import SerialSequence, Serialdata
+from .serials import MAX_SEQUENCE, SERIAL_NUMBER_REGEX, InvalidSerialNumber, SerialNumber
+
+
+GENERATE_MAX_COUNT = BULK_MAX_ROWS
+# Sequence numbers read per pass at least, so a nearly full prefix isn't scanned a few numbers at a time
+SCAN_WINDOW = 1000
+# Times a generate call allocates new numbers for serials that were registered by hand meanwhile
+GENERATE_RETRIES = 3
+
+
+class SequenceExhausted(ValueError):
+    pass
+
+
+# YYYYMM{AMP|API} for a production batch; raises InvalidSerialNumber
+def serial_prefix(year, month, device_type):
+    if not 1 <= month <= 12:
+        raise InvalidSerialNumber('month must be between 1 and 12')
+    return SerialNumber(year, month, device_type, 0).prefix
+
+
+# (prefix, count, register) from a generate request body; raises ValueError with the message for the client
+def parse_generate_params(data):
+    try:
+        year = int(data.get('year'))
+        month = int(data.get('month'))
+        count = int(data.get('count'))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('year, month and count must be integers')
+
+    if not 1 <= count <= GENERATE_MAX_COUNT:
+        raise ValueError(f'count must be between 1 and {GENERATE_MAX_COUNT}')
+
+    register = data.get('register', True) not in (False, 'false', '0', 0)
+    return serial_prefix(year, month, data.get('deviceType')), count, register
+
+
+# Sequence numbers of the registered serials with this prefix between first and last
+def taken_sequences(prefix, first, last):
+    serials = Serialdata.objects.filter(
+        serialnumber__gte=f'{prefix}{first:06d}B', serialnumber__lte=f'{prefix}{last:06d}B',
+    ).values_list('serialnumber', flat=True)
+    return {int(match.group(4)) for match in map(SERIAL_NUMBER_REGEX.fullmatch, serials) if match}
+
+
+# A new prefix starts after its highest registered serial, so hand-typed ranges are only reused
+# once the numbers above them have run out
+def initial_sequence(prefix):
+    last = (Serialdata.objects.filter(serialnumber__gte=f'{prefix}000000B', serialnumber__lte=f'{prefix}{MAX_SEQUENCE:06d}B')
+            .order_by('-serialnumber').values_list('serialnumber', flat=True).first())
+    match = SERIAL_NUMBER_REGEX.fullmatch(last) if last else None
+    return int(match.group(4)) + 1 if match else 0
+
+
+# Sequence numbers between first and last without a registered serial, read a window at a time
+def free_sequences(prefix, first, last, window):
+    while first <= last:
+        end = min(first + window - 1, last)
+        taken = taken_sequences(prefix, first, end)
+        yield from (number for number in range(first, end + 1) if number not in taken)
+        first = end + 1
+
+
+# Hands out the next `count` sequence numbers of the prefix that have no registered serial
+# yet and moves the prefix's sequence past them. Must run inside a transaction, kept
+# short: the sequence row stays locked until it commits, so concurrent callers for the
+# same prefix get disjoint ranges. Past MAX_SEQUENCE the search goes on from 0 up to where
+# it started, so the prefix is only exhausted once no number in it is free.
+def allocate_sequences(prefix, count):
+    sequence = SerialSequence.objects.select_for_update().filter(prefix=prefix).first()
+    if sequence is None:
+        # a concurrent first call may create it meanwhile
+        SerialSequence.objects.bulk_create([SerialSequence(prefix=prefix, next_sequence=initial_sequence(prefix))], ignore_conflicts=True)
+        sequence = SerialSequence.objects.select_for_update().get(prefix=prefix)
+
+    window = max(count, SCAN_WINDOW)
+    start = sequence.next_sequence
+    free = chain(free_sequences(prefix, start, MAX_SEQUENCE, window), free_sequences(prefix, 0, start - 1, window))
+    allocated = list(islice(free, count))
+    if len(allocated) < count:
+        raise SequenceExhausted(f'Only {len(allocated)} free sequence numbers left for {prefix}')
+
+    sequence.next_sequence = allocated[-1] + 1
+    sequence.save(update_fields=['next_sequence'])
+    return [f'{prefix}{number:06d}B' for number in allocated]
+
+
+# Allocates `count` new serials for the prefix and, with register, registers them.
+# The allocation commits on its own, so the sequence row is only locked for the range
+# read; registration then commits chunk by chunk (see register_serial_numbers). A serial
+# registered by hand meanwhile comes back as a duplicate and is replaced by a newly
+# allocated one, up to GENERATE_RETRIES times; what can't be replaced is the shortfall.
+# Returns (serials, registration results or None, shortfall). If registering a chunk
+# fails, that chunk and the ones after it are reported as unregistered: their numbers
+# stay allocated and can be registered with add_serial_numbers_bulk.
+def generate_serials(prefix, count, register=True, category='UPIPLUS', progress=None):
+    with transaction.atomic():
+        serials = allocate_sequences(prefix, count)
+    if not register:
+        return serials, None, 0
+
+    results = []
+    pending = serials
+    for attempt in range(GENERATE_RETRIES + 1):
+        if not register_chunks(pending, category, results, progress, len(serials)):
+            break
+        skipped = sum(result['status'] == 'duplicate' for result in results[-len(pending):])
+        if not skipped or attempt == GENERATE_RETRIES:
+            break
+        try:
+            with transaction.atomic():
+                pending = allocate_sequences(prefix, skipped)
+        except SequenceExhausted:
+            break
+        serials = serials + pending
+
+    registered = sum(result['status'] == 'success' for result in results)
+    unregistered = sum(result['status'] == 'unregistered' for result in results)
+    return serials, results, count - registered - unregistered
+
+
+# Registers the serials chunk by chunk, appending their results numbered on from the ones
+# already there. Returns False if a chunk failed: it and the rest are added as unregistered.
+def register_chunks(serials, category, results, progress, total):
+    offset = len(results)
+    for chunk in chunked(serials):
+        try:
+            chunk_results = register_serial_numbers(chunk, category)
+        except DatabaseError as e:
+            results.extend(
+                row_result(row, serialnumber, 'unregistered', f'Allocated but not registered: {e}')
+                for row, serialnumber in enumerate(serials[len(results) - offset:], len(results) + 1)
+            )
+            return False
+
+        for result in chunk_results:
+            result['row'] += len(results)
+        results.extend(chunk_results)
+        if progress:
+            progress(len(results), total)
+    return True
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Serialdata,Palmteccustomerdetails
-import re
+from .serials import is_valid_serial
 
 
 class DeviceSerializer(serializers.ModelSerializer):
@@ -9,10 +9,7 @@ class DeviceSerializer(serializers.ModelSerializer):
         fields = ['serialnumber'] 
 
     def validate_serialnumber(self,value):
-        
-        pattern = "^[0-9]{4}[0-9]{2}(AMP|API)[0-9]{6}B$"
-
-        if not re.fullmatch(pattern=pattern, string=value):
+        if not is_valid_serial(value):
             raise serializers.ValidationError("Serial number not following pattern")
         return value
     
@@ -0,0 +1,133 @@
+import re
+
+
+# Serial numbers look like YYYYMM{AMP|API}NNNNNNB, e.g. 202505AMP123456B:
+# year, month, device type, 6-digit sequence and a fixed "B" suffix.
+# This module is the single definition of that format.
+
+SERIAL_NUMBER_PATTERN = r"^[0-9]{4}[0-9]{2}(AMP|API)[0-9]{6}B$"
+SERIAL_NUMBER_REGEX = re.compile(r"([0-9]{4})([0-9]{2})(AMP|API)([0-9]{6})B")
+
+# same format, one serial per line, for checking a whole batch in a single scan
+_SERIAL_LINE_REGEX = re.compile(r"^[0-9]{6}A(?:MP|PI)[0-9]{6}B$", re.MULTILINE)
+
+DEVICE_TYPES = ('AMP', 'API')
+MAX_SEQUENCE = 999999
+
+# bit layout of the packed integer key; ordering of keys matches ordering of the strings
+_SEQUENCE_BITS = 20
+_TYPE_SHIFT = _SEQUENCE_BITS
+_MONTH_SHIFT = _TYPE_SHIFT + 1
+_YEAR_SHIFT = _MONTH_SHIFT + 7
+
+
+class InvalidSerialNumber(ValueError):
+    pass
+
+
+class SerialNumber:
+    __slots__ = ('year', 'month', 'device_type', 'sequence')
+
+    def __init__(self, year, month, device_type, sequence):
+        if device_type not in DEVICE_TYPES:
+            raise InvalidSerialNumber(f'Unknown device type {device_type!r}')
+        if not (0 <= year <= 9999 and 0 <= month <= 99 and 0 <= sequence <= MAX_SEQUENCE):
+            raise InvalidSerialNumber('Serial number component out of range')
+        self.year = year
+        self.month = month
+        self.device_type = device_type
+        self.sequence = sequence
+
+    @classmethod
+    def parse(cls, value):
+        match = SERIAL_NUMBER_REGEX.fullmatch(value) if isinstance(value, str) else None
+        if match is None:
+            raise InvalidSerialNumber("Serial number not following pattern")
+        year, month, device_type, sequence = match.groups()
+        return cls(int(year), int(month), device_type, int(sequence))
+
+    @classmethod
+    def from_int(cls, key):
+        return cls(
+            key >> _YEAR_SHIFT,
+            (key >> _MONTH_SHIFT) & 0x7F,
+            DEVICE_TYPES[(key >> _TYPE_SHIFT) & 1],
+            key & ((1 << _SEQUENCE_BITS) - 1),
+        )
+
+    # YYYYMM{AMP|API}, the part shared by one production batch
+    @property
+    def prefix(self):
+        return f'{self.year:04d}{self.month:02d}{self.device_type}'
+
+    def to_int(self):
+        return (
+            (self.year << _YEAR_SHIFT)
+            | (self.month << _MONTH_SHIFT)
+            | (DEVICE_TYPES.index(self.device_type) << _TYPE_SHIFT)
+            | self.sequence
+        )
+
+    def __str__(self):
+        return f'{self.prefix}{self.sequence:06d}B'
+
+    def __repr__(self):
+        return f'SerialNumber({str(self)!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, SerialNumber):
+            return NotImplemented
+        return self.to_int() == other.to_int()
+
+    def __lt__(self, other):
+        if not isinstance(other, SerialNumber):
+            return NotImplemented
+        return self.to_int() < other.to_int()
+
+    def __hash__(self):
+        return self.to_int()
+
+
+def is_valid_serial(value):
+    return isinstance(value, str) and SERIAL_NUMBER_REGEX.fullmatch(value) is not None
+
+
+# Indexes of the values that are not valid serial numbers.
+# When every value is a single-line string the whole batch is checked with one regex
+# scan over the joined text; only a batch containing bad values is checked item by item.
+def invalid_serial_indexes(values):
+    if values and all(isinstance(value, str) for value in values):
+        joined = '\n'.join(values)
+        if joined.count('\n') == len(values) - 1 and len(_SERIAL_LINE_REGEX.findall(joined)) == len(values):
+            return []
+
+    fullmatch = SERIAL_NUMBER_REGEX.fullmatch
+    return [index for index, value in enumerate(values) if not (isinstance(value, str) and fullmatch(value))]
+
+
+# Parses a batch; invalid entries come back as None
+def parse_serials(values):
+    fullmatch = SERIAL_NUMBER_REGEX.fullmatch
+    parsed = []
+    for value in values:
+        match = fullmatch(value) if isinstance(value, str) else None
+        if match is None:
+            parsed.append(None)
+            continue
+        year, month, device_type, sequence = match.groups()
+        parsed.append(SerialNumber(int(year), int(month), device_type, int(sequence)))
+    return parsed
+
+
+# Packed integer keys for a batch of valid serials, e.g. for compact sets or sorting
+def pack_serials(values):
+    fullmatch = SERIAL_NUMBER_REGEX.fullmatch
+    type_bits = {device_type: index << _TYPE_SHIFT for index, device_type in enumerate(DEVICE_TYPES)}
+    keys = []
+    for value in values:
+        match = fullmatch(value)
+        if match is None:
+            raise InvalidSerialNumber(f'{value!r} is not a valid serial number')
+        year, month, device_type, sequence = match.groups()
+        keys.append((int(year) << _YEAR_SHIFT) | (int(month) << _MONTH_SHIFT) | type_bits[device_type] | int(sequence))
+    return keys
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.db.models.signals import post_delete,post_save
+from django.dispatch import receiver
+from .views.auth_views import invalidate_cached_user
+
+
+# Drop cached authentication as soon as a user is changed, deactivated or removed
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from benchmarks.procedures import ORMBackend
+
+
+# The device tables are unmanaged (they live in MySQL) and the test database is built
+# from migrations, so they are created here, as benchmarks.common.setup() does. Stored
+# procedures run on the ORM stand-ins the benchmarks use.
+# Run with a SQLite settings module: python manage.py test --settings=benchmarks.settings
+class DeviceTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # before TestCase opens its class-wide transaction, SQLite can't alter schema inside one
+        existing = set(connection.introspection.table_names())
+        with connection.schema_editor() as schema_editor:
+            for model in apps.get_app_config('ProductRegistration').get_models():
+                if not model._meta.managed and model._meta.db_table not in existing:
+                    schema_editor.create_model(model)
+        super().setUpClass()
+
+    def setUp(self):
+        patcher = mock.patch('ProductRegistration.procedures._backend', ORMBackend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # a test client carrying the access_token cookie of a (new) verified user
+    def login(self, username='tester'):
+        user = get_user_model().objects.create_user(username=username, password='secret', is_verified=True)
+        client = Client()
+        client.cookies['access_token'] = str(AccessToken.for_user(user))
+        return client
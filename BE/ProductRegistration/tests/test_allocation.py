@@ -0,0 +1,162 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.utils import timezone
+
+from .. import allocation
+from ..allocation import FETCHED, UNALLOCATED, AllocationPool, release_serials, reserve_serials
+from ..models import Serialdata
+from .base import DeviceTestCase
+
+
+class AllocationTestCase(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # 1-6 approved and unallocated, oldest first; 7 not approved, 8 already fetched
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=0 if n == 7 else 1,
+                       isallocated=FETCHED if n == 8 else UNALLOCATED,
+                       createdate=now - datetime.timedelta(minutes=10 - n), modifieddate=now)
+            for n in range(1, 9)
+        ])
+
+    def fetched(self):
+        return set(Serialdata.objects.filter(isallocated=FETCHED).values_list('serialnumber', flat=True))
+
+
+class ReserveSerialsTests(AllocationTestCase):
+    def test_oldest_approved_unallocated_first(self):
+        self.assertEqual(reserve_serials(2), ['202401AMP000001B', '202401AMP000002B'])
+        self.assertEqual(self.fetched(), {'202401AMP000001B', '202401AMP000002B', '202401AMP000008B'})
+
+    def test_reservations_are_disjoint(self):
+        first = reserve_serials(4)
+        second = reserve_serials(4)
+        self.assertEqual(len(first), 4)
+        self.assertEqual(second, ['202401AMP000005B', '202401AMP000006B'])
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(reserve_serials(1), [])
+
+    def test_failed_reservation_marks_nothing(self):
+        with mock.patch('ProductRegistration.inventory.record_deltas', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                reserve_serials(3)
+        self.assertEqual(self.fetched(), {'202401AMP000008B'})
+        self.assertEqual(reserve_serials(1), ['202401AMP000001B'])
+
+    def test_release_only_returns_fetched_serials(self):
+        reserved = reserve_serials(2)
+        Serialdata.objects.filter(pk=reserved[0]).update(isallocated=2)
+        self.assertEqual(release_serials(reserved), 1)
+        self.assertEqual(Serialdata.objects.get(pk=reserved[0]).isallocated, 2)
+        self.assertEqual(Serialdata.objects.get(pk=reserved[1]).isallocated, UNALLOCATED)
+        self.assertEqual(release_serials([]), 0)
+
+    def test_endpoint(self):
+        client = self.login()
+        response = client.post('/sil/reserve_serial_numbers/', {'count': 5}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 5)
+
+        self.assertEqual(client.post('/sil/reserve_serial_numbers/', {'count': 5}, content_type='application/json').json()['serialnumbers'], ['202401AMP000006B'])
+        self.assertEqual(client.post('/sil/reserve_serial_numbers/', {'count': 1}, content_type='application/json').status_code, 404)
+        for count in (0, 501, 'many'):
+            self.assertEqual(client.post('/sil/reserve_serial_numbers/', {'count': count}, content_type='application/json').status_code, 400)
+
+        with mock.patch('ProductRegistration.views.device_views.reserve_serials', side_effect=RuntimeError('database down')):
+            response = client.post('/sil/reserve_serial_numbers/', {'count': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['error'], 'database down')
+
+
+# The pool's refill thread isn't started: the tests run its steps themselves
+class AllocationPoolTests(AllocationTestCase):
+    def setUp(self):
+        super().setUp()
+        for target, attribute in ((AllocationPool, 'start'), (allocation.connection, 'close')):
+            patcher = mock.patch.object(target, attribute)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_hands_out_refilled_serials(self):
+        pool = AllocationPool(low_water=2, batch_size=3)
+        pool._refill()
+        self.assertEqual(pool.stats()['depth'], 3)
+        self.assertEqual(self.fetched(), {'202401AMP000001B', '202401AMP000002B', '202401AMP000003B', '202401AMP000008B'})
+
+        self.assertEqual([pool.acquire() for _ in range(3)], ['202401AMP000001B', '202401AMP000002B', '202401AMP000003B'])
+        self.assertEqual((pool.allocations, pool.misses, pool.refills), (3, 0, 1))
+        # below low water the refill thread is woken
+        self.assertTrue(pool._wakeup.is_set())
+
+    def test_empty_pool_reserves_directly(self):
+        pool = AllocationPool()
+        self.assertEqual(pool.acquire(), '202401AMP000001B')
+        self.assertEqual(pool.misses, 1)
+        self.assertEqual(self.fetched(), {'202401AMP000001B', '202401AMP000008B'})
+
+    def test_concurrent_acquires_get_distinct_serials(self):
+        pool = AllocationPool(low_water=0, batch_size=6)
+        pool._refill()
+        barrier = threading.Barrier(6)
+        acquired = []
+
+        def acquire():
+            barrier.wait()
+            acquired.append(pool.acquire())
+
+        threads = [threading.Thread(target=acquire) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(acquired), [f'202401AMP{n:06d}B' for n in range(1, 7)])
+
+    def test_expired_leases_are_released(self):
+        pool = AllocationPool(batch_size=2, lease_seconds=0)
+        pool._refill()
+        # both leases are over: skipped, and the serial comes from a direct reservation
+        self.assertEqual(pool.acquire(), '202401AMP000003B')
+        pool._release_expired()
+        self.assertEqual(pool.released, 2)
+        self.assertEqual(self.fetched(), {'202401AMP000003B', '202401AMP000008B'})
+
+    def test_shutdown_releases_what_is_left(self):
+        pool = AllocationPool(batch_size=3)
+        pool._refill()
+        pool.acquire()
+        pool.shutdown()
+        self.assertEqual(pool.released, 2)
+        self.assertEqual(self.fetched(), {'202401AMP000001B', '202401AMP000008B'})
+
+        # a refill finishing after shutdown gives its serials back
+        pool._refill()
+        self.assertEqual(pool.stats()['depth'], 0)
+        self.assertEqual(self.fetched(), {'202401AMP000001B', '202401AMP000008B'})
+
+    def test_refill_errors_are_counted(self):
+        pool = AllocationPool(check_interval=0)
+
+        def fail():
+            pool._stopped = True
+            raise RuntimeError('database down')
+
+        with mock.patch.object(pool, '_refill', side_effect=fail):
+            pool._run()
+        self.assertEqual(pool.refill_errors, 1)
+
+    def test_endpoint_uses_the_pool(self):
+        pool = AllocationPool(batch_size=1)
+        pool._refill()
+        client = self.login()
+        with mock.patch('ProductRegistration.views.device_views.get_allocation_pool', return_value=pool):
+            response = client.get('/sil/getSerialNumber/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['serialnumber'], '202401AMP000001B')
+        self.assertEqual(pool.allocations, 1)
+
+        Serialdata.objects.filter(isallocated=UNALLOCATED).update(isapproved=0)
+        with mock.patch('ProductRegistration.views.device_views.get_allocation_pool', return_value=pool):
+            self.assertEqual(client.get('/sil/getSerialNumber/').status_code, 404)
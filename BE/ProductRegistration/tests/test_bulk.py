@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from ..allocation import ALLOCATED, DEACTIVATED
+from ..bulk import chunked, import_customer_mappings, register_serial_numbers
+from ..inventory import track_inventory
+from ..models import Palmteccustomerdetails, Serialdata
+from .base import DeviceTestCase
+from .test_inventory import mapping_row
+
+
+def statuses(results):
+    return [(result['serialnumber'], result['status']) for result in results]
+
+
+# track_inventory with a concurrent write committed right after the chunk was read
+def written_meanwhile(write):
+    @contextmanager
+    def wrapper(serials):
+        with track_inventory(serials) as change:
+            write()
+            yield change
+    return wrapper
+
+
+class RegisterSerialNumbersTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Serialdata.objects.create(serialnumber='202401AMP000001B', category='UPIPLUS', isapproved=1, isallocated=2,
+                                  createdate=now, modifieddate=now)
+
+    def test_results(self):
+        results = register_serial_numbers(['202401AMP000001B', ' 202401AMP000002B ', '202401AMP000002B', 'bad', {'serialnumber': '202401API000003B'}])
+        self.assertEqual(statuses(results), [
+            ('202401AMP000001B', 'duplicate'), ('202401AMP000002B', 'success'), ('202401AMP000002B', 'duplicate'),
+            ('bad', 'invalid'), ('202401API000003B', 'success'),
+        ])
+        self.assertEqual([result['row'] for result in results], [1, 2, 3, 4, 5])
+        # the existing device is left as it was
+        self.assertEqual(Serialdata.objects.get(pk='202401AMP000001B').isallocated, 2)
+        self.assertEqual(set(Serialdata.objects.filter(isapproved=0, isallocated=0).values_list('pk', flat=True)),
+                         {'202401AMP000002B', '202401API000003B'})
+
+    def test_serial_registered_concurrently_is_a_duplicate(self):
+        def register_elsewhere():
+            now = timezone.now()
+            Serialdata.objects.create(serialnumber='202401AMP000003B', category='UPIPLUS', isapproved=0, isallocated=0,
+                                      createdate=now, modifieddate=now)
+
+        with mock.patch('ProductRegistration.bulk.track_inventory', written_meanwhile(register_elsewhere)):
+            results = register_serial_numbers(['202401AMP000002B', '202401AMP000003B', '202401AMP000004B'])
+        self.assertEqual(statuses(results), [
+            ('202401AMP000002B', 'success'), ('202401AMP000003B', 'duplicate'), ('202401AMP000004B', 'success'),
+        ])
+
+    def test_progress_and_chunks(self):
+        progress = mock.Mock()
+        # chunks of 2 rows
+        with mock.patch.object(chunked, '__defaults__', (2,)):
+            register_serial_numbers([f'202402AMP{n:06d}B' for n in range(1, 6)], progress=progress)
+        self.assertEqual(progress.call_args_list, [mock.call(2, 5), mock.call(4, 5), mock.call(5, 5)])
+        self.assertEqual(Serialdata.objects.filter(serialnumber__startswith='202402').count(), 5)
+
+    def test_endpoint(self):
+        client = self.login()
+        response = client.post('/sil/add_serial_numbers_bulk/', {'serialnumbers': ['202401AMP000001B', '202401AMP000005B']}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], {'duplicate': 1, 'success': 1})
+
+        self.assertEqual(client.post('/sil/add_serial_numbers_bulk/', {'serialnumbers': []}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post('/sil/add_serial_numbers_bulk/', {'serialnumbers': ['202401AMP000006B']}, content_type='application/json').status_code, 401)
+
+
+class ImportCustomerMappingsTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=1, isallocated=0,
+                       createdate=now, modifieddate=now)
+            for n in range(1, 6)
+        ])
+        Serialdata.objects.filter(pk='202401AMP000004B').update(isallocated=DEACTIVATED)
+        Palmteccustomerdetails.objects.create(isapproved=0, isdeleted=0, createdon=now, modifiedon=now,
+                                              **self.values('202401AMP000005B'))
+
+    def values(self, serialnumber):
+        row = mapping_row(serialnumber)
+        return {
+            'upideviceserialnumber': serialnumber, 'uniqueidentifier': row['uniqueIdentifier'], 'customercode': 100,
+            'customername': row['customerName'], 'company': row['company'], 'devicetype': row['devicetype'],
+            'clicenseurl': row['licenseUrl'], 'versiondetails': row['versionDetails'],
+        }
+
+    def test_results(self):
+        bad_code = dict(mapping_row('202401AMP000003B'), customerCode='abc')
+        missing = dict(mapping_row('202401AMP000003B'), company=' ')
+        results = import_customer_mappings([
+            mapping_row('202401AMP000001B'), mapping_row('202401AMP000001B'), mapping_row('202409AMP000001B'),
+            mapping_row('202401AMP000004B'), mapping_row('202401AMP000005B'), bad_code, missing, 'row',
+        ])
+        self.assertEqual(statuses(results), [
+            ('202401AMP000001B', 'success'), ('202401AMP000001B', 'duplicate'), ('202409AMP000001B', 'not_found'),
+            ('202401AMP000004B', 'denied'), ('202401AMP000005B', 'duplicate'), ('202401AMP000003B', 'invalid'),
+            ('202401AMP000003B', 'invalid'), (None, 'invalid'),
+        ])
+        self.assertEqual(results[6]['message'], "Missing values in input,['company']")
+        self.assertEqual(Serialdata.objects.get(pk='202401AMP000001B').isallocated, ALLOCATED)
+        self.assertEqual(Serialdata.objects.get(pk='202401AMP000004B').isallocated, DEACTIVATED)
+
+    def test_mapping_created_concurrently_is_a_duplicate(self):
+        def map_elsewhere():
+            now = timezone.now()
+            Palmteccustomerdetails.objects.create(isapproved=0, isdeleted=0, createdon=now, modifiedon=now, **self.values('202401AMP000002B'))
+
+        with mock.patch('ProductRegistration.bulk.track_inventory', written_meanwhile(map_elsewhere)):
+            results = import_customer_mappings([mapping_row('202401AMP000001B'), mapping_row('202401AMP000002B'), mapping_row('202401AMP000003B')])
+        self.assertEqual(statuses(results), [
+            ('202401AMP000001B', 'success'), ('202401AMP000002B', 'duplicate'), ('202401AMP000003B', 'success'),
+        ])
+        # the device of the conflicting row isn't marked allocated by this import
+        self.assertEqual(Serialdata.objects.get(pk='202401AMP000002B').isallocated, 0)
+        self.assertEqual(Serialdata.objects.get(pk='202401AMP000003B').isallocated, ALLOCATED)
+
+    def test_endpoint(self):
+        client = self.login()
+        response = client.post('/sil/import_customer_mappings/', {'mappings': [mapping_row('202401AMP000001B'), mapping_row('202401AMP000005B')]},
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], {'success': 1, 'duplicate': 1})
+
+        header = ','.join(mapping_row('x'))
+        lines = [','.join(mapping_row(serial).values()) for serial in ('202401AMP000002B', '202401AMP000004B')]
+        upload = SimpleUploadedFile('mappings.csv', '\n'.join([header, *lines]).encode('utf-8-sig'), content_type='text/csv')
+        response = client.post('/sil/import_customer_mappings/', {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(statuses(response.json()['results']), [('202401AMP000002B', 'success'), ('202401AMP000004B', 'denied')])
+
+        self.assertEqual(client.post('/sil/import_customer_mappings/', {'mappings': {}}, content_type='application/json').status_code, 400)
+        upload = SimpleUploadedFile('mappings.csv', b'\xff\xfe\x00bad', content_type='text/csv')
+        self.assertEqual(client.post('/sil/import_customer_mappings/', {'file': upload}).status_code, 400)
@@ -0,0 +1,108 @@
+import datetime
+from unittest import mock
+
+from django.utils import timezone
+
+from ..allocation import FETCHED, release_serials, reserve_serials
+from ..bulk import import_customer_mappings, register_serial_numbers
+from ..models import Palmteccustomerdetails, Serialdata
+from .base import DeviceTestCase
+from .test_inventory import mapping_row
+
+
+class DeltaSyncTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.created = timezone.now() - datetime.timedelta(days=1)
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=1, isallocated=0,
+                       createdate=self.created, modifieddate=self.created)
+            for n in range(1, 6)
+        ])
+        self.client = self.login()
+
+    def test_orm_writes_take_the_database_clock(self):
+        # this process's clock a year behind: the stamps must not come from it
+        behind = timezone.now() - datetime.timedelta(days=365)
+        with mock.patch('django.utils.timezone.now', return_value=behind):
+            reserved = reserve_serials(2)
+            release_serials(reserved[:1])
+            register_serial_numbers(['202402AMP000001B'])
+            import_customer_mappings([mapping_row('202401AMP000005B')])
+
+        changed = Serialdata.objects.filter(modifieddate__gt=self.created)
+        self.assertEqual(set(changed.values_list('serialnumber', flat=True)), {*reserved, '202402AMP000001B', '202401AMP000005B'})
+        self.assertEqual(Serialdata.objects.get(pk='202402AMP000001B').createdate, Serialdata.objects.get(pk='202402AMP000001B').modifieddate)
+        mapping = Palmteccustomerdetails.objects.get(pk='202401AMP000005B')
+        self.assertGreater(mapping.createdon, self.created)
+        self.assertGreater(mapping.modifiedon, self.created)
+
+    def test_since_returns_the_rows_changed_after_the_watermark(self):
+        body = self.client.get('/sil/get_serial_numbers/').json()
+        self.assertEqual(len(body['data']), 5)
+
+        reserved = reserve_serials(2)
+        body = self.client.get('/sil/get_serial_numbers/', {'since': body['watermark']}).json()
+        self.assertEqual([row['serialnumber'] for row in body['data']], sorted(reserved))
+        self.assertTrue(all(row['isallocated'] == FETCHED for row in body['data']))
+        self.assertFalse(body['hasMore'])
+
+    def test_bad_watermark(self):
+        self.assertEqual(self.client.get('/sil/get_serial_numbers/', {'since': 'nonsense'}).status_code, 400)
+
+
+class ListEtagTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        created = timezone.now() - datetime.timedelta(days=1)
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=1, isallocated=0,
+                       createdate=created, modifieddate=created)
+            for n in range(1, 6)
+        ])
+        Palmteccustomerdetails.objects.create(upideviceserialnumber='202401AMP000001B', uniqueidentifier='UID-1', customercode=100,
+                                              customername='Customer', company='Acme', devicetype='UPIPLUS', isapproved=0,
+                                              isdeleted=0, createdon=created, modifiedon=created)
+        self.client = self.login()
+
+    def test_full_list(self):
+        etag = self.client.get('/sil/get_serial_numbers/')['ETag']
+        response = self.client.get('/sil/get_serial_numbers/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # other parameters, other tag
+        self.assertNotEqual(self.client.get('/sil/get_serial_numbers/', {'layout': 'columns'})['ETag'], etag)
+
+    def test_delete_changes_the_tag(self):
+        etag = self.client.get('/sil/get_serial_numbers/')['ETag']
+        # the latest modifieddate stays the same
+        Serialdata.objects.filter(pk='202401AMP000003B').delete()
+        response = self.client.get('/sil/get_serial_numbers/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_no_tag_while_a_change_is_settling(self):
+        reserve_serials(1)
+        response = self.client.get('/sil/get_serial_numbers/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_delta_and_keyset_requests_are_not_tagged(self):
+        watermark = self.client.get('/sil/get_serial_numbers/').json()['watermark']
+        with mock.patch('ProductRegistration.views.device_views.list_etag') as list_etag:
+            for params in ({'since': watermark}, {'limit': 2}):
+                response = self.client.get('/sil/get_serial_numbers/', params, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('ETag', response)
+        list_etag.assert_not_called()
+
+    def test_mapping_pages(self):
+        response = self.client.get('/sil/get_customer_mappings/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/sil/get_customer_mappings/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        with mock.patch('ProductRegistration.views.mapping_views.list_etag') as list_etag:
+            response = self.client.get('/sil/get_customer_mappings/', {'since': response.json()['watermark']}, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        list_etag.assert_not_called()
@@ -0,0 +1,116 @@
+import time
+from unittest import mock
+
+from django.utils import timezone
+
+from ..device_cache import device_details_cache, invalidate_device_details
+from ..models import Serialdata
+from ..procedures import call_procedure
+from .base import DeviceTestCase
+
+
+class DeviceDetailsBatchTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        device_details_cache.clear()
+        self.addCleanup(device_details_cache.clear)
+        now = timezone.now()
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=1, isallocated=n % 3,
+                       deviceid=f'D{n}', imei=350000000000000 + n, createdate=now, modifieddate=now)
+            for n in range(1, 6)
+        ])
+        self.client = self.login()
+
+    def batch(self, serials):
+        return self.client.post('/sil/get_device_details_batch/', {'serialnumbers': serials}, content_type='application/json')
+
+    def test_rows_are_the_procedures_rows(self):
+        # one serial cached by the single endpoint, the others fetched by the batch
+        self.client.get('/sil/get_device_details/', {'serialnumber': '202401AMP000002B'})
+        self.assertIsNotNone(device_details_cache.get('202401AMP000002B'))
+
+        serials = ['202401AMP000003B', '202401AMP000002B', '202401AMP000099B', '202401AMP000001B']
+        response = self.batch(serials)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        self.assertEqual(list(body['data']), ['202401AMP000003B', '202401AMP000002B', '202401AMP000001B'])
+        self.assertEqual(body['notFound'], ['202401AMP000099B'])
+        for serialnumber, row in body['data'].items():
+            expected = call_procedure('get_device_details_by_serial', [serialnumber], fetch_rows=True).first_row_dict()
+            self.assertEqual(row, expected)
+        self.assertIn('date', body)
+
+    def test_fetched_rows_are_not_cached(self):
+        self.batch(['202401AMP000001B', '202401AMP000004B'])
+        self.assertIsNone(device_details_cache.get('202401AMP000001B'))
+        self.assertIsNone(device_details_cache.get('202401AMP000004B'))
+
+    def test_limits(self):
+        self.assertEqual(self.batch([f'202401AMP{n:06d}B' for n in range(5001)]).status_code, 400)
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(self.client.post('/sil/get_device_details_batch/', {}, content_type='application/json').status_code, 400)
+
+
+class DeviceDetailsCacheTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        device_details_cache.clear()
+        self.addCleanup(device_details_cache.clear)
+        now = timezone.now()
+        Serialdata.objects.create(serialnumber='202401AMP000001B', category='UPIPLUS', isapproved=0, isallocated=0,
+                                  deviceid='D1', imei=350000000000001, createdate=now, modifieddate=now)
+        self.client = self.login()
+        self.calls = mock.patch('ProductRegistration.views.device_views.call_procedure', wraps=call_procedure)
+        self.procedure = self.calls.start()
+        self.addCleanup(self.calls.stop)
+
+    def details(self, serialnumber='202401AMP000001B'):
+        response = self.client.get('/sil/get_device_details/', {'serialnumber': serialnumber})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def lookups(self):
+        return sum(call.args[0] == 'get_device_details_by_serial' for call in self.procedure.call_args_list)
+
+    def test_second_lookup_is_cached(self):
+        first = self.details()
+        second = self.details()
+        self.assertEqual(self.lookups(), 1)
+        self.assertEqual(first['data']['serialNumber'], second['data']['serialNumber'])
+        # the date/time stamp is added per response, never stored
+        self.assertNotIn('date', device_details_cache.get('202401AMP000001B'))
+
+    def test_writes_drop_the_entry(self):
+        self.assertEqual(self.details()['data']['isApproved'], 0)
+        self.client.patch('/sil/approve_serial_number/', {'serialnumber': '202401AMP000001B'}, content_type='application/json')
+        self.assertEqual(self.details()['data']['isApproved'], 1)
+        self.assertEqual(self.lookups(), 2)
+
+    def test_lookup_racing_a_write_is_not_stored(self):
+        def write_during_lookup(name, args, **kwargs):
+            result = call_procedure(name, args, **kwargs)
+            invalidate_device_details('202401AMP000001B')
+            return result
+
+        self.procedure.side_effect = write_during_lookup
+        self.assertEqual(self.details()['status'], 'success')
+        self.assertIsNone(device_details_cache.get('202401AMP000001B'))
+
+    def test_unknown_serials_are_not_cached(self):
+        self.assertEqual(self.details('202401AMP000099B')['statusCode'], 404)
+        self.details('202401AMP000099B')
+        self.assertEqual(self.lookups(), 2)
+
+    def test_errors(self):
+        self.assertEqual(self.client.get('/sil/get_device_details/').status_code, 400)
+        self.procedure.side_effect = RuntimeError('database down')
+        response = self.client.get('/sil/get_device_details/', {'serialnumber': '202401AMP000001B'})
+        self.assertEqual(response.status_code, 500)
+        self.assertIsNone(device_details_cache.get('202401AMP000001B'))
+
+    def test_entries_expire(self):
+        self.details()
+        with mock.patch('ProductRegistration.cache.time.monotonic', return_value=time.monotonic() + device_details_cache.ttl + 1):
+            self.assertIsNone(device_details_cache.get('202401AMP000001B'))
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.db import connection
+from django.utils import timezone
+
+from ..allocation import release_serials, reserve_serials
+from ..bulk import import_customer_mappings, register_serial_numbers
+from ..inventory import inventory_counts, rebuild_inventory, track_inventory, tracked_procedure
+from ..lifecycle import apply_transition
+from ..models import InventoryDelta, Serialdata
+from ..procedures import call_procedure
+from .base import DeviceTestCase
+
+
+def mapping_row(serialnumber, company='Acme'):
+    return {
+        'serialnumber': serialnumber, 'uniqueIdentifier': f'UID-{serialnumber}', 'customerCode': '100',
+        'customerName': 'Customer', 'company': company, 'devicetype': 'UPIPLUS',
+        'licenseUrl': 'https://example.com/license', 'versionDetails': '1.0',
+    }
+
+
+# After every write path the counters (folded or pending) must equal a full recount
+class InventoryCountsTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'202401AMP{n:06d}B', category='UPIPLUS', isapproved=n % 2, isallocated=0,
+                       createdate=now, modifieddate=now)
+            for n in range(1, 11)
+        ])
+        rebuild_inventory()
+
+    def assertMatchesRebuild(self):
+        counted = inventory_counts()
+        rebuild_inventory()
+        self.assertEqual(counted, inventory_counts())
+
+    def test_procedure_writes(self):
+        serial = '202402API000001B'
+        tracked_procedure(serial, 'save_serial_number', [serial, 'UPIPLUS'], {'category': 'UPIPLUS'}, out_params=2)
+        self.assertMatchesRebuild()
+        tracked_procedure(serial, 'update_serial_number_approval', [serial, 1], {'isapproved': 1}, out_params=2)
+        self.assertMatchesRebuild()
+        tracked_procedure(serial, 'update_serial_number_allocate', [serial, 2], {'isallocated': 2}, out_params=2)
+        self.assertMatchesRebuild()
+        tracked_procedure('202402API000002B', 'save_upi_pro_serial_number', ['202402API000002B', 'UPIPRO', 1, 0],
+                          {'category': 'UPIPRO', 'isapproved': 1, 'isallocated': 0}, out_params=2)
+        self.assertMatchesRebuild()
+        tracked_procedure('202402API000002B', 'deactivate_serial_number', ['202402API000002B'], {'isallocated': 3}, out_params=2)
+        self.assertMatchesRebuild()
+
+    def test_failed_procedure_counts_nothing(self):
+        calls = [
+            ('save_serial_number', ['202401AMP000001B', 'UPIPLUS'], {'category': 'UPIPLUS'}, 'duplicate'),
+            ('update_serial_number_approval', ['202409AMP000001B', 1], {'isapproved': 1}, 'not_found'),
+            ('deactivate_serial_number', ['202401AMP000002B'], {'isallocated': 3}, 'denied'),
+        ]
+        for name, args, changes, expected in calls:
+            result = tracked_procedure(args[0], name, args, changes, out_params=2)
+            self.assertEqual(result.status, expected)
+        self.assertFalse(InventoryDelta.objects.exists())
+        self.assertMatchesRebuild()
+
+    def test_procedure_outcome_is_counted_without_a_transaction(self):
+        # the procedure commits on its own: nothing is bracketed around it, and the deltas
+        # come from the state the caller asked for
+        depth = len(connection.atomic_blocks)
+
+        def call(name, args, out_params=0):
+            self.assertEqual(len(connection.atomic_blocks), depth)
+            return mock.Mock(status='success')
+
+        with mock.patch('ProductRegistration.inventory.call_procedure', side_effect=call) as procedure:
+            tracked_procedure('202401AMP000001B', 'update_serial_number_allocate', ['202401AMP000001B', 2], {'isallocated': 2}, out_params=2)
+        procedure.assert_called_once()
+        self.assertEqual(inventory_counts()[0]['allocated'], 1)
+
+    def test_updating_an_unmapped_device_maps_nothing(self):
+        fields = ['202401AMP000001B', 100, 'UID-1', 'Customer', 'Other', 'UPIPLUS', 'https://example.com/license', '1.0']
+        with mock.patch('ProductRegistration.inventory.call_procedure', return_value=mock.Mock(status='success')):
+            tracked_procedure('202401AMP000001B', 'update_customer_by_serial', fields, {'company': 'Other'}, out_params=2)
+        self.assertEqual(inventory_counts()[0]['mapped'], 0)
+
+    def test_mapping_writes(self):
+        serial = '202401AMP000001B'
+        fields = [serial, 'UID-1', 100, 'Customer', 'Acme', 'UPIPLUS', 'https://example.com/license', '1.0']
+        with track_inventory([serial]):
+            call_procedure('save_serial_customer_details', fields, out_params=2)
+            call_procedure('update_serial_number_allocate', [serial, 2], out_params=2)
+        self.assertMatchesRebuild()
+
+        fields = [serial, 100, 'UID-1', 'Customer', 'Other', 'UPIPLUS', 'https://example.com/license', '1.0']
+        tracked_procedure(serial, 'update_customer_by_serial', fields, {'company': 'Other'}, out_params=2)
+        self.assertMatchesRebuild()
+        self.assertEqual([group['value'] for group in inventory_counts(['company'])[1]['company']], ['Other'])
+
+    def test_endpoint_writes(self):
+        client = self.login()
+        client.post('/sil/add_serial_number/', {'serialnumber': '202402API000001B'}, content_type='application/json')
+        client.post('/sil/approve_serial_number/', {'serialnumber': '202402API000001B'}, content_type='application/json')
+        self.assertMatchesRebuild()
+        response = client.post('/sil/create_customer_mapping/', mapping_row('202402API000001B'), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertMatchesRebuild()
+        update = dict(mapping_row('202402API000001B', 'Globex'), cLicenseURL='https://example.com/license')
+        self.assertEqual(client.post('/sil/update_customer_mapping/', update, content_type='application/json').status_code, 200)
+        self.assertMatchesRebuild()
+        self.assertEqual(client.post('/sil/deactivate_serial_number/', {'serialnumber': '202401AMP000001B'}, content_type='application/json').status_code, 200)
+        self.assertMatchesRebuild()
+        self.assertEqual(inventory_counts()[0]['allocated'], 1)
+
+    def test_bulk_writes(self):
+        register_serial_numbers(['202401AMP000001B', '202403AMP000001B', '202403AMP000002B', 'bad'])
+        self.assertMatchesRebuild()
+        import_customer_mappings([mapping_row('202401AMP000002B'), mapping_row('202403AMP000001B', 'Globex'), mapping_row('202409AMP000009B')])
+        self.assertMatchesRebuild()
+
+    def test_allocation_and_transitions(self):
+        serials = reserve_serials(3)
+        self.assertMatchesRebuild()
+        release_serials(serials[:1])
+        self.assertMatchesRebuild()
+        apply_transition('approve', ['202401AMP000002B', '202401AMP000004B', '202409AMP000009B'])
+        self.assertMatchesRebuild()
+        apply_transition('deactivate', ['202401AMP000002B', '202401AMP000003B'])
+        self.assertMatchesRebuild()
+
+    def test_pending_deltas_are_counted(self):
+        with mock.patch('ProductRegistration.inventory.fold_deltas', return_value=0):
+            register_serial_numbers(['202405AMP000001B', '202405API000002B'])
+            counted = inventory_counts()
+        self.assertTrue(InventoryDelta.objects.exists())
+        self.assertEqual(counted[0]['registered'], 12)
+
+        rebuild_inventory()
+        self.assertFalse(InventoryDelta.objects.exists())
+        self.assertEqual(counted, inventory_counts())
@@ -0,0 +1,120 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .. import jobs
+from ..jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobContext, JobRunner, claim_job, fail_stale_jobs
+from ..models import Job, Serialdata
+from .base import DeviceTestCase
+
+
+# No runner thread (JOB_WORKERS=0): the tests claim and execute the jobs themselves
+class JobTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.results_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.results_dir, ignore_errors=True)
+        settings_override = override_settings(JOB_WORKERS=0, JOB_RESULTS_DIR=self.results_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # the runner closes its thread's connection after every job
+        patcher = mock.patch.object(jobs.connection, 'close')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.runner = JobRunner()
+        self.client = self.login()
+
+    def submit(self, kind, data, client=None):
+        return (client or self.client).post(f'/sil/jobs/{kind}/', data, content_type='application/json')
+
+    def run_next(self):
+        job = claim_job(self.runner.worker)
+        self.runner._running[job.pk] = context = JobContext(job)
+        self.runner._execute(job, context)
+        return Job.objects.get(pk=job.pk)
+
+    def test_register_job(self):
+        response = self.submit('register_serial_numbers', {'serialnumbers': ['202401AMP000001B', '202401AMP000001B', 'bad']})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['job']['id']
+        self.assertEqual(response.json()['job']['status'], QUEUED)
+
+        job = self.run_next()
+        self.assertEqual((job.status, job.progress, job.total), (SUCCEEDED, 1, 1))
+        self.assertEqual(job.result, {'summary': {'success': 1, 'duplicate': 1, 'invalid': 1}})
+        self.assertTrue(Serialdata.objects.filter(pk='202401AMP000001B').exists())
+
+        status = self.client.get(f'/sil/jobs/{job_id}/').json()['job']
+        self.assertEqual(status['status'], SUCCEEDED)
+        download = self.client.get(status['resultUrl'])
+        self.assertEqual(download.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(b''.join(download.streaming_content).decode())))
+        download.close()
+        self.assertEqual([row['status'] for row in rows], ['success', 'duplicate', 'invalid'])
+
+    def test_other_users_jobs_are_not_found(self):
+        job_id = self.submit('rebuild_inventory', {}).json()['job']['id']
+        self.run_next()
+
+        other = self.login('someone_else')
+        self.assertEqual(other.get(f'/sil/jobs/{job_id}/').status_code, 404)
+        self.assertEqual(other.get(f'/sil/jobs/{job_id}/result/').status_code, 404)
+        self.assertEqual(other.get('/sil/jobs/').json()['data'], [])
+        self.assertEqual([job['id'] for job in self.client.get('/sil/jobs/').json()['data']], [job_id])
+
+    def test_result_of_an_unfinished_job(self):
+        job_id = self.submit('register_serial_numbers', {'serialnumbers': ['202401AMP000001B']}).json()['job']['id']
+        self.assertEqual(self.client.get(f'/sil/jobs/{job_id}/result/').status_code, 409)
+
+    def test_failed_job_keeps_no_result_file(self):
+        def fail(job):
+            job.open_result('csv', 'text/csv').close()
+            raise RuntimeError('disk full')
+
+        self.submit('rebuild_inventory', {})
+        with mock.patch.dict(jobs.JOB_KINDS, {'rebuild_inventory': fail}):
+            job = self.run_next()
+        self.assertEqual((job.status, job.error, job.result_file), (FAILED, 'disk full', ''))
+        self.assertEqual(os.listdir(self.results_dir), [])
+        self.assertEqual(self.runner.stats()['failed'], 1)
+
+    def test_claims_oldest_first_and_once(self):
+        first = self.submit('rebuild_inventory', {}).json()['job']['id']
+        second = self.submit('rebuild_inventory', {}).json()['job']['id']
+        self.assertEqual(str(claim_job('a').pk), first)
+        self.assertEqual(str(claim_job('b').pk), second)
+        self.assertIsNone(claim_job('c'))
+
+    def test_stale_jobs_fail_and_keep_that_outcome(self):
+        self.submit('rebuild_inventory', {})
+        job = claim_job(self.runner.worker)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(fail_stale_jobs(60), 1)
+
+        # the worker finishing later doesn't overwrite the failure
+        self.runner._running[job.pk] = context = JobContext(job)
+        self.runner._execute(job, context)
+        job = Job.objects.get(pk=job.pk)
+        self.assertEqual(job.status, FAILED)
+        self.assertIn('Worker stopped', job.error)
+
+    def test_heartbeat_writes_progress(self):
+        self.submit('rebuild_inventory', {})
+        job = claim_job(self.runner.worker)
+        self.runner._running[job.pk] = context = JobContext(job)
+        context.progress(3, 10)
+        self.runner._heartbeat()
+        self.assertEqual(Job.objects.filter(pk=job.pk, status=RUNNING).values_list('progress', 'total').get(), (3, 10))
+
+    def test_bad_submissions(self):
+        self.assertEqual(self.submit('nonsense', {}).status_code, 404)
+        self.assertEqual(self.submit('register_serial_numbers', {'serialnumbers': []}).status_code, 400)
+        self.assertEqual(self.submit('export_customer_mappings', {'fileFormat': 'xml'}).status_code, 400)
+        self.assertFalse(Job.objects.exists())
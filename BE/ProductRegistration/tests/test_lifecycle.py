@@ -0,0 +1,76 @@
+from django.utils import timezone
+
+from ..inventory import inventory_counts, rebuild_inventory
+from ..models import Serialdata
+from .base import DeviceTestCase
+
+
+# (isapproved, isallocated) of the fixture devices, one per sequence number
+STATES = [(0, 0), (1, 0), (1, 1), (1, 2), (1, 3), (0, 3)]
+
+
+# The batch endpoints against the single-serial ones on the same fixtures: the devices of
+# January go through the batch, a copy of them in February one by one
+class BatchTransitionTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=f'2024{month}AMP{n:06d}B', category='UPIPLUS', isapproved=isapproved, isallocated=isallocated,
+                       createdate=now, modifieddate=now)
+            for month in ('01', '02')
+            for n, (isapproved, isallocated) in enumerate(STATES, 1)
+        ])
+        rebuild_inventory()
+        self.client = self.login()
+
+    def serials(self, month):
+        # the last one isn't registered
+        return [f'2024{month}AMP{n:06d}B' for n in range(1, len(STATES) + 2)]
+
+    def states(self, month):
+        return [
+            Serialdata.objects.filter(pk=serial).values_list('isapproved', 'isallocated').first()
+            for serial in self.serials(month)
+        ]
+
+    def assertSameAsSingle(self, method, batch_url, single_url):
+        response = getattr(self.client, method)(batch_url, {'serialnumbers': self.serials('01')}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+
+        outcomes = {serial: ('success', None) for serial in body['moved']}
+        outcomes.update({item['serialnumber']: (item['status'], item['message']) for item in body['rejected']})
+        for january, february in zip(self.serials('01'), self.serials('02')):
+            single = getattr(self.client, method)(single_url, {'serialnumber': february}, content_type='application/json').json()
+            status, message = outcomes[january]
+            self.assertEqual(status, single['status'], january)
+            if status != 'success':
+                self.assertEqual(message, single['message'], january)
+
+        self.assertEqual(self.states('01'), self.states('02'))
+        self.assertEqual(body['summary']['moved'], len(body['moved']))
+
+        counted = inventory_counts()
+        rebuild_inventory()
+        self.assertEqual(counted, inventory_counts())
+        return body
+
+    def test_approve(self):
+        body = self.assertSameAsSingle('patch', '/sil/approve_serial_numbers/', '/sil/approve_serial_number/')
+        self.assertIn({'serialnumber': '202401AMP000007B', 'status': 'not_found', 'message': 'Serial number not found'}, body['rejected'])
+
+    def test_allocate(self):
+        self.assertSameAsSingle('post', '/sil/allocate_serial_numbers/', '/sil/allocate_serial_number/')
+
+    def test_deactivate(self):
+        body = self.assertSameAsSingle('post', '/sil/deactivate_serial_numbers/', '/sil/deactivate_serial_number/')
+        self.assertEqual(body['moved'], ['202401AMP000002B'])
+        self.assertEqual({item['status'] for item in body['rejected']}, {'denied', 'not_found'})
+
+    def test_input(self):
+        self.assertEqual(self.client.post('/sil/deactivate_serial_numbers/', {'serialnumbers': []}, content_type='application/json').status_code, 400)
+        # repeated and blank serials are dropped
+        body = self.client.post('/sil/deactivate_serial_numbers/', [' 202401AMP000002B', '202401AMP000002B', ''], content_type='application/json').json()
+        self.assertEqual(body['moved'], ['202401AMP000002B'])
+        self.assertEqual(body['rejected'], [])
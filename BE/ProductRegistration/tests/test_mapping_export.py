@@ -0,0 +1,60 @@
+import json
+from unittest import mock
+
+from django.utils import timezone
+
+from ..mapping_query import parse_mapping_query, stream_mapping_rows
+from ..models import Palmteccustomerdetails
+from .base import DeviceTestCase
+
+
+class MappingExportTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Palmteccustomerdetails.objects.bulk_create([
+            Palmteccustomerdetails(
+                upideviceserialnumber=f'202501AMP{n:06d}B', customercode=1000 + n, uniqueidentifier=f'UID-{n}',
+                customername='Customer', company='X', devicetype='AMP', isapproved=0, isdeleted=0, createdon=now, modifiedon=now,
+            )
+            for n in range(5)
+        ])
+
+    def test_other_databases_read_through_the_queryset(self):
+        with mock.patch('ProductRegistration.mapping_query.connections.create_connection') as create_connection, \
+                mock.patch('ProductRegistration.mapping_query.STREAM_CHUNK_SIZE', 2):
+            rows = list(stream_mapping_rows(parse_mapping_query({})))
+        create_connection.assert_not_called()
+        self.assertEqual([row[0] for row in rows], [f'202501AMP{n:06d}B' for n in range(5)])
+
+    def test_endpoint(self):
+        client = self.login()
+        response = client.get('/sil/export_customer_mappings/', {'fileFormat': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['upiDeviceSerialNumber'] for line in lines], [f'202501AMP{n:06d}B' for n in range(5)])
+        self.assertEqual(client.get('/sil/export_customer_mappings/', {'fileFormat': 'xml'}).status_code, 400)
+
+    def test_mysql_holds_its_own_connection_until_closed(self):
+        stream_connection = mock.Mock()
+        stream_connection._prepare_cursor.side_effect = lambda cursor: cursor
+        raw_cursor = stream_connection.connection.cursor.return_value
+        raw_cursor.fetchmany.side_effect = [[('A',), ('B',)], [('C',)], []]
+
+        with mock.patch('ProductRegistration.mapping_query.connection') as request_connection, \
+                mock.patch('ProductRegistration.mapping_query.SSCursor', object, create=True), \
+                mock.patch('ProductRegistration.mapping_query.MySQLCursorWrapper', lambda cursor: cursor, create=True), \
+                mock.patch('ProductRegistration.mapping_query.connections.create_connection', return_value=stream_connection) as create_connection:
+            request_connection.vendor = 'mysql'
+            request_connection.alias = 'default'
+            rows = stream_mapping_rows(parse_mapping_query({}))
+            self.assertEqual(next(rows), ('A',))
+
+            create_connection.assert_called_once_with('default')
+            stream_connection.connection.cursor.assert_called_once_with(object)
+            stream_connection.close.assert_not_called()
+
+            # a client going away closes the generator midway
+            rows.close()
+        raw_cursor.close.assert_called_once_with()
+        stream_connection.close.assert_called_once_with()
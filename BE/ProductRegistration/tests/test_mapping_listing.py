@@ -0,0 +1,181 @@
+import datetime
+from unittest import mock
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ..cache import TTLCache
+from ..mapping_cache import get_mapping_page, invalidate_mappings, mapping_count_cache, mapping_page_cache
+from ..mapping_query import parse_mapping_query
+from ..models import Palmteccustomerdetails, Serialdata
+from ..views.mapping_views import customer_mappings_result
+from .base import DeviceTestCase
+from .test_inventory import mapping_row
+
+
+PAGE_SIZE = 7
+
+
+# Cursor pages must continue the offset pages exactly, forwards and backwards, for every
+# sort column and direction, with ties on the sort column broken by serial number
+@override_settings(MAPPING_LISTING_ENGINE='orm')
+class MappingSeekTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        invalidate_mappings()
+        now = timezone.now()
+        Palmteccustomerdetails.objects.bulk_create([
+            Palmteccustomerdetails(
+                upideviceserialnumber=f'202501AMP{n:06d}B', customercode=1000 + n % 9, uniqueidentifier=f'UID-{n % 4}',
+                customername=[None, 'A', 'B', 'C'][n % 4], company=[None, 'X', 'Y'][n % 3], devicetype='AMP' if n % 2 else 'API',
+                isapproved=n % 3, isdeleted=0, createdon=now - datetime.timedelta(hours=n % 5), modifiedon=now,
+            )
+            for n in range(57)
+        ])
+        self.addCleanup(invalidate_mappings)
+
+    def page(self, **params):
+        payload, status_code = customer_mappings_result({'pageSize': PAGE_SIZE, **{name: str(value) for name, value in params.items()}})
+        self.assertEqual(status_code, 200, payload)
+        return payload
+
+    def serials(self, payload):
+        return [row['upiDeviceSerialNumber'] for row in payload['data']]
+
+    def test_cursor_pages_continue_offset_pages(self):
+        for sort_index in range(8):
+            for direction in (0, 1):
+                with self.subTest(sort_index=sort_index, direction=direction):
+                    order = {'sortingOrderIndex': sort_index, 'sortingOrderDirection': direction}
+                    full = self.serials(self.page(**order, pageSize=100))
+                    self.assertEqual(len(full), 57)
+
+                    pages = [self.page(**order)]
+                    while pages[-1]['nextCursor']:
+                        pages.append(self.page(**order, cursor=pages[-1]['nextCursor']))
+                    self.assertEqual([serial for page in pages for serial in self.serials(page)], full)
+
+                    backwards = self.serials(pages[-1])
+                    page = pages[-1]
+                    while page['prevCursor']:
+                        page = self.page(**order, cursor=page['prevCursor'])
+                        backwards = self.serials(page) + backwards
+                    self.assertEqual(backwards, full)
+
+                    offset = self.page(**order, pageNumber=2 * PAGE_SIZE)
+                    self.assertEqual(self.serials(self.page(**order, cursor=offset['nextCursor'])), full[3 * PAGE_SIZE:4 * PAGE_SIZE])
+                    self.assertEqual(self.serials(self.page(**order, cursor=offset['prevCursor'])), full[PAGE_SIZE:2 * PAGE_SIZE])
+
+    def test_cursor_for_another_sort_is_rejected(self):
+        cursor = self.page(sortingOrderIndex=1)['nextCursor']
+        payload, status_code = customer_mappings_result({'pageSize': str(PAGE_SIZE), 'sortingOrderIndex': '2', 'cursor': cursor})
+        self.assertEqual(status_code, 400)
+
+    @override_settings(MAPPING_LISTING_ENGINE='procedure')
+    def test_procedure_pages_have_no_cursors(self):
+        payload = self.page(pageNumber=PAGE_SIZE)
+        self.assertEqual(len(payload['data']), PAGE_SIZE)
+        self.assertIsNone(payload['nextCursor'])
+        self.assertIsNone(payload['prevCursor'])
+
+
+# The trigram candidates narrow the ORM listing only; the procedure engine searches on its own
+class SearchCandidateTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        invalidate_mappings()
+        now = timezone.now()
+        Palmteccustomerdetails.objects.bulk_create([
+            Palmteccustomerdetails(
+                upideviceserialnumber=f'202501AMP{n:06d}B', customercode=1000 + n, uniqueidentifier=f'UID-{n}',
+                customername='Acme' if n % 2 else 'Globex', company='X', devicetype='AMP',
+                isapproved=0, isdeleted=0, createdon=now, modifiedon=now,
+            )
+            for n in range(10)
+        ])
+        self.addCleanup(invalidate_mappings)
+
+    def search(self):
+        payload, status_code = customer_mappings_result({'searchText': 'Acme', 'pageSize': '100'})
+        self.assertEqual(status_code, 200, payload)
+        return sorted(row['upiDeviceSerialNumber'] for row in payload['data'])
+
+    @override_settings(MAPPING_LISTING_ENGINE='orm')
+    def test_orm_engine_reads_the_candidates(self):
+        with mock.patch('ProductRegistration.views.mapping_views.search_candidates', return_value=['202501AMP000001B', '202501AMP000003B']) as candidates:
+            self.assertEqual(self.search(), ['202501AMP000001B', '202501AMP000003B'])
+        candidates.assert_called_once_with('Acme')
+
+        invalidate_mappings()
+        with mock.patch('ProductRegistration.views.mapping_views.search_candidates', return_value=None):
+            self.assertEqual(len(self.search()), 5)
+
+    @override_settings(MAPPING_LISTING_ENGINE='procedure')
+    def test_procedure_engine_ignores_the_index(self):
+        with mock.patch('ProductRegistration.views.mapping_views.search_candidates', return_value=['202501AMP000001B']) as candidates:
+            self.assertEqual(self.search(), [f'202501AMP{n:06d}B' for n in (1, 3, 5, 7, 9)])
+        candidates.assert_not_called()
+
+
+class MappingCacheTests(DeviceTestCase):
+    def setUp(self):
+        super().setUp()
+        invalidate_mappings()
+        self.addCleanup(invalidate_mappings)
+        now = timezone.now()
+        Palmteccustomerdetails.objects.bulk_create([
+            Palmteccustomerdetails(
+                upideviceserialnumber=f'202501AMP{n:06d}B', customercode=1000 + n, uniqueidentifier=f'UID-{n}',
+                customername='Customer', company='X', devicetype='AMP', isapproved=0, isdeleted=0, createdon=now, modifiedon=now,
+            )
+            for n in range(12)
+        ])
+        self.fetches = []
+
+    def fetch(self, query):
+        self.fetches.append(query)
+        return [('row', query.page_number)], 12
+
+    def test_pages_and_counts_are_cached(self):
+        first = parse_mapping_query({'pageSize': '5'})
+        self.assertEqual(get_mapping_page(first, self.fetch), ([('row', 0)], 12))
+        self.assertEqual(get_mapping_page(first, self.fetch), ([('row', 0)], 12))
+        self.assertEqual(len(self.fetches), 1)
+
+        # another page of the same filters shares the count, not the rows
+        get_mapping_page(parse_mapping_query({'pageSize': '5', 'pageNumber': '5'}), self.fetch)
+        self.assertEqual(len(self.fetches), 2)
+        self.assertEqual(len(mapping_count_cache), 1)
+        self.assertEqual(len(mapping_page_cache), 2)
+
+    def test_page_read_during_a_write_is_not_served(self):
+        query = parse_mapping_query({'pageSize': '5'})
+
+        def fetch_during_write(query):
+            rows = self.fetch(query)
+            invalidate_mappings()
+            return rows
+
+        get_mapping_page(query, fetch_during_write)
+        get_mapping_page(query, self.fetch)
+        self.assertEqual(len(self.fetches), 2)
+
+    def test_mapping_writes_invalidate(self):
+        client = self.login()
+        self.assertEqual(client.get('/sil/get_customer_mappings/').json()['totalCount'], 12)
+
+        now = timezone.now()
+        Serialdata.objects.create(serialnumber='202501AMP000099B', category='UPIPLUS', isapproved=1, isallocated=0,
+                                  createdate=now, modifieddate=now)
+        response = client.post('/sil/create_customer_mapping/', mapping_row('202501AMP000099B'), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(client.get('/sil/get_customer_mappings/').json()['totalCount'], 13)
+
+    def test_ttl_cache_evicts_least_recently_used(self):
+        cache = TTLCache('test_lru', max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .. import sequences
+from ..bulk import register_serial_numbers
+from ..models import SerialSequence, Serialdata
+from ..sequences import SequenceExhausted, allocate_sequences, generate_serials
+from .base import DeviceTestCase
+
+
+def serial(number):
+    return f'202401AMP{number:06d}B'
+
+
+class SequenceTestCase(DeviceTestCase):
+    def register(self, *numbers):
+        now = timezone.now()
+        Serialdata.objects.bulk_create([
+            Serialdata(serialnumber=serial(number), category='UPIPLUS', isapproved=0, isallocated=0, createdate=now, modifieddate=now)
+            for number in numbers
+        ])
+
+    # registers the given numbers by hand the first time the generator registers a chunk
+    def registered_meanwhile(self, *numbers):
+        calls = []
+
+        def register(chunk, category):
+            if not calls:
+                self.register(*numbers)
+            calls.append(chunk)
+            return register_serial_numbers(chunk, category)
+
+        return mock.patch.object(sequences, 'register_serial_numbers', side_effect=register)
+
+
+class AllocateSequencesTests(SequenceTestCase):
+    def test_new_prefix_starts_after_the_highest_serial(self):
+        self.register(0, 1, 5)
+        self.assertEqual(allocate_sequences('202401AMP', 2), [serial(6), serial(7)])
+        self.assertEqual(allocate_sequences('202401AMP', 1), [serial(8)])
+        self.assertEqual(SerialSequence.objects.get(prefix='202401AMP').next_sequence, 9)
+
+    def test_skips_serials_registered_by_hand(self):
+        allocate_sequences('202401AMP', 1)
+        self.register(1, 2, 4)
+        self.assertEqual(allocate_sequences('202401AMP', 2), [serial(3), serial(5)])
+
+    def test_wraps_to_the_free_numbers_below(self):
+        self.register(0, 999998, 999999)
+        self.assertEqual(allocate_sequences('202401AMP', 2), [serial(1), serial(2)])
+
+    def test_exhausted_once_no_number_is_free(self):
+        with mock.patch.object(sequences, 'MAX_SEQUENCE', 9):
+            self.register(*(number for number in range(10) if number not in (3, 7)))
+            with self.assertRaises(SequenceExhausted):
+                allocate_sequences('202401AMP', 3)
+            self.assertEqual(allocate_sequences('202401AMP', 2), [serial(3), serial(7)])
+
+
+class GenerateSerialsTests(SequenceTestCase):
+    def test_registers_the_serials(self):
+        serials, results, shortfall = generate_serials('202401AMP', 3)
+        self.assertEqual(serials, [serial(0), serial(1), serial(2)])
+        self.assertEqual([result['status'] for result in results], ['success'] * 3)
+        self.assertEqual(shortfall, 0)
+        self.assertEqual(Serialdata.objects.count(), 3)
+
+    def test_serials_registered_meanwhile_are_replaced(self):
+        with self.registered_meanwhile(1):
+            serials, results, shortfall = generate_serials('202401AMP', 3)
+        self.assertEqual(serials, [serial(0), serial(1), serial(2), serial(3)])
+        self.assertEqual([(result['row'], result['status']) for result in results],
+                         [(1, 'success'), (2, 'duplicate'), (3, 'success'), (4, 'success')])
+        self.assertEqual(shortfall, 0)
+
+    def test_shortfall_when_no_replacement_is_free(self):
+        with mock.patch.object(sequences, 'MAX_SEQUENCE', 4), self.registered_meanwhile(2):
+            serials, results, shortfall = generate_serials('202401AMP', 5)
+        self.assertEqual(len(serials), 5)
+        self.assertEqual(shortfall, 1)
+
+    def test_without_register(self):
+        self.assertEqual(generate_serials('202401AMP', 2, register=False), ([serial(0), serial(1)], None, 0))
+        self.assertFalse(Serialdata.objects.exists())
+
+
+class GenerateEndpointTests(SequenceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = self.login()
+
+    def generate(self, count, **data):
+        return self.client.post('/sil/generate_serial_numbers/', {'year': 2024, 'month': 1, 'deviceType': 'AMP', 'count': count, **data},
+                                content_type='application/json')
+
+    def test_generate(self):
+        response = self.generate(2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['serialnumbers'], [serial(0), serial(1)])
+        self.assertEqual((response.json()['skipped'], response.json()['shortfall']), ([], 0))
+
+        response = self.generate(2, register=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['serialnumbers'], [serial(2), serial(3)])
+
+    def test_shortfall_is_reported(self):
+        with mock.patch.object(sequences, 'MAX_SEQUENCE', 4), self.registered_meanwhile(2):
+            response = self.generate(5)
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body['count'], body['skipped'], body['shortfall']), (4, [serial(2)], 1))
+        self.assertIn('1 fewer than requested', body['message'])
+
+    def test_exhausted_prefix(self):
+        with mock.patch.object(sequences, 'MAX_SEQUENCE', 4):
+            self.register(0, 1)
+            self.assertEqual(self.generate(4).status_code, 409)
+            self.assertEqual(self.generate(3).status_code, 201)
+
+    def test_failed_registration(self):
+        with mock.patch.object(sequences, 'register_serial_numbers', side_effect=DatabaseError('database down')):
+            response = self.generate(2)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['unregistered'], [serial(0), serial(1)])
+        # the numbers stay allocated
+        self.assertEqual(self.generate(1).json()['serialnumbers'], [serial(2)])
+
+    def test_bad_input(self):
+        for data in ({'count': 0}, {'count': 'many'}, {'month': 13}, {'deviceType': 'XYZ'}):
+            with self.subTest(data=data):
+                self.assertEqual(self.generate(**{'count': 1, **data}).status_code, 400)
@@ -0,0 +1,54 @@
+from ..serials import (
+    InvalidSerialNumber, SerialNumber, invalid_serial_indexes, is_valid_serial, pack_serials, parse_serials,
+)
+from .base import DeviceTestCase
+
+
+class SerialNumberTests(DeviceTestCase):
+    def test_parse(self):
+        serial = SerialNumber.parse('202505AMP123456B')
+        self.assertEqual((serial.year, serial.month, serial.device_type, serial.sequence), (2025, 5, 'AMP', 123456))
+        self.assertEqual(serial.prefix, '202505AMP')
+        self.assertEqual(str(serial), '202505AMP123456B')
+
+    def test_invalid_values(self):
+        for value in ('202505AMP12345B', '202505XYZ123456B', '202505AMP123456', ' 202505AMP123456B', '202505amp123456B',
+                      '202505AMP123456B\n', None, 202505123456):
+            with self.subTest(value=value):
+                self.assertFalse(is_valid_serial(value))
+                with self.assertRaises(InvalidSerialNumber):
+                    SerialNumber.parse(value)
+
+        with self.assertRaises(InvalidSerialNumber):
+            SerialNumber(2025, 5, 'XYZ', 1)
+        with self.assertRaises(InvalidSerialNumber):
+            SerialNumber(2025, 5, 'AMP', 1000000)
+
+    def test_packed_keys_round_trip_and_sort_like_strings(self):
+        values = ['202505API000001B', '202412AMP999999B', '202505AMP000002B', '202001AMP000000B', '999999API999999B']
+        keys = pack_serials(values)
+        self.assertEqual(keys, [SerialNumber.parse(value).to_int() for value in values])
+        self.assertEqual([str(SerialNumber.from_int(key)) for key in keys], values)
+        self.assertEqual([values[index] for index in sorted(range(len(values)), key=keys.__getitem__)], sorted(values))
+
+        with self.assertRaises(InvalidSerialNumber):
+            pack_serials(['202505AMP000001B', 'bad'])
+
+    def test_equality_and_ordering(self):
+        self.assertEqual(SerialNumber.parse('202505AMP000001B'), SerialNumber(2025, 5, 'AMP', 1))
+        self.assertEqual(len({SerialNumber.parse('202505AMP000001B'), SerialNumber(2025, 5, 'AMP', 1)}), 1)
+        self.assertLess(SerialNumber.parse('202505AMP999999B'), SerialNumber.parse('202505API000000B'))
+
+
+class SerialBatchTests(DeviceTestCase):
+    def test_invalid_indexes(self):
+        valid = [f'202505AMP{n:06d}B' for n in range(100)]
+        self.assertEqual(invalid_serial_indexes(valid), [])
+        self.assertEqual(invalid_serial_indexes([]), [])
+        # a value spanning two lines must not pass the joined scan as two serials
+        self.assertEqual(invalid_serial_indexes(['202505AMP000001B\n202505AMP000002B', '202505AMP000003B']), [0])
+        self.assertEqual(invalid_serial_indexes(['202505AMP000001B', None, 'bad', 7, '202505API000001B']), [1, 2, 3])
+
+    def test_parse_serials(self):
+        parsed = parse_serials(['202505AMP000001B', 'bad', None, '202505API000002B'])
+        self.assertEqual(parsed, [SerialNumber(2025, 5, 'AMP', 1), None, None, SerialNumber(2025, 5, 'API', 2)])
@@ -1,5 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from .views import auth_views,device_views,mapping_views
+from .views import async_views,auth_views,device_views,job_views,mapping_views,stats_views
+
+
+# the read endpoints have async variants for ASGI deployments (see views/async_views.py)
+if settings.ASYNC_READ_ENDPOINTS:
+    get_customer_mappings = async_views.get_customer_mappings
+    get_device_details = async_views.get_device_details
+else:
+    get_customer_mappings = mapping_views.get_customer_mappings
+    get_device_details = device_views.get_device_details
 
 
 urlpatterns = [
@@ -14,14 +24,36 @@ urlpatterns = [
     # handle serial number operations
     path('get_serial_numbers/', device_views.get_serial_numbers, name="get_serial_numbers"),
     path('add_serial_number/', device_views.add_serial_number, name="add_serial_number"),
+    path('add_serial_numbers_bulk/', device_views.add_serial_numbers_bulk, name="add_serial_numbers_bulk"),
+    path('generate_serial_numbers/', device_views.generate_serial_numbers, name="generate_serial_numbers"),
     path('approve_serial_number/', device_views.approve_serial_number, name="approve_serial_number"),
+    path('approve_serial_numbers/', device_views.approve_serial_numbers, name="approve_serial_numbers"),
     path('allocate_serial_number/', device_views.allocate_serial_number, name="allocate_serial_number"),
+    path('allocate_serial_numbers/', device_views.allocate_serial_numbers, name="allocate_serial_numbers"),
     path('getSerialNumber/', device_views.get_unallocated_sl_no, name="get_unallocated_sl_no"),
-    path('get_device_details/', device_views.get_device_details, name="get_device_details"),
+    path('reserve_serial_numbers/', device_views.reserve_serial_numbers, name="reserve_serial_numbers"),
+    path('get_device_details/', get_device_details, name="get_device_details"),
+    path('get_device_details_batch/', device_views.get_device_details_batch, name="get_device_details_batch"),
     path('deactivate_serial_number/', device_views.deactivate_serial_number, name="deactivate_serial_number"),
+    path('deactivate_serial_numbers/', device_views.deactivate_serial_numbers, name="deactivate_serial_numbers"),
     
     # handle device mappings
-    path('get_customer_mappings/', mapping_views.get_customer_mappings, name="get_customer_mappings"),
+    path('get_customer_mappings/', get_customer_mappings, name="get_customer_mappings"),
+    path('export_customer_mappings/', mapping_views.export_customer_mappings, name="export_customer_mappings"),
     path('create_customer_mapping/', mapping_views.create_customer_mapping, name="create_customer_mapping"),
+    path('import_customer_mappings/', mapping_views.import_customer_mappings_bulk, name="import_customer_mappings"),
     path('update_customer_mapping/', mapping_views.update_customer_mapping, name="update_customer_mapping"),
+
+    # background jobs (the job id routes come first, the rest is a job kind)
+    path('jobs/', job_views.list_jobs, name="list_jobs"),
+    path('jobs/<uuid:job_id>/', job_views.job_status, name="job_status"),
+    path('jobs/<uuid:job_id>/result/', job_views.job_result, name="job_result"),
+    path('jobs/<str:kind>/', job_views.submit_job_view, name="submit_job"),
+
+    # inventory rollups
+    path('inventory_stats/', stats_views.inventory_stats, name="inventory_stats"),
+
+    # runtime diagnostics
+    path('runtime_stats/', stats_views.runtime_stats, name="runtime_stats"),
+    path('metrics/', stats_views.metrics, name="metrics"),
 ]
\ No newline at end of file
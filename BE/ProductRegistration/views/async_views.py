@@ -0,0 +1,60 @@
+from django.http import HttpResponse
+from ..async_db import run_db
+from ..delta import not_modified,with_etag
+from ..renderers import dumps
+from .auth_views import get_user_from_cookie
+from .device_views import device_details_result
+from .mapping_views import conditional_customer_mappings
+
+
+# Async variants of the read endpoints, served in place of the DRF views when
+# ASYNC_READ_ENDPOINTS is on (off by default; set it for the BE.asgi workers).
+# Authentication and the blocking database work run together as one job on the
+# bounded pool in async_db, so the event loop keeps accepting requests while MySQL
+# answers.
+# Responses are encoded like the DRF views' (renderers.FastJSONRenderer).
+
+
+def _json(payload, status_code):
+    return HttpResponse(dumps(payload), status=status_code, content_type='application/json')
+
+
+def _authenticated(request, result, *args):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return {'error': 'Authentication required'}, 401
+    return result(*args)
+
+
+def _customer_mappings(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return {'error': 'Authentication required'}, 401, None
+    return conditional_customer_mappings(request)
+
+
+# only GET is served here; CORS preflights are answered by the middleware before the view
+def _method_not_allowed(request):
+    response = _json({'detail': f'Method "{request.method}" not allowed.'}, 405)
+    response['Allow'] = 'GET'
+    return response
+
+
+async def get_customer_mappings(request):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    payload, status_code, etag = await run_db(_customer_mappings, request)
+    if payload is None:
+        return not_modified(etag)
+    return with_etag(_json(payload, status_code), etag)
+
+
+async def get_device_details(request):
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+
+    payload, status_code = await run_db(_authenticated, request, device_details_result, request.GET.get('serialnumber'))
+    return _json(payload, status_code)
@@ -4,9 +4,16 @@ from rest_framework.decorators import api_view
 from django.contrib.auth import get_user_model,authenticate
 from rest_framework_simplejwt.tokens import RefreshToken,AccessToken
 from rest_framework_simplejwt.exceptions import TokenError
+from django.conf import settings
+from ..cache import TTLCache
+import time
 
 User=get_user_model()
 
+# validated users keyed by (token jti, user id); see signals.py for invalidation
+AUTH_CACHE_TTL = getattr(settings, 'AUTH_CACHE_TTL', 60)
+auth_cache = TTLCache('auth_users', max_size=getattr(settings, 'AUTH_CACHE_MAX_SIZE', 4096), ttl=AUTH_CACHE_TTL)
+
 @api_view(['POST'])
 def signup_view(request):
     if not request.data:
@@ -161,12 +168,24 @@ def get_user_from_cookie(request):
     try:
         token = AccessToken(access_token)
         user_id = token['user_id']
-        user = User.objects.get(id=user_id)
+
+        cache_key = (token.get('jti', access_token), user_id)
+        user = auth_cache.get(cache_key)
+        if user is None:
+            user = User.objects.get(id=user_id)
+            # never keep a user past the expiry of the token it was validated with
+            ttl = min(AUTH_CACHE_TTL, token['exp'] - time.time())
+            if ttl > 0:
+                auth_cache.set(cache_key, user, ttl)
         return user
     except (TokenError, User.DoesNotExist):
         return None
 
 
+def invalidate_cached_user(user_id):
+    auth_cache.delete_where(lambda key: str(key[1]) == str(user_id))
+
+
 # Generates new access token using refresh token from cookies
 @api_view(['POST'])
 def refresh_token_view(request):
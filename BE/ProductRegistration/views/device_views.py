@@ -1,10 +1,21 @@
-from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from ..models import Serialdata
-from ..serializers import DeviceSerializer,SerialNumberDetails
+from ..serializers import DeviceSerializer
 from django.contrib.auth import get_user_model
+from ..allocation import DEACTIVATED,RESERVE_MAX_BATCH,get_allocation_pool,reserve_serials
+from ..device_cache import device_details_cache,device_details_generation,invalidate_device_details,store_device_details
+from ..bulk import BulkInputError,read_bulk_rows,register_serial_numbers,summarize
+from ..delta import changed_since,etag_matches,list_etag,not_modified,start_watermark,with_etag
+from ..inventory import tracked_procedure
+from ..lifecycle import apply_transition
+from ..pagination import decode_cursor,encode_cursor,parse_limit
+from ..procedures import call_procedure,procedure_response
+from ..renderers import list_data,parse_layout
+from ..sequences import SequenceExhausted,generate_serials,parse_generate_params
 from .auth_views import get_user_from_cookie
 import datetime
 
@@ -18,19 +29,126 @@ def get_serial_numbers(request):
             'error': 'Authentication required'
         }, status=401)
 
+    # delta mode - only the rows changed after the client's watermark
+    if 'since' in request.GET:
+        return get_serial_numbers_changes(request)
+
+    # keyset mode - filtered, sorted and paged in the database
+    if 'limit' in request.GET or 'cursor' in request.GET:
+        return get_serial_numbers_page(request)
+
     try:
-        data=Serialdata.objects.all()
-        serialized_data=SerialNumberDetails(data,many=True).data
-        sorted_serial_data = sorted(serialized_data, key=lambda x: x.get("createdate") or "")
+        layout = parse_layout(request.GET)
+    except ValueError as e:
+        return Response({"message": "Invalid query parameters","error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # conditional request - nothing changed since the client's copy of the whole list
+    try:
+        etag = list_etag(Serialdata.objects, 'modifieddate', request.GET)
+    except Exception as e:
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-        for serial_data in sorted_serial_data:
-            serial_data.pop("createdate")
+    try:
+        # taken before the read, so the next delta covers anything changed during it
+        watermark = start_watermark()
+        rows = Serialdata.objects.order_by('createdate', 'serialnumber').values_list(*SERIAL_LIST_FIELDS)
 
-        return Response({"message": "Serial numbers retrived successfully","data":sorted_serial_data})
+        return with_etag(Response({"message": "Serial numbers retrived successfully",**list_data(SERIAL_LIST_FIELDS, list(rows), layout),"watermark":watermark}), etag)
 
     except Exception as e:
         # Handle unexpected server errors
         return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# columns of the serial listings, read as value tuples
+SERIAL_LIST_FIELDS = ['serialnumber','deviceid','imei','imsi','isapproved','isallocated']
+SERIAL_PAGE_SIZE = 100
+SERIAL_PAGE_MAX_SIZE = 1000
+
+
+def parse_date_param(value, end_of_day=False):
+    date_value = datetime.date.fromisoformat(value)
+    if end_of_day:
+        date_value += datetime.timedelta(days=1)
+    return timezone.make_aware(datetime.datetime.combine(date_value, datetime.time.min))
+
+
+def filter_serial_numbers(params):
+    queryset = Serialdata.objects.all()
+
+    for field in ('isapproved', 'isallocated'):
+        value = params.get(field)
+        if value not in (None, ''):
+            queryset = queryset.filter(**{field: int(value)})
+
+    category = params.get('category')
+    if category:
+        queryset = queryset.filter(category=category)
+
+    from_date = params.get('fromDate')
+    if from_date:
+        queryset = queryset.filter(createdate__gte=parse_date_param(from_date))
+
+    to_date = params.get('toDate')
+    if to_date:
+        queryset = queryset.filter(createdate__lt=parse_date_param(to_date, end_of_day=True))
+
+    return queryset
+
+
+# Serials changed after the since= watermark, whatever their state, oldest change first.
+# Clients replace their copy of each returned row; filters don't apply, so a row that
+# left the client's filter still reaches it.
+def get_serial_numbers_changes(request):
+    try:
+        layout = parse_layout(request.GET)
+        limit = parse_limit(request.GET.get('limit'), SERIAL_PAGE_MAX_SIZE, SERIAL_PAGE_MAX_SIZE)
+        rows, watermark, has_more = changed_since(Serialdata.objects.all(), 'modifieddate', request.GET['since'], limit, SERIAL_LIST_FIELDS)
+
+    except ValueError as e:
+        return Response({"message": "Invalid query parameters","error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except Exception as e:
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({"message": "Serial numbers retrived successfully",**list_data(SERIAL_LIST_FIELDS, rows, layout),"watermark":watermark,"hasMore":has_more})
+
+
+# Paged listing ordered by (createdate, serialnumber). Null createdates sort first,
+# matching both MySQL and SQLite ascending order, so the seek condition handles them explicitly.
+def get_serial_numbers_page(request):
+    try:
+        layout = parse_layout(request.GET)
+        limit = parse_limit(request.GET.get('limit'), SERIAL_PAGE_SIZE, SERIAL_PAGE_MAX_SIZE)
+        queryset = filter_serial_numbers(request.GET)
+
+        token = request.GET.get('cursor')
+        if token:
+            last_date, last_serial = decode_cursor(token, 2)
+            if last_date is None:
+                queryset = queryset.filter(Q(createdate__isnull=True, serialnumber__gt=last_serial) | Q(createdate__isnull=False))
+            else:
+                queryset = queryset.filter(Q(createdate__gt=last_date) | Q(createdate=last_date, serialnumber__gt=last_serial))
+
+    except ValueError as e:
+        return Response({"message": "Invalid query parameters","error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        # each row ends with its createdate, the cursor's sort key
+        rows = list(queryset.order_by('createdate', 'serialnumber').values_list(*SERIAL_LIST_FIELDS, 'createdate')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(rows[-1][-1], rows[-1][0])
+
+        return Response({"message": "Serial numbers retrived successfully",**list_data(SERIAL_LIST_FIELDS, [row[:-1] for row in rows], layout),"nextCursor":next_cursor})
+
+    except Exception as e:
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
 
@@ -44,49 +162,52 @@ def get_unallocated_sl_no(request):
         }, status=401)
     
     try:
-        with connection.cursor() as cursor:
-            cursor.callproc("get_single_unallocated_approved_serial",["","",""])
+        # serials are picked and marked in one locked transaction (directly or by the pool's refill),
+        # so concurrent callers never get the same one
+        pool = get_allocation_pool()
+        if pool is not None:
+            serialnumber = pool.acquire()
+        else:
+            serials = reserve_serials(1)
+            serialnumber = serials[0] if serials else None
 
-            cursor.execute("SELECT @_get_single_unallocated_approved_serial_0")
-            serialnumber=cursor.fetchone()[0]
-
-            cursor.execute("SELECT @_get_single_unallocated_approved_serial_1")
-            msg_status=cursor.fetchone()[0]
+        if not serialnumber:
+            return Response({"status":"not_found","message": "No approved unallocated serial number available"}, status=status.HTTP_404_NOT_FOUND)
 
-            cursor.execute("SELECT @_get_single_unallocated_approved_serial_2")
-            message=cursor.fetchone()[0]
+        return Response({"serialnumber":serialnumber,"message": "Serial number fetched successfully","status": "success"}, status=status.HTTP_200_OK)
 
-            if not serialnumber:        
-                return Response({"status":msg_status,"message": message}, status=status.HTTP_404_NOT_FOUND)
+    # Handle unexpected server errors
+    except Exception as e:
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            isallocated = 1
 
-            # IN parameter
-            cursor.callproc("update_serial_number_allocate", [serialnumber,isallocated, "", ""])
+@api_view(['POST'])
+def reserve_serial_numbers(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
 
-            # OUT parameters (index starts from 0 so after 2(0,1) input outputs reside in 2 and 3)
-            cursor.execute("SELECT @_update_serial_number_allocate_2")
-            out_status = cursor.fetchone()[0]
+    try:
+        count = int(request.data.get('count', 1))
+    except (AttributeError, TypeError, ValueError):
+        return Response({"message": "count must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
 
-            cursor.execute("SELECT @_update_serial_number_allocate_3")
-            out_message = cursor.fetchone()[0]
+    if not 1 <= count <= RESERVE_MAX_BATCH:
+        return Response({"message": f"count must be between 1 and {RESERVE_MAX_BATCH}"}, status=status.HTTP_400_BAD_REQUEST)
 
-            if out_status == 'success':
-                return Response({"serialnumber":serialnumber,"message": out_message,"status": out_status}, status=status.HTTP_200_OK)
+    try:
+        serials = reserve_serials(count)
 
-            # not known serial number
-            elif out_status == 'not_found':
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_404_NOT_FOUND)
+        if not serials:
+            return Response({"status":"not_found","message": "No approved unallocated serial number available"}, status=status.HTTP_404_NOT_FOUND)
 
-            # General error
-            else:  # out_status == 'error'
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"serialnumbers":serials,"count":len(serials),"message": "Serial numbers reserved successfully","status": "success"}, status=status.HTTP_200_OK)
 
-    # Handle unexpected server errors
     except Exception as e:
         return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-
 
 
 @api_view(['POST'])
@@ -111,34 +232,79 @@ def add_serial_number(request):
         sl_no = serializer.validated_data['serialnumber']
         category='UPIPLUS'
         
-        with connection.cursor() as cursor:
-            
-            # IN parameter
-            cursor.callproc("save_serial_number", [sl_no,category, "", ""])
-            
-            # OUT parameters
-            cursor.execute("SELECT @_save_serial_number_2")
-            out_status = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT @_save_serial_number_3")
-            out_message = cursor.fetchone()[0]
-
-        if out_status == 'success':
-            return Response({"message": out_message,"status": out_status}, status=status.HTTP_201_CREATED)
-        
-        elif out_status == 'duplicate':
-            # Duplicate serial number
-            return Response({"message": out_message,"status": out_status}, status=status.HTTP_409_CONFLICT)
-        
-        else:  # out_status == 'error'
-            # General error from stored procedure
-            return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        result = tracked_procedure(sl_no, "save_serial_number", [sl_no,category], {"category": category}, out_params=2)
+
+        return procedure_response(result.status, result.message, success_status=status.HTTP_201_CREATED)
 
     except Exception as e:
         # Handle unexpected server errors
         return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
+@api_view(['POST'])
+def add_serial_numbers_bulk(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        serialnumbers = read_bulk_rows(request, 'serialnumbers')
+    except BulkInputError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        results = register_serial_numbers(serialnumbers)
+        return Response({"message": "Bulk registration processed","summary": summarize(results),"results": results}, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        # Handle unexpected server errors
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def generate_serial_numbers(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        prefix, count, register = parse_generate_params(request.data)
+    except ValueError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        serials, results, shortfall = generate_serials(prefix, count, register=register)
+        if results is None:
+            return Response({"serialnumbers":serials,"count":len(serials),"message": "Serial numbers generated","status": "success"}, status=status.HTTP_200_OK)
+
+        # a serial typed in by hand while the batch was written comes back as a duplicate and
+        # is replaced; the shortfall is what couldn't be
+        skipped = [result['serialnumber'] for result in results if result['status'] == 'duplicate']
+        registered = [result['serialnumber'] for result in results if result['status'] == 'success']
+        unregistered = [result for result in results if result['status'] == 'unregistered']
+        if unregistered:
+            return Response({"serialnumbers":registered,"count":len(registered),"skipped":skipped,
+                             "unregistered":[result['serialnumber'] for result in unregistered],
+                             "message": "Registration failed, the unregistered serial numbers are allocated and can be registered with add_serial_numbers_bulk",
+                             "error": unregistered[0]['message'],"status": "error"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"serialnumbers":registered,"count":len(registered),"skipped":skipped,"shortfall":shortfall,
+                         "message": "Serial numbers generated and registered" if not shortfall else f"Serial numbers generated and registered, {shortfall} fewer than requested",
+                         "status": "success"}, status=status.HTTP_201_CREATED)
+
+    except SequenceExhausted as e:
+        return Response({"status":"conflict","message": str(e)}, status=status.HTTP_409_CONFLICT)
+
+    except Exception as e:
+        # Handle unexpected server errors
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['PATCH'])
 def approve_serial_number(request):
     # Validate user
@@ -157,27 +323,10 @@ def approve_serial_number(request):
             return Response({"message": "Serial number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         isapproved = 1
-        with connection.cursor() as cursor:
-            # IN parameter
-            cursor.callproc("update_serial_number_approval", [serialnumber,isapproved, "", ""])
-
-            # OUT parameters (index starts from 0 so after 2(0,1) input outputs reside in 2 and 3)
-            cursor.execute("SELECT @_update_serial_number_approval_2")
-            out_status = cursor.fetchone()[0]
+        result = tracked_procedure(serialnumber, "update_serial_number_approval", [serialnumber,isapproved], {"isapproved": isapproved}, out_params=2)
+        invalidate_device_details(serialnumber)
 
-            cursor.execute("SELECT @_update_serial_number_approval_3")
-            out_message = cursor.fetchone()[0]
-
-            if out_status == 'success':
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_200_OK)
-        
-            elif out_status == 'not_found':
-                # not known serial number
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_404_NOT_FOUND)
-            
-            else:  # out_status == 'error'
-                # General error from stored procedure
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        return procedure_response(result.status, result.message)
 
 
     except Exception as e:
@@ -203,33 +352,57 @@ def allocate_serial_number(request):
             return Response({"message": "Serial number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         isallocated = 2
-        with connection.cursor() as cursor:
-            # IN parameter
-            cursor.callproc("update_serial_number_allocate", [serialnumber,isallocated, "", ""])
+        result = tracked_procedure(serialnumber, "update_serial_number_allocate", [serialnumber,isallocated], {"isallocated": isallocated}, out_params=2)
+        invalidate_device_details(serialnumber)
 
-            # OUT parameters (index starts from 0 so after 2(0,1) input outputs reside in 2 and 3)
-            cursor.execute("SELECT @_update_serial_number_allocate_2")
-            out_status = cursor.fetchone()[0]
+        return procedure_response(result.status, result.message)
 
-            cursor.execute("SELECT @_update_serial_number_allocate_3")
-            out_message = cursor.fetchone()[0]
 
-            if out_status == 'success':
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_200_OK)
-        
-            elif out_status == 'not_found':
-                # not known serial number
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_404_NOT_FOUND)
-            
-            else:  # out_status == 'error'
-                # General error from stored procedure
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Shared body of the batch lifecycle endpoints: {serialnumbers: [...]} (or a list / CSV)
+def batch_transition(request, transition):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        serialnumbers = read_bulk_rows(request, 'serialnumbers')
+    except BulkInputError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        moved, rejected = apply_transition(transition, serialnumbers)
+        summary = {"moved": len(moved)}
+        for item in rejected:
+            summary[item["status"]] = summary.get(item["status"], 0) + 1
+
+        return Response({"status": "success","message": f"{len(moved)} serial numbers updated","summary": summary,"moved": moved,"rejected": rejected}, status=status.HTTP_200_OK)
+
     except Exception as e:
         return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['PATCH'])
+def approve_serial_numbers(request):
+    return batch_transition(request, 'approve')
+
+
+@api_view(['POST'])
+def allocate_serial_numbers(request):
+    return batch_transition(request, 'allocate')
+
+
+@api_view(['POST'])
+def deactivate_serial_numbers(request):
+    return batch_transition(request, 'deactivate')
+
+
 @api_view(['POST'])
 def add_upi_pro_serial(request):
     # Validate user
@@ -251,31 +424,47 @@ def add_upi_pro_serial(request):
         isapproved = 1
         isallocated = 2
 
-        with connection.cursor() as cursor:
-            cursor.callproc("save_upi_pro_serial_number", [serialnumber,category,isapproved,isallocated, "", ""])
-
-            cursor.execute("SELECT @_save_upi_pro_serial_number_4")
-            out_status = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT @_save_upi_pro_serial_number_5")
-            out_message = cursor.fetchone()[0]
-
-            if out_status == 'success':
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_201_CREATED)
-            
-            elif out_status == 'duplicate':
-                # Duplicate serial number
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_409_CONFLICT)
-            
-            else:  # out_status == 'error'
-                # General error from stored procedure
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        result = tracked_procedure(serialnumber, "save_upi_pro_serial_number", [serialnumber,category,isapproved,isallocated],
+                                   {"category": category, "isapproved": isapproved, "isallocated": isallocated}, out_params=2)
+
+        return procedure_response(result.status, result.message, success_status=status.HTTP_201_CREATED)
     except Exception as e:
         # Handle unexpected server errors
         return Response({"message": "Server error occurred","error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
 
+# date/time printed on device labels
+def device_details_stamp():
+    now = datetime.datetime.now()
+    return {"date":now.strftime("%d %m %Y"),"time":now.strftime("%H:%M:%S")}
+
+
+# Body of get_device_details after authentication, shared with the async variant.
+# Returns (response payload, status code).
+def device_details_result(serialnumber):
+    try:
+        if not serialnumber:
+            return {"message": "Serial number is required"}, status.HTTP_400_BAD_REQUEST
+
+        details = device_details_cache.get(serialnumber)
+        if details is None:
+            generation = device_details_generation()
+            details = call_procedure("get_device_details_by_serial",[serialnumber], fetch_rows=True).first_row_dict()
+            if not details:
+                return {'status':"error",'statusCode':404,"message": "Device Details Fetch Unsuccessful!","data":{}}, status.HTTP_200_OK
+            store_device_details(serialnumber, details, generation)
+
+        # copy so the date/time stamp never ends up in the cached row
+        result = dict(details)
+        result.update(device_details_stamp())
+
+        return {'status':"success",'statusCode':200,"message": "Device Details Fetch Succesfully!","data":result}, status.HTTP_200_OK
+
+    except Exception as e:
+        return {'status': 'error','message': 'Server error occurred','error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
 @api_view(['GET'])
 def get_device_details(request):
     # Validate user
@@ -284,35 +473,61 @@ def get_device_details(request):
         return Response({
             'error': 'Authentication required'
         }, status=401)
+
+    payload, status_code = device_details_result(request.GET.get('serialnumber'))
+    return Response(payload, status=status_code)
     
-    try:
-        serialnumber=request.GET.get('serialnumber')
-        if not serialnumber:
-            return Response({"message": "Serial number is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        with connection.cursor() as cursor:
-            cursor.callproc("get_device_details_by_serial",[serialnumber,])
 
-            response=cursor.fetchone()
-            if not response:
-                return Response({'status':"error",'statusCode':404,"message": "Device Details Fetch Unsuccessful!","data":{}})
+DEVICE_DETAILS_MAX_BATCH = 5000
+
 
-            fieldnames=[field[0]for field in cursor.description]
+# Details of many devices keyed by serial: cached ones from the device details cache, the
+# rest from get_device_details_by_serial, one call per device, so every row has the
+# procedure's shape. The fetched rows are not cached, a batch would evict the single
+# lookups' entries. One date/time stamp for the whole batch.
+@api_view(['POST'])
+def get_device_details_batch(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
 
-            result=dict(zip(fieldnames, response))
-            now = datetime.datetime.now()
+    try:
+        serials = read_bulk_rows(request, 'serialnumbers')
+    except BulkInputError as e:
+        return Response({"message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            current_date=datetime.datetime.strftime(now.date(),"%d %m %Y")
-            current_time_obj=now.time()
-            current_time=current_time_obj.strftime("%H:%M:%S")
-            
-            result.update({"date":current_date,"time":current_time})
+    serials = [value.get('serialnumber') if isinstance(value, dict) else value for value in serials]
+    serials = list(dict.fromkeys(str(value).strip() for value in serials if value is not None and str(value).strip()))
+    if len(serials) > DEVICE_DETAILS_MAX_BATCH:
+        return Response({"message": f"Too many serial numbers, at most {DEVICE_DETAILS_MAX_BATCH} per request"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({'status':"success",'statusCode':200,"message": "Device Details Fetch Succesfully!","data":result})
+    try:
+        found = {}
+        missing = []
+        for serialnumber in serials:
+            details = device_details_cache.get(serialnumber)
+            if details is None:
+                missing.append(serialnumber)
+            else:
+                found[serialnumber] = details
+
+        for serialnumber in missing:
+            details = call_procedure("get_device_details_by_serial",[serialnumber], fetch_rows=True).first_row_dict()
+            if details:
+                found[serialnumber] = details
+
+        # request order; the rows are sent as they are, the stamp goes alongside
+        data = {serialnumber: found[serialnumber] for serialnumber in serials if serialnumber in found}
+        not_found = [serialnumber for serialnumber in serials if serialnumber not in found]
+
+        return Response({'status':"success",'statusCode':200,"message": "Device Details Fetch Succesfully!",**device_details_stamp(),"data":data,"notFound":not_found}, status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
 
 
 @api_view(["POST"])
@@ -332,28 +547,10 @@ def deactivate_serial_number(request):
         if not serialnumber:
             return Response({"message": "Serial number is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        with connection.cursor() as cursor:
-            cursor.callproc('deactivate_serial_number',[serialnumber,"",""])
-
-            cursor.execute("SELECT @_deactivate_serial_number_1")
-            out_status=cursor.fetchone()[0]
-
-            cursor.execute("SELECT @_deactivate_serial_number_2")
-            out_message=cursor.fetchone()[0]
-
-            if out_status == "success":
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_200_OK)
-            
-            elif out_status == "denied":
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_403_FORBIDDEN)
-    
-            elif out_status == "not_found":
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_404_NOT_FOUND)
-
-            else:  # out_status == 'error'
-                # General error from stored procedure
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        result = tracked_procedure(serialnumber, 'deactivate_serial_number',[serialnumber], {'isallocated': DEACTIVATED}, out_params=2)
+        invalidate_device_details(serialnumber)
 
+        return procedure_response(result.status, result.message)
     
     except Exception as e:
         return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
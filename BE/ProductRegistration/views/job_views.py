@@ -0,0 +1,148 @@
+from django.http import FileResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view
+from ..bulk import BulkInputError,read_bulk_rows
+from ..jobs import JOB_KINDS,SUCCEEDED,result_path,start_job_runner,submit_job
+from ..mapping_query import parse_mapping_query
+from ..models import Job
+from ..sequences import parse_generate_params
+from .auth_views import get_user_from_cookie
+from .mapping_views import EXPORT_FORMATS
+import os
+
+
+JOB_LIST_SIZE = 50
+
+
+def generate_params(request):
+    prefix, count, register = parse_generate_params(request.data)
+    return {'prefix': prefix, 'count': count, 'register': register}
+
+
+# get_customer_mappings filters plus fileFormat, as a JSON body
+def export_params(request):
+    params = {name: str(value) for name, value in request.data.items()}
+    if params.get('fileFormat', 'csv') not in EXPORT_FORMATS:
+        raise ValueError(f'fileFormat must be one of {list(EXPORT_FORMATS)}')
+    parse_mapping_query(params)
+    return params
+
+
+# kind -> reads the job's params from the submit request, which takes the same input as
+# the kind's synchronous endpoint; raises BulkInputError/ValueError for a bad request
+JOB_INPUTS = {
+    'register_serial_numbers': lambda request: {'serialnumbers': read_bulk_rows(request, 'serialnumbers')},
+    'import_customer_mappings': lambda request: {'mappings': read_bulk_rows(request, 'mappings')},
+    'generate_serial_numbers': generate_params,
+    'export_customer_mappings': export_params,
+    'rebuild_inventory': lambda request: {},
+}
+
+
+def job_data(job):
+    return {
+        'id': str(job.pk),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'result': job.result,
+        'error': job.error or None,
+        'createdBy': job.created_by,
+        'createdAt': job.created_at,
+        'startedAt': job.started_at,
+        'finishedAt': job.finished_at,
+        'resultUrl': reverse('job_result', args=[job.pk]) if job.result_file else None,
+    }
+
+
+@api_view(['POST'])
+def submit_job_view(request, kind):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    if kind not in JOB_KINDS:
+        return Response({'status': 'error','message': f'Unknown job kind, expected one of {list(JOB_KINDS)}'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        params = JOB_INPUTS[kind](request)
+    except (BulkInputError, ValueError) as e:
+        return Response({'status': 'error','message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        job = submit_job(kind, params, created_by=user.username)
+        return Response({'status': 'success','message': 'Job queued','job': job_data(job)}, status=status.HTTP_202_ACCEPTED)
+
+    except Exception as e:
+        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# The caller's latest jobs, newest first
+@api_view(['GET'])
+def list_jobs(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        start_job_runner()
+        jobs = Job.objects.filter(created_by=user.username).defer('params').order_by('-created_at')[:JOB_LIST_SIZE]
+        return Response({'status': 'success','data': [job_data(job) for job in jobs]})
+
+    except Exception as e:
+        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def job_status(request, job_id):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        # the job may have been queued before this worker (re)started
+        start_job_runner()
+        # other users' jobs are reported as not found, as in list_jobs
+        job = Job.objects.defer('params').filter(pk=job_id, created_by=user.username).first()
+        if job is None:
+            return Response({'status': 'not_found','message': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'status': 'success','job': job_data(job)})
+
+    except Exception as e:
+        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def job_result(request, job_id):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    job = Job.objects.defer('params').filter(pk=job_id, created_by=user.username).first()
+    if job is None:
+        return Response({'status': 'not_found','message': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    if job.status != SUCCEEDED or not job.result_file:
+        return Response({'status': 'conflict','message': f'Job is {job.status}, no result file to download'}, status=status.HTTP_409_CONFLICT)
+
+    try:
+        result = open(result_path(job.result_file), 'rb')
+    except FileNotFoundError:
+        return Response({'status': 'not_found','message': 'Result file is no longer available'}, status=status.HTTP_404_NOT_FOUND)
+
+    extension = os.path.splitext(job.result_file)[1]
+    return FileResponse(result, as_attachment=True, filename=f'{job.kind}{extension}', content_type=job.result_content_type)
@@ -1,8 +1,125 @@
-from django.db import connection
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
+from ..bulk import BulkInputError,import_customer_mappings,read_bulk_rows,summarize
+from ..delta import changed_since,etag_matches,list_etag,not_modified,start_watermark,with_etag
+from ..device_cache import invalidate_device_details
+from ..inventory import device_state,record_change,tracked_procedure
+from ..mapping_cache import MAPPING_CACHE_TTL,get_mapping_count,get_mapping_page,invalidate_mappings
+from ..mapping_query import MAPPING_FIELDS,MAPPING_KEYS,mapping_cursor,orm_mapping_count,orm_mapping_page,orm_mapping_seek_page,parse_mapping_query,procedure_args,stream_mapping_rows
+from ..models import Palmteccustomerdetails
+from ..pagination import InvalidCursor,parse_limit
+from ..procedures import call_procedure,procedure_response
+from ..renderers import list_data,parse_layout
+from ..search_index import index_mapping,search_candidates
 from .auth_views import get_user_from_cookie
+import csv
+import json
+
+
+def fetch_mapping_page(query):
+    if settings.MAPPING_LISTING_ENGINE == 'orm':
+        # resolve searchText through the trigram index when it narrows things down,
+        # so only the candidate rows are read instead of scanning every mapping
+        candidates = search_candidates(query.search_text) if query.search_text else None
+        return orm_mapping_page(query, serials=candidates)
+
+    # last parameter is OUT total count
+    result = call_procedure('get_serial_customer_details', procedure_args(query), out_params=1, fetch_rows=True)
+    total_count = result.outputs[0]
+
+    # rows come back in MAPPING_FIELDS order
+    return [tuple(row) for row in result.rows], total_count
+
+
+# Page continuing from a cursor token. The procedure only pages by offset, so
+# cursor pages always go through the ORM seek on the sort column's index.
+def fetch_mapping_seek_page(query, token):
+    serials = search_candidates(query.search_text) if query.search_text else None
+    data, next_cursor, prev_cursor = orm_mapping_seek_page(query, token, serials=serials)
+    total_count = get_mapping_count(query, lambda query: orm_mapping_count(query, serials=serials))
+    return data, total_count, next_cursor, prev_cursor
+
+
+MAPPING_CHANGES_MAX_SIZE = 1000
+
+
+# Mappings changed after the since= watermark, deleted ones included (isDeleted), oldest
+# change first. Filters, sorting and paging don't apply: clients update the rows they
+# hold and refetch their page when a change affects it.
+def customer_mapping_changes(params):
+    try:
+        layout = parse_layout(params)
+        limit = parse_limit(params.get('limit'), MAPPING_CHANGES_MAX_SIZE, MAPPING_CHANGES_MAX_SIZE)
+        rows, watermark, has_more = changed_since(Palmteccustomerdetails.objects.all(), 'modifiedon', params['since'], limit,
+                                                  MAPPING_FIELDS + ['isdeleted'])
+    except ValueError as e:
+        return {'status': 'error','message': str(e)}, status.HTTP_400_BAD_REQUEST
+
+    return {'status': 'success',**list_data(MAPPING_KEYS + ['isDeleted'], rows, layout),'watermark': watermark,'hasMore': has_more}, status.HTTP_200_OK
+
+
+# Body of get_customer_mappings after authentication, shared with the async variant.
+# Returns (response payload, status code).
+def customer_mappings_result(params):
+    if params.get('since'):
+        try:
+            return customer_mapping_changes(params)
+        except Exception as e:
+            return {'status': 'error','message': 'Server error occurred','error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    try:
+        query = parse_mapping_query(params)
+        layout = parse_layout(params)
+    except ValueError as e:
+        return {'status': 'error','message': str(e)}, status.HTTP_400_BAD_REQUEST
+
+    try:
+        # pages may come from the cache, so the watermark also goes back its TTL
+        watermark = start_watermark(MAPPING_CACHE_TTL)
+        token = params.get('cursor')
+        if token:
+            data, total_count, next_cursor, prev_cursor = fetch_mapping_seek_page(query, token)
+        else:
+            data, total_count = get_mapping_page(query, fetch_mapping_page)
+            next_cursor = prev_cursor = None
+            # cursors let the client step from an offset page to its neighbours by seek. Only
+            # when the ORM engine serves the offset pages too: the procedure breaks ties in its
+            # own order, so a seek from one of its pages could skip or repeat rows
+            if data and settings.MAPPING_LISTING_ENGINE == 'orm':
+                next_cursor = mapping_cursor(query, data[-1]) if query.page_number + len(data) < total_count else None
+                prev_cursor = mapping_cursor(query, data[0], before=True) if query.page_number > 0 else None
+
+        return {'status': 'success',**list_data(MAPPING_KEYS, data, layout),'totalCount': total_count,'nextCursor': next_cursor,'prevCursor': prev_cursor,'watermark': watermark}, status.HTTP_200_OK
+
+    except InvalidCursor as e:
+        return {'status': 'error','message': str(e)}, status.HTTP_400_BAD_REQUEST
+        
+    except Exception as e:
+        return {'status': 'error','message': 'Server error occurred','error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+# customer_mappings_result behind an ETag check, for the offset pages only (delta and
+# cursor requests skip it). Cached pages may be up to MAPPING_CACHE_TTL old, so the ETag
+# waits that much longer for the latest change to settle.
+# Returns (payload, status code, etag), payload None for a 304.
+def conditional_customer_mappings(request):
+    if request.GET.get('since') or request.GET.get('cursor'):
+        payload, status_code = customer_mappings_result(request.GET)
+        return payload, status_code, None
+
+    try:
+        etag = list_etag(Palmteccustomerdetails.objects, 'modifiedon', request.GET, extra_seconds=MAPPING_CACHE_TTL)
+    except Exception as e:
+        return {'status': 'error','message': 'Server error occurred','error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR, None
+    if etag_matches(request, etag):
+        return None, status.HTTP_304_NOT_MODIFIED, etag
+
+    payload, status_code = customer_mappings_result(request.GET)
+    return payload, status_code, etag
 
 
 @api_view(['GET'])
@@ -13,70 +130,77 @@ def get_customer_mappings(request):
         return Response({
             'error': 'Authentication required'
         }, status=401)
-    
+
+    payload, status_code, etag = conditional_customer_mappings(request)
+    if payload is None:
+        return not_modified(etag)
+    return with_etag(Response(payload, status=status_code), etag)
+
+
+EXPORT_BATCH_ROWS = 500
+
+
+class Echo:
+    # file-like object for csv.writer that hands each written line straight back
+    def write(self, value):
+        return value
+
+
+def csv_export_chunks(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(MAPPING_KEYS)
+
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) == EXPORT_BATCH_ROWS:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def ndjson_export_chunks(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(MAPPING_KEYS, row)), cls=DjangoJSONEncoder) + '\n')
+        if len(lines) == EXPORT_BATCH_ROWS:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_export_chunks, 'text/csv', 'csv'),
+    'ndjson': (ndjson_export_chunks, 'application/x-ndjson', 'ndjson'),
+}
+
+
+# Streams every mapping matching the get_customer_mappings filters (paging parameters are ignored)
+@api_view(['GET'])
+def export_customer_mappings(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    # "format" is reserved by DRF for renderer selection
+    file_format = request.GET.get('fileFormat', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        return Response({'status': 'error','message': f'fileFormat must be one of {list(EXPORT_FORMATS)}'}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        # Get all parameters from request
-        serial_number = request.GET.get('serialNumber', None)
-        customer_code = request.GET.get('customerCode', 0)
-        customer_name = request.GET.get('customerName', '')
-        company = request.GET.get('company', '')  
-        device_type = request.GET.get('deviceType', '')  
-        from_date = request.GET.get('fromDate', '2020-01-01')
-        to_date = request.GET.get('toDate', '2099-12-31')
-        approved_status = request.GET.get('approvedStatus', -1)
-        search_text = request.GET.get('searchText', '')
-        page_number = request.GET.get('pageNumber', 0)
-        page_size = request.GET.get('pageSize', 10)
-        sort_index = request.GET.get('sortingOrderIndex', 1)  
-        sort_direction = request.GET.get('sortingOrderDirection', 0)  
-        
-        args = [
-            serial_number,
-            customer_code,
-            customer_name,
-            company,          
-            device_type,      
-            from_date,
-            to_date,
-            approved_status,
-            search_text,
-            page_number,
-            page_size,
-            sort_index,
-            sort_direction,
-            0
-        ]
-        
+        query = parse_mapping_query(request.GET)
+    except ValueError as e:
+        return Response({'status': 'error','message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        with connection.cursor() as cursor:
-            cursor.callproc('get_serial_customer_details', args)
-            results = cursor.fetchall()
-            
-            # Get total count
-            cursor.execute("SELECT @_get_serial_customer_details_13")
-            total_count = cursor.fetchone()[0]
-        
-        # Format response
-        data = []
-        for row in results:
-            data.append({
-                'upiDeviceSerialNumber': row[0],
-                'uniqueIdentifier': row[1],
-                'customerCode': row[2],
-                'customerName': row[3],
-                'company': row[4],
-                'devicetype': row[5],
-                'isApproved': row[6],
-                'createdOn': row[7],
-                'modifiedOn': row[8],
-                'cLicenseURL': row[9],
-                'versionDetails': row[10]
-            })
-        
-        return Response({'status': 'success','data': data,'totalCount': total_count})
-        
-    except Exception as e:
-        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    chunks, content_type, extension = EXPORT_FORMATS[file_format]
+    response = StreamingHttpResponse(chunks(stream_mapping_rows(query)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="customer_mappings.{extension}"'
+    return response
 
 
 @api_view(['POST'])
@@ -107,31 +231,48 @@ def create_customer_mapping(request):
         if missing_data:
             return Response({'status':'error','message':f'Missing values in input,{missing_data}'},status=status.HTTP_400_BAD_REQUEST)
 
-        form_data.extend(["", ""])
-        with connection.cursor() as cursor:
-            cursor.callproc("save_serial_customer_details",form_data)
+        serialnumber=form_data[0]
+        before = device_state(serialnumber)
+        result = call_procedure("save_serial_customer_details",form_data, out_params=2)
+        if result.status == 'success':
+            # update serial number allocation status too
+            isallocated = 2
+            allocated = call_procedure("update_serial_number_allocate", [serialnumber,isallocated], out_params=2)
+            # counted from the procedures' outcome, as tracked_procedure does
+            if before is not None:
+                changes = {'company': form_data[4]}
+                if allocated.status == 'success':
+                    changes['isallocated'] = isallocated
+                record_change(serialnumber, before, before._replace(**changes))
+        invalidate_device_details(serialnumber)
 
-            cursor.execute("SELECT @_save_serial_customer_details_8")
-            out_status = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT @_save_serial_customer_details_9")
-            out_message = cursor.fetchone()[0]
-        
-            if out_status == 'success':
-                # update serial number allocation status too
-                isallocated = 2
-                serialnumber=form_data[0]
-                cursor.callproc("update_serial_number_allocate", [serialnumber,isallocated, "", ""])
-
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_201_CREATED)
-            
-            elif out_status == 'duplicate':
-                # Duplicate serial number
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_409_CONFLICT)
-
-            # out_status == 'error'
-            else:
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        if result.status == 'success':
+            invalidate_mappings()
+            index_mapping(serialnumber, form_data[2], form_data[3], form_data[4])
+
+        return procedure_response(result.status, result.message, success_status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def import_customer_mappings_bulk(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    try:
+        rows = read_bulk_rows(request, 'mappings')
+    except BulkInputError as e:
+        return Response({'status': 'error','message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        results = import_customer_mappings(rows)
+        return Response({'status': 'success','message': 'Bulk import processed','summary': summarize(results),'results': results}, status=status.HTTP_200_OK)
 
     except Exception as e:
         return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -165,26 +306,13 @@ def update_customer_mapping(request):
         if missing_data:
             return Response({'status':'error','message':f'Missing values in input,{missing_data}'},status=status.HTTP_400_BAD_REQUEST)
 
-        form_data.extend(["", ""])
-        with connection.cursor() as cursor:
-            cursor.callproc("update_customer_by_serial",form_data)
-
-            cursor.execute("SELECT @_update_customer_by_serial_8")
-            out_status = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT @_update_customer_by_serial_9")
-            out_message = cursor.fetchone()[0]
+        result = tracked_procedure(form_data[0], "update_customer_by_serial",form_data, {"company": form_data[4]}, out_params=2)
+        invalidate_device_details(form_data[0])
+        if result.status == 'success':
+            invalidate_mappings()
+            index_mapping(form_data[0], form_data[1], form_data[3], form_data[4])
 
-            if out_status == 'success':
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_200_OK)
-            
-            elif out_status == 'not_found':
-                # serial number not found
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_404_NOT_FOUND)
-
-            # out_status == 'error'
-            else:
-                return Response({"message": out_message,"status": out_status}, status=status.HTTP_400_BAD_REQUEST)
+        return procedure_response(result.status, result.message)
 
     except Exception as e:
         return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
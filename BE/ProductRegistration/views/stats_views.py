@@ -0,0 +1,85 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view,authentication_classes
+from ..allocation import allocation_pool_stats
+from ..async_db import async_db_stats
+from ..cache import cache_stats
+from ..connection_pool import connection_pool_stats
+from ..inventory import DIMENSIONS,inventory_counts
+from ..jobs import job_runner_stats
+from ..metrics import render_metrics
+from ..procedures import procedure_stats
+from ..search_index import mapping_search_index
+from .auth_views import get_user_from_cookie
+
+
+# In-process counters of this worker, for checking caches and pools are doing their job
+@api_view(['GET'])
+def runtime_stats(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    return Response({
+        'caches': cache_stats(),
+        'procedures': procedure_stats(),
+        'allocationPool': allocation_pool_stats(),
+        'jobRunner': job_runner_stats(),
+        'searchIndex': mapping_search_index.stats(),
+        'asyncDbPool': async_db_stats(),
+        'dbConnectionPool': connection_pool_stats(),
+    })
+
+
+def has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+
+
+# Prometheus scrape target with the counters of this worker, see ProductRegistration/metrics.py
+# the scraper's bearer token is not a JWT, keep JWTAuthentication from rejecting it
+@api_view(['GET'])
+@authentication_classes([])
+def metrics(request):
+    # Validate user (or the scraper's METRICS_TOKEN)
+    if not has_metrics_token(request):
+        user=get_user_from_cookie(request)
+        if not user:
+            return Response({
+                'error': 'Authentication required'
+            }, status=401)
+
+    body = render_metrics(procedure_stats(), connection_pool_stats())
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Device counts by category, month, deviceType and company from the inventory rollups,
+# optionally only some of them: ?groupBy=month,company
+@api_view(['GET'])
+def inventory_stats(request):
+    # Validate user
+    user=get_user_from_cookie(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=401)
+
+    dimensions = [name.strip() for name in request.GET.get('groupBy', '').split(',') if name.strip()] or list(DIMENSIONS)
+    unknown = [name for name in dimensions if name not in DIMENSIONS]
+    if unknown:
+        return Response({'status': 'error','message': f'groupBy must be among {list(DIMENSIONS)}, got {unknown}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        totals, groups = inventory_counts(dimensions)
+        return Response({'status': 'success','data': {'totals': totals,'groups': groups}})
+
+    except Exception as e:
+        return Response({'status': 'error','message': 'Server error occurred','error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
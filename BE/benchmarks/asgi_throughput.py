@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import setup, summary
+from .data import seed_mappings
+
+
+# Throughput of one worker serving get_customer_mappings under concurrent requests:
+#
+#   wsgi sync        one request at a time (gunicorn sync worker)
+#   wsgi gthread     --wsgi-threads requests at a time (gunicorn gthread worker)
+#   asgi, sync view  the DRF view under ASGI, which Django runs on its single sync thread
+#   asgi, async view views/async_views.py with the database work on the ASYNC_DB_THREADS pool
+#
+# SQLite answers in microseconds where MySQL takes a network round trip, so every query
+# is delayed by --db-latency-ms to make the waiting on the database visible. SQLite's own
+# query work runs on the benchmark's cores, so keep the table small (--rows). Views are
+# called directly (no middleware); page caches are cleared between scenarios.
+#
+#   python -m benchmarks.asgi_throughput --requests 400 --concurrency 50 --db-latency-ms 5
+
+
+def install_latency(seconds):
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    # the wrapper object of a thread outlives its reconnects, add the delay once
+    def add_delay(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(add_delay, weak=False)
+    for connection in connections.all():
+        add_delay(None, connection)
+
+
+def make_requests(count):
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user, _ = get_user_model().objects.get_or_create(username='benchmark', defaults={'is_verified': True})
+    token = str(AccessToken.for_user(user))
+
+    factory = RequestFactory()
+    requests = []
+    for i in range(count):
+        request = factory.get('/sil/get_customer_mappings/', {'pageNumber': (i % 1000) * 10, 'pageSize': 10})
+        request.COOKIES['access_token'] = token
+        requests.append(request)
+    return requests
+
+
+def timed(view, request):
+    start = time.perf_counter()
+    response = view(request)
+    assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+async def timed_async(view, request, limit):
+    async with limit:
+        start = time.perf_counter()
+        response = await view(request)
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+
+
+def report(name, latencies, elapsed):
+    print(f'{name:<18} {len(latencies) / elapsed:8.1f} req/s   ' + summary('', latencies).strip())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--wsgi-threads', type=int, default=4)
+    parser.add_argument('--db-latency-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    setup()
+    seed_mappings(args.rows)
+
+    from asgiref.sync import sync_to_async
+    from django.conf import settings
+    from ProductRegistration.mapping_cache import invalidate_mappings
+    from ProductRegistration.views import async_views, mapping_views
+
+    settings.MAPPING_LISTING_ENGINE = 'orm'
+    install_latency(args.db_latency_ms / 1000)
+    requests = make_requests(args.requests)
+    view = mapping_views.get_customer_mappings
+
+    print(f'{args.requests} requests, concurrency {args.concurrency}, {args.db_latency_ms} ms per query, '
+          f'ASYNC_DB_THREADS={settings.ASYNC_DB_THREADS}\n')
+
+    invalidate_mappings()
+    start = time.perf_counter()
+    latencies = [timed(view, request) for request in requests]
+    report('wsgi sync', latencies, time.perf_counter() - start)
+
+    invalidate_mappings()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.wsgi_threads) as executor:
+        latencies = list(executor.map(lambda request: timed(view, request), requests))
+    report(f'wsgi gthread x{args.wsgi_threads}', latencies, time.perf_counter() - start)
+
+    async def run_async(async_view):
+        limit = asyncio.Semaphore(args.concurrency)
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed_async(async_view, request, limit) for request in requests))
+        return latencies, time.perf_counter() - start
+
+    invalidate_mappings()
+    # what ASGIHandler does with a sync view
+    report('asgi, sync view', *asyncio.run(run_async(sync_to_async(view, thread_sensitive=True))))
+
+    invalidate_mappings()
+    report('asgi, async view', *asyncio.run(run_async(async_views.get_customer_mappings)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import os
+import statistics
+import time
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+    from django.apps import apps
+    from django.core.management import call_command
+    from django.db import connection
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    # the device tables are unmanaged (they live in MySQL), create them for SQLite
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as schema_editor:
+        for model in apps.get_app_config('ProductRegistration').get_models():
+            if not model._meta.managed and model._meta.db_table not in existing:
+                schema_editor.create_model(model)
+
+
+def measure(func, repeat=20, warmup=2):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summary(name, timings):
+    return (f'{name:<40} p50 {percentile(timings, 0.5) * 1000:9.3f} ms   '
+            f'p99 {percentile(timings, 0.99) * 1000:9.3f} ms   mean {statistics.mean(timings) * 1000:9.3f} ms')
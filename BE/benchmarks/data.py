@@ -0,0 +1,145 @@
+import argparse
+import datetime
+import random
+import string
+import time
+
+from .common import setup
+
+
+# Synthetic device data: `serials` pattern-valid Serialdata rows (YYYYMM{AMP|API}XXXXXXB)
+# of which the first `mappings` are allocated and mapped to a customer in
+# Palmteccustomerdetails. Row i is always generated the same way, so a database is grown
+# by appending and reruns insert nothing twice. Rows are written with plain executemany in
+# batches, which works on the benchmark SQLite file as well as on a MySQL staging copy.
+#
+#   python -m benchmarks.data --serials 2000000 --mappings 1000000
+#
+# Unmapped serials cycle through the lifecycle states: 30% unapproved, 50% approved and
+# unallocated, 10% fetched, 10% deactivated.
+
+COMPANIES = ['Palmtec', 'Acme Retail', 'Northwind', 'Globex', 'Initech', 'Umbrella Stores']
+DEVICE_TYPES = ('API', 'AMP')
+# serial prefixes 2020-01 .. 2026-12
+MONTHS = 84
+CUSTOMERS = 50000
+BATCH_SIZE = 10000
+# timestamps that would lie in the future (the later serial months) are capped here
+GENERATED_AT = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+# (isapproved, isallocated) of unmapped serials by i % 10
+STATES = [(0, 0)] * 3 + [(1, 0)] * 5 + [(1, 1), (1, 3)]
+
+
+def serial_number(i):
+    sequence = i // 2
+    month = sequence % MONTHS
+    return f'{2020 + month // 12}{month % 12 + 1:02d}{DEVICE_TYPES[i % 2]}{sequence // MONTHS:06d}B'
+
+
+def created_at(i):
+    sequence = i // 2
+    month = sequence % MONTHS
+    start = datetime.datetime(2020 + month // 12, month % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+    return min(start + datetime.timedelta(seconds=2 * (sequence // MONTHS) + i % 2), GENERATED_AT)
+
+
+def customer_names():
+    rng = random.Random(42)
+    return [''.join(rng.choices(string.ascii_uppercase, k=8)) + ' Traders' for _ in range(CUSTOMERS)]
+
+
+def serial_row(i, mappings):
+    isapproved, isallocated = (1, 2) if i < mappings else STATES[i % 10]
+    created = created_at(i)
+    return (serial_number(i), isapproved, isallocated, created, created, 'UPIPLUS', None, None, None)
+
+
+def mapping_row(i, names):
+    code = i % CUSTOMERS
+    created = min(created_at(i) + datetime.timedelta(days=1), GENERATED_AT)
+    serial = serial_number(i)
+    return (serial, f'UID{i:09d}', 100000 + code, names[code], int(i % 3 != 0), 0,
+            created, min(created + datetime.timedelta(minutes=i % 1000), GENERATED_AT),
+            f'https://licenses.example.com/{serial}', f'v1.{i % 10}', DEVICE_TYPES[i % 2], COMPANIES[code % len(COMPANIES)])
+
+
+SERIAL_FIELDS = ['serialnumber', 'isapproved', 'isallocated', 'createdate', 'modifieddate', 'category', 'deviceid', 'imei', 'imsi']
+MAPPING_FIELDS = ['upideviceserialnumber', 'uniqueidentifier', 'customercode', 'customername', 'isapproved', 'isdeleted',
+                  'createdon', 'modifiedon', 'clicenseurl', 'versiondetails', 'devicetype', 'company']
+
+
+def _insert(model, fields, rows):
+    from django.db import connection, transaction
+    from django.db.models.constants import OnConflict
+
+    meta = model._meta
+    columns = [meta.get_field(name) for name in fields]
+    adapt = [
+        connection.ops.adapt_datetimefield_value if column.get_internal_type() == 'DateTimeField' else None
+        for column in columns
+    ]
+    sql = '{} {} ({}) VALUES ({})'.format(
+        connection.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+        connection.ops.quote_name(meta.db_table),
+        ', '.join(connection.ops.quote_name(column.column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    rows = [tuple(value if convert is None else convert(value) for convert, value in zip(adapt, row)) for row in rows]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _fill(model, fields, start, stop, make_row, label):
+    if start >= stop:
+        return
+    began = time.perf_counter()
+    for first in range(start, stop, BATCH_SIZE):
+        last = min(first + BATCH_SIZE, stop)
+        _insert(model, fields, [make_row(i) for i in range(first, last)])
+    elapsed = time.perf_counter() - began
+    print(f'{label}: {stop - start} rows in {elapsed:.1f}s ({(stop - start) / elapsed:,.0f} rows/s)')
+
+
+# Number of generated rows already in the table. They are always rows 0..n-1, while the
+# table may also hold rows the load scenarios added, so search rather than count.
+def generated_rows(model, limit):
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high) // 2
+        if model.objects.filter(pk=serial_number(middle)).exists():
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+# Grows the benchmark database to at least `serials` devices and `mappings` mappings
+def seed(serials, mappings=0):
+    from ProductRegistration.models import Palmteccustomerdetails, Serialdata
+
+    serials = max(serials, mappings)
+    _fill(Serialdata, SERIAL_FIELDS, generated_rows(Serialdata, serials), serials,
+          lambda i: serial_row(i, mappings), 'serialdata')
+    if mappings:
+        names = customer_names()
+        _fill(Palmteccustomerdetails, MAPPING_FIELDS, generated_rows(Palmteccustomerdetails, mappings), mappings,
+              lambda i: mapping_row(i, names), 'palmteccustomerdetails')
+
+
+def seed_mappings(rows):
+    seed(rows, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--serials', type=int, default=2000000)
+    parser.add_argument('--mappings', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup()
+    seed(args.serials, args.mappings)
+
+
+if __name__ == '__main__':
+    main()
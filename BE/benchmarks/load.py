@@ -0,0 +1,211 @@
+import argparse
+import json
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import percentile, setup
+from .data import COMPANIES, seed, serial_number
+
+
+# Scripted load on every sil/ endpoint through the full Django stack (middleware, DRF,
+# authentication), with the stored procedures answered by benchmarks.procedures.ORMBackend
+# on the seeded SQLite database. Each scenario sends --requests requests from
+# --concurrency client threads and reports throughput and p50/p99 latency.
+#
+#   python -m benchmarks.load --serials 2000000 --mappings 1000000 --json results.json
+#   python -m benchmarks.load --compare results.json
+#
+# Save a run of each release with --json and pass the previous one to --compare to see
+# the change per scenario. Write scenarios use up seeded rows (approvals, allocations, new
+# serials), so compare runs against databases seeded and used the same way; absolute
+# numbers are only comparable on the same machine. Non-2xx responses count as errors.
+#
+# Write scenarios run with --write-concurrency (default 1): SQLite has a single writer, and
+# a transaction that reads before it writes fails with "database is locked" instead of
+# waiting when another one holds the lock.
+
+# name, HTTP method, path, a function building the i-th request's parameters, the number
+# of requests when not --requests, and whether it writes (default: any method but GET)
+Scenario = namedtuple('Scenario', ['name', 'method', 'path', 'params', 'requests', 'writes'], defaults=[None, None])
+
+BATCH_SIZE = 50
+DETAILS_BATCH_SIZE = 500
+
+
+def pick(queryset, count):
+    return list(queryset.values_list('pk', flat=True)[:count])
+
+
+def make_scenarios(args):
+    from ProductRegistration.models import Serialdata
+
+    n = args.requests
+    stride = max(1, args.serials // n)
+    existing = [serial_number(i * stride % args.serials) for i in range(n)]
+    mapped = [serial_number(i * max(1, args.mappings // n) % max(1, args.mappings)) for i in range(n)]
+
+    # rows the write scenarios move on, each scenario gets its own
+    batches = max(1, n // 10)
+    unapproved = pick(Serialdata.objects.filter(isapproved=0, isallocated=0).order_by('-pk'), n + batches * BATCH_SIZE)
+    free = pick(Serialdata.objects.filter(isapproved=1, isallocated=0).order_by('-pk'), n * 3)
+    # new serials are 201901AMP<sequence>B, a prefix the generator never uses
+    last = Serialdata.objects.filter(pk__startswith='201901AMP').order_by('-pk').values_list('pk', flat=True).first()
+    added = int(last[9:15]) + 1 if last else 0
+    new_serials = [f'201901AMP{k:06d}B' for k in range(added, added + n)]
+
+    def mapping(serial, i):
+        return {
+            'serialnumber': serial, 'uniqueIdentifier': f'LOAD{i:08d}', 'customerCode': 900000 + i,
+            'customerName': f'Load Customer {i}', 'company': COMPANIES[i % len(COMPANIES)],
+            'devicetype': serial[6:9], 'licenseUrl': f'https://licenses.example.com/{serial}',
+            'cLicenseURL': f'https://licenses.example.com/{serial}', 'versionDetails': 'v2.0',
+        }
+
+    return [
+        Scenario('verify_auth', 'get', '/sil/verify-auth/', lambda i: {}),
+        Scenario('get_serial_numbers (page)', 'get', '/sil/get_serial_numbers/',
+                 lambda i: {'limit': 100, 'isapproved': i % 2}),
+        Scenario('get_device_details', 'get', '/sil/get_device_details/',
+                 lambda i: {'serialnumber': existing[i % len(existing)]}),
+        Scenario(f'get_device_details_batch (x{DETAILS_BATCH_SIZE})', 'post', '/sil/get_device_details_batch/',
+                 lambda i: {'serialnumbers': [existing[(i + k * 7) % len(existing)] for k in range(DETAILS_BATCH_SIZE)]},
+                 writes=False),
+        Scenario('get_customer_mappings', 'get', '/sil/get_customer_mappings/',
+                 lambda i: {'pageNumber': i % 50 * 10, 'pageSize': 10, 'sortingOrderIndex': i % 8,
+                            'sortingOrderDirection': i % 2}),
+        Scenario('inventory_stats', 'get', '/sil/inventory_stats/', lambda i: {}),
+        Scenario('get_customer_mappings (filter)', 'get', '/sil/get_customer_mappings/',
+                 lambda i: {'pageSize': 10, 'deviceType': 'AMP' if i % 2 else 'API', 'approvedStatus': i % 2,
+                            'company': COMPANIES[i % len(COMPANIES)]}),
+        Scenario('add_serial_number', 'post', '/sil/add_serial_number/',
+                 lambda i: {'serialnumber': new_serials[i]}),
+        Scenario('approve_serial_number', 'patch', '/sil/approve_serial_number/',
+                 lambda i: {'serialnumber': unapproved[i]}),
+        Scenario(f'approve_serial_numbers (x{BATCH_SIZE})', 'patch', '/sil/approve_serial_numbers/',
+                 lambda i: {'serialnumbers': unapproved[n + i * BATCH_SIZE:n + (i + 1) * BATCH_SIZE]}, batches),
+        Scenario('allocate_serial_number', 'post', '/sil/allocate_serial_number/',
+                 lambda i: {'serialnumber': free[i]}),
+        Scenario('deactivate_serial_number', 'post', '/sil/deactivate_serial_number/',
+                 lambda i: {'serialnumber': free[n + i]}),
+        Scenario('getSerialNumber', 'get', '/sil/getSerialNumber/', lambda i: {}, writes=True),
+        Scenario('reserve_serial_numbers (x10)', 'post', '/sil/reserve_serial_numbers/', lambda i: {'count': 10}),
+        Scenario('create_customer_mapping', 'post', '/sil/create_customer_mapping/',
+                 lambda i: mapping(free[2 * n + i], i)),
+        Scenario('update_customer_mapping', 'post', '/sil/update_customer_mapping/',
+                 lambda i: mapping(mapped[i], i)),
+    ], {'unapproved': len(unapproved) - n - batches * BATCH_SIZE, 'free': len(free) - n * 3}
+
+
+def run(scenario, args, token):
+    from django.test import Client
+
+    local = threading.local()
+
+    def send(i):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+            client.cookies['access_token'] = token
+        params = scenario.params(i)
+        start = time.perf_counter()
+        if scenario.method == 'get':
+            response = client.get(scenario.path, params)
+        else:
+            response = getattr(client, scenario.method)(scenario.path, params, content_type='application/json')
+        return time.perf_counter() - start, response.status_code
+
+    writes = scenario.writes if scenario.writes is not None else scenario.method != 'get'
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.write_concurrency if writes else args.concurrency) as executor:
+        outcomes = list(executor.map(send, range(scenario.requests or args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in outcomes]
+    errors = Counter(str(code) for _, code in outcomes if code >= 300)
+    return {
+        'requests': len(outcomes),
+        'errors': sum(errors.values()),
+        'errorStatuses': dict(errors),
+        'throughput': len(outcomes) / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+def report(name, result, baseline=None):
+    line = (f'{name:<32} {result["throughput"]:8.1f} req/s   p50 {result["p50"] * 1000:8.2f} ms   '
+            f'p99 {result["p99"] * 1000:8.2f} ms   errors {result["errors"]}')
+    if result['errors']:
+        line += ' (' + ', '.join(f'{code}: {count}' for code, count in sorted(result['errorStatuses'].items())) + ')'
+    if baseline:
+        line += '   vs baseline: ' + '  '.join(
+            f'{key} {(result[key] - baseline[key]) / baseline[key] * 100:+.0f}%'
+            for key in ('throughput', 'p50', 'p99') if baseline.get(key)
+        )
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--serials', type=int, default=200000)
+    parser.add_argument('--mappings', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--write-concurrency', type=int, default=1)
+    parser.add_argument('--only', help='comma-separated scenario names (prefix match)')
+    parser.add_argument('--listing-engine', choices=['procedure', 'orm'], default='procedure')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    setup()
+    seed(args.serials, args.mappings)
+
+    from ProductRegistration.inventory import rebuild_inventory
+
+    # seeding writes the tables directly, bring the inventory counters up to date
+    start = time.perf_counter()
+    rebuild_inventory()
+    print(f'inventory counters rebuilt in {time.perf_counter() - start:.1f}s')
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    settings.MAPPING_LISTING_ENGINE = args.listing_engine
+    user, _ = get_user_model().objects.get_or_create(username='benchmark', defaults={'is_verified': True})
+    token = str(AccessToken.for_user(user))
+
+    scenarios, available = make_scenarios(args)
+    if args.only:
+        prefixes = [name.strip() for name in args.only.split(',')]
+        scenarios = [scenario for scenario in scenarios if any(scenario.name.startswith(prefix) for prefix in prefixes)]
+    if min(available.values()) < 0:
+        print(f'warning: not enough seeded rows left for the write scenarios ({available} short), '
+              f'seed a fresh BENCH_DB_PATH or lower --requests\n')
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)['results']
+
+    print(f'{args.serials} serials, {args.mappings} mappings, {args.requests} requests per scenario, '
+          f'concurrency {args.concurrency} (writes {args.write_concurrency}), listing engine {args.listing_engine}\n')
+    results = {}
+    for scenario in scenarios:
+        try:
+            results[scenario.name] = run(scenario, args, token)
+        except IndexError:
+            print(f'{scenario.name:<32} skipped, not enough seeded rows')
+            continue
+        report(scenario.name, results[scenario.name], baseline.get(scenario.name))
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'args': vars(args), 'results': results}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+
+from .common import measure, setup, summary
+from .data import seed_mappings
+
+
+# Times the ORM listing engine (MAPPING_LISTING_ENGINE=orm) for every sortingOrderIndex
+# in both directions, plus the common filters, with or without the 0002_device_indexes
+# indexes. The page query and the total count are timed separately, since the view
+# caches counts. --explain prints the query plan of each page query.
+#
+#   python -m benchmarks.mapping_listing --rows 200000
+#   python -m benchmarks.mapping_listing --rows 200000 --without-indexes
+
+FILTERS = [
+    {'deviceType': 'AMP'},
+    {'approvedStatus': '1'},
+    {'deviceType': 'API', 'approvedStatus': '0'},
+    {'fromDate': '2026-01-01', 'toDate': '2026-01-31'},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--offset', type=int, default=0, help='pageNumber (row offset) to read from')
+    parser.add_argument('--without-indexes', action='store_true', help='unapply 0002_device_indexes first')
+    parser.add_argument('--explain', action='store_true')
+    args = parser.parse_args()
+
+    setup()
+    seed_mappings(args.rows)
+
+    from django.core.management import call_command
+    from ProductRegistration.mapping_query import MAPPING_FIELDS, SORT_FIELDS, filter_mappings, parse_mapping_query, sort_fields
+
+    # the next run without the flag re-applies the migration in setup()
+    if args.without_indexes:
+        call_command('migrate', 'ProductRegistration', '0001', verbosity=0)
+
+    cases = []
+    for sort_index, field in SORT_FIELDS.items():
+        for direction in (0, 1):
+            params = {'sortingOrderIndex': str(sort_index), 'sortingOrderDirection': str(direction)}
+            cases.append((f'sort {field} {"desc" if direction else "asc"}', params))
+    for filters in FILTERS:
+        cases.append(('filter ' + ' '.join(f'{key}={value}' for key, value in filters.items()), filters))
+
+    print(f'indexes {"dropped" if args.without_indexes else "present"}, offset {args.offset}\n')
+    for label, params in cases:
+        query = parse_mapping_query(dict(params, pageNumber=str(args.offset), pageSize='10'))
+        queryset = filter_mappings(query)
+        page = queryset.order_by(*sort_fields(query)).values_list(*MAPPING_FIELDS)[query.page_number:query.page_number + query.page_size]
+
+        print(label)
+        print(summary('  page', measure(lambda: list(page.all()), repeat=args.repeat)))
+        print(summary('  count', measure(lambda: queryset.count(), repeat=args.repeat)))
+        if args.explain:
+            print('    ' + page.explain().replace('\n', '\n    '))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ProductRegistration.mapping_query import DEFAULT_SORT_INDEX, MAPPING_FIELDS, SORT_FIELDS
+from ProductRegistration.models import Palmteccustomerdetails, Serialdata
+from ProductRegistration.procedures import ProcedureResult
+
+
+# Stand-ins for the MySQL stored procedures the views call, running the same kind of
+# statements through the ORM on the benchmark database (PROCEDURE_BACKEND in
+# benchmarks/settings.py). Unlike ProductRegistration.procedures.InMemoryBackend they
+# read and write the seeded tables, so procedure-backed endpoints are measured against
+# the same data as the ORM paths. Statuses and messages follow InMemoryBackend.
+class ORMBackend:
+    def call(self, name, args, out_params, fetch_rows):
+        handler = getattr(self, name, None)
+        if handler is None:
+            raise NotImplementedError(f'No ORM stand-in for procedure {name}')
+
+        in_args = list(args[:len(args) - out_params])
+        with transaction.atomic():
+            rows, columns, outputs = handler(*in_args)
+        return ProcedureResult(rows, columns, outputs)
+
+    def _save_serial(self, serialnumber, category, isapproved, isallocated):
+        if Serialdata.objects.filter(serialnumber=serialnumber).exists():
+            return None, None, ('duplicate', 'Serial number already exists')
+        now = timezone.now()
+        Serialdata.objects.create(serialnumber=serialnumber, category=category, isapproved=isapproved,
+                                  isallocated=isallocated, createdate=now, modifieddate=now)
+        return None, None, ('success', 'Serial number saved successfully')
+
+    def _update_serial(self, serialnumber, **changes):
+        if not Serialdata.objects.filter(serialnumber=serialnumber).update(modifieddate=timezone.now(), **changes):
+            return None, None, ('not_found', 'Serial number not found')
+        return None, None, ('success', 'Serial number updated successfully')
+
+    def save_serial_number(self, serialnumber, category):
+        return self._save_serial(serialnumber, category, 0, 0)
+
+    def save_upi_pro_serial_number(self, serialnumber, category, isapproved, isallocated):
+        return self._save_serial(serialnumber, category, isapproved, isallocated)
+
+    def update_serial_number_approval(self, serialnumber, isapproved):
+        return self._update_serial(serialnumber, isapproved=int(isapproved))
+
+    def update_serial_number_allocate(self, serialnumber, isallocated):
+        return self._update_serial(serialnumber, isallocated=int(isallocated))
+
+    def deactivate_serial_number(self, serialnumber):
+        state = Serialdata.objects.select_for_update().filter(serialnumber=serialnumber).values_list('isapproved', 'isallocated').first()
+        if state is None:
+            return None, None, ('not_found', 'Serial number not found')
+        if state != (1, 0):
+            return None, None, ('denied', 'Only approved, unallocated devices can be deactivated')
+        return self._update_serial(serialnumber, isallocated=3)
+
+    def get_device_details_by_serial(self, serialnumber):
+        columns = ['serialNumber', 'deviceId', 'IMEI', 'IMSI', 'category', 'isApproved', 'isAllocated']
+        rows = list(Serialdata.objects.filter(serialnumber=serialnumber).values_list(
+            'serialnumber', 'deviceid', 'imei', 'imsi', 'category', 'isapproved', 'isallocated'))
+        return rows, columns, ()
+
+    def save_serial_customer_details(self, serialnumber, uniqueidentifier, customercode, customername,
+                                     company, devicetype, clicenseurl, versiondetails):
+        if Palmteccustomerdetails.objects.filter(upideviceserialnumber=serialnumber).exists():
+            return None, None, ('duplicate', 'Mapping already exists for serial number')
+        now = timezone.now()
+        Palmteccustomerdetails.objects.create(
+            upideviceserialnumber=serialnumber, uniqueidentifier=uniqueidentifier, customercode=int(customercode),
+            customername=customername, company=company, devicetype=devicetype, clicenseurl=clicenseurl,
+            versiondetails=versiondetails, isapproved=0, isdeleted=0, createdon=now, modifiedon=now,
+        )
+        return None, None, ('success', 'Mapping saved successfully')
+
+    def update_customer_by_serial(self, serialnumber, customercode, uniqueidentifier, customername,
+                                  company, devicetype, clicenseurl, versiondetails):
+        updated = Palmteccustomerdetails.objects.filter(upideviceserialnumber=serialnumber).update(
+            customercode=int(customercode), uniqueidentifier=uniqueidentifier, customername=customername,
+            company=company, devicetype=devicetype, clicenseurl=clicenseurl,
+            versiondetails=versiondetails, modifiedon=timezone.now(),
+        )
+        if not updated:
+            return None, None, ('not_found', 'Mapping not found for serial number')
+        return None, None, ('success', 'Mapping updated successfully')
+
+    # one filtered COUNT plus an ORDER BY ... LIMIT offset, size page, like the procedure
+    def get_serial_customer_details(self, serial_number, customer_code, customer_name, company, device_type,
+                                    from_date, to_date, approved_status, search_text,
+                                    page_number, page_size, sort_index, sort_direction):
+        # whole days from_date..to_date, as a range on createdon so its index applies
+        start = timezone.make_aware(datetime.datetime.combine(datetime.date.fromisoformat(str(from_date)), datetime.time.min))
+        end = timezone.make_aware(datetime.datetime.combine(datetime.date.fromisoformat(str(to_date)), datetime.time.min))
+        queryset = Palmteccustomerdetails.objects.exclude(isdeleted=1).filter(
+            createdon__gte=start, createdon__lt=end + datetime.timedelta(days=1))
+        if serial_number:
+            queryset = queryset.filter(upideviceserialnumber__icontains=serial_number)
+        if int(customer_code or 0):
+            queryset = queryset.filter(customercode=int(customer_code))
+        if customer_name:
+            queryset = queryset.filter(customername__icontains=customer_name)
+        if company:
+            queryset = queryset.filter(company__icontains=company)
+        if device_type:
+            queryset = queryset.filter(devicetype=device_type)
+        if int(approved_status) != -1:
+            queryset = queryset.filter(isapproved=int(approved_status))
+        if search_text:
+            queryset = queryset.filter(
+                Q(upideviceserialnumber__icontains=search_text) | Q(customercode__icontains=search_text)
+                | Q(customername__icontains=search_text) | Q(company__icontains=search_text))
+
+        field = SORT_FIELDS.get(int(sort_index), SORT_FIELDS[DEFAULT_SORT_INDEX])
+        prefix = '-' if int(sort_direction) == 1 else ''
+        offset, size = int(page_number), int(page_size)
+        page = list(queryset.order_by(prefix + field, prefix + 'upideviceserialnumber')
+                    .values_list(*MAPPING_FIELDS)[offset:offset + size])
+        return page, list(MAPPING_FIELDS), (queryset.count(),)
@@ -0,0 +1,53 @@
+import argparse
+
+from .common import measure, setup, summary
+from .data import seed_mappings
+
+
+# Compares the mapping searchText filter as a table scan (the icontains query the
+# listing ran before) against the trigram index resolving candidates first.
+#
+#   python -m benchmarks.search_index --rows 300000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    seed_mappings(args.rows)
+
+    from django.conf import settings
+    settings.SEARCH_INDEX_ENABLED = True
+
+    from ProductRegistration.mapping_query import orm_mapping_page, parse_mapping_query
+    from ProductRegistration.models import Palmteccustomerdetails
+    from ProductRegistration.search_index import mapping_search_index, search_candidates
+
+    sample = Palmteccustomerdetails.objects.order_by('?').values_list('customername', 'customercode')[:1][0]
+    searches = [sample[0][:6], str(sample[1]), 'Globex', 'NOTPRESENT']
+
+    mapping_search_index.refresh()
+    print(f'{len(mapping_search_index)} mappings indexed in {mapping_search_index.build_seconds:.2f}s\n')
+
+    for text in searches:
+        query = parse_mapping_query({'searchText': text})
+        print(f'searchText={text!r}')
+        print(summary('  table scan', measure(lambda: orm_mapping_page(query), repeat=args.repeat)))
+
+        def indexed():
+            candidates = search_candidates(text)
+            if candidates is None:
+                return orm_mapping_page(query)
+            return orm_mapping_page(query, serials=candidates)
+
+        candidates = search_candidates(text)
+        label = 'falls back to scan' if candidates is None else f'{len(candidates)} candidates'
+        print(summary(f'  trigram index ({label})', measure(indexed, repeat=args.repeat)))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import time
+
+from .common import setup
+from .data import seed
+
+
+# CPU time to turn --rows list rows into a response body, database read included, for
+# the serialization paths of get_serial_numbers and get_customer_mappings:
+#
+#   before       model instances through SerialNumberDetails (serials) or a dict per row
+#                (mappings), rendered by DRF's JSONRenderer
+#   tuples       value tuples to a dict per row, still DRF's JSONRenderer
+#   fast         value tuples to a dict per row, renderers.FastJSONRenderer (orjson)
+#   columns      value tuples as they are (layout=columns), FastJSONRenderer
+#   read only    just the values_list read, to tell encoding from database time
+#
+#   python -m benchmarks.serialization --rows 10000
+
+
+def cpu_per_call(func, repeat):
+    func()
+    start = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    seed(args.rows, args.rows)
+
+    from rest_framework.renderers import JSONRenderer
+    from ProductRegistration.mapping_query import MAPPING_FIELDS, MAPPING_KEYS
+    from ProductRegistration.models import Palmteccustomerdetails, Serialdata
+    from ProductRegistration.renderers import FastJSONRenderer, list_data, orjson
+    from ProductRegistration.serializers import SerialNumberDetails
+    from ProductRegistration.views.device_views import SERIAL_LIST_FIELDS
+
+    n = args.rows
+    serials = Serialdata.objects.order_by('createdate', 'serialnumber')
+    mappings = Palmteccustomerdetails.objects.order_by('customercode', 'upideviceserialnumber')
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+
+    def serials_before():
+        data = SerialNumberDetails(serials[:n], many=True).data
+        data = sorted(data, key=lambda x: x.get('createdate') or '')
+        for row in data:
+            row.pop('createdate')
+        return drf.render({'data': data})
+
+    def serial_tuples(renderer, layout):
+        return lambda: renderer.render(list_data(SERIAL_LIST_FIELDS, list(serials.values_list(*SERIAL_LIST_FIELDS)[:n]), layout))
+
+    def mappings_before():
+        rows = mappings.values_list(*MAPPING_FIELDS)[:n]
+        return drf.render({'data': [dict(zip(MAPPING_KEYS, row)) for row in rows]})
+
+    def mapping_tuples(renderer, layout):
+        return lambda: renderer.render(list_data(MAPPING_KEYS, list(mappings.values_list(*MAPPING_FIELDS)[:n]), layout))
+
+    cases = [
+        ('get_serial_numbers', [
+            ('before', serials_before),
+            ('tuples', serial_tuples(drf, 'objects')),
+            ('fast', serial_tuples(fast, 'objects')),
+            ('columns', serial_tuples(fast, 'columns')),
+            ('read only', lambda: list(serials.values_list(*SERIAL_LIST_FIELDS)[:n])),
+        ]),
+        ('get_customer_mappings', [
+            ('before', mappings_before),
+            ('tuples', mapping_tuples(drf, 'objects')),
+            ('fast', mapping_tuples(fast, 'objects')),
+            ('columns', mapping_tuples(fast, 'columns')),
+            ('read only', lambda: list(mappings.values_list(*MAPPING_FIELDS)[:n])),
+        ]),
+    ]
+
+    print(f'{n} rows, orjson {"installed" if orjson else "missing (fast = DRF encoder)"}, CPU ms per 10k rows\n')
+    for endpoint, variants in cases:
+        print(endpoint)
+        baseline = None
+        for label, func in variants:
+            cpu = cpu_per_call(func, args.repeat) * 10000 / n
+            baseline = baseline or cpu
+            line = f'  {label:<10} {cpu * 1000:9.2f} ms   {baseline / cpu:5.1f}x'
+            result = func()
+            if isinstance(result, bytes):
+                line += f'   {len(result) / n:6.1f} bytes/row'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import os
+
+# Local benchmark settings: the project settings on a SQLite database, so benchmarks
+# run without MySQL or a .env file. Point BENCH_DB_PATH elsewhere to keep data between runs.
+
+for name, default in (
+    ('SECRET_KEY', 'benchmark-only-secret-key'),
+    ('ALLOWED_HOSTS', '*'),
+    ('CORS_ALLOWED_ORIGINS', 'http://localhost'),
+    ('DB_NAME', ''), ('DB_USER', ''), ('DB_PASSWORD', ''), ('DB_HOST', ''), ('DB_PORT', ''),
+):
+    os.environ.setdefault(name, default)
+
+from BE.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB_PATH', str(BASE_DIR / 'benchmarks' / 'bench.sqlite3')),
+        # concurrent load scenarios queue for SQLite's write lock instead of failing
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+# stored procedures run as ORM queries on the seeded tables
+PROCEDURE_BACKEND = 'benchmarks.procedures.ORMBackend'
+
+DEBUG = False
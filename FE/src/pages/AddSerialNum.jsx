@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import '../styles/AddSerialNum.css';
 import api, { BASE_URL } from '../assets/js/axiosConfig';
 
@@ -19,6 +19,17 @@ export default function AddSerialNum() {
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10);
 
+  // BATCH SELECTION (serial numbers ticked in the table)
+  const [selected, setSelected] = useState([]);
+
+  // DELTA SYNC: position of the last fetch, sent back as ?since= to get only what changed
+  const watermark = useRef(null);
+
+  // RANGE GENERATOR: next free serials of a month/device type, registered by the server
+  const [genMonth, setGenMonth] = useState(new Date().toISOString().slice(0, 7));
+  const [genType, setGenType] = useState("AMP");
+  const [genCount, setGenCount] = useState(100);
+
   const re = /^[0-9]{4}[0-9]{2}(AMP|API)[0-9]{6}B$/;
 
   useEffect(() => {
@@ -35,6 +46,15 @@ export default function AddSerialNum() {
     setCurrentPage(1);
   }, [searchTerm, approvalFilter, allocationFilter]);
 
+  const formatSerial = (item) => ({
+    serialnumber: item.serialnumber,
+    isapproved: item.isapproved || 0,
+    isallocated: item.isallocated ? Number(item.isallocated) : 0,
+    IMSI: item.imsi || null,
+    IMEI: item.imei || null,
+    deviceId: item.deviceid || null
+  });
+
   const fetchSerialNumbers = async (showLoading = true) => {
     try {
       if (showLoading) setLoading(true);
@@ -42,15 +62,8 @@ export default function AddSerialNum() {
       const response = await api.get(`${BASE_URL}/get_serial_numbers/`);
 
       if (response.data && response.data.data) {
-        const formattedData = response.data.data.map(item => ({
-          serialnumber: item.serialnumber,
-          isapproved: item.isapproved || 0,
-          isallocated: item.isallocated ? Number(item.isallocated) : 0,
-          IMSI: item.imsi || null,           
-          IMEI: item.imei || null,           
-          deviceId: item.deviceid || null    
-        }));
-        setSerialList(formattedData);
+        setSerialList(response.data.data.map(formatSerial));
+        watermark.current = response.data.watermark || null;
       }
     } catch (err) {
       console.error("Error fetching serial numbers:", err);
@@ -60,6 +73,33 @@ export default function AddSerialNum() {
     }
   };
 
+  // Fetch only the serials changed since the last fetch and merge them into the list
+  const fetchSerialChanges = async () => {
+    if (!watermark.current) {
+      return fetchSerialNumbers(false);
+    }
+    try {
+      const changed = new Map();
+      let hasMore = true;
+      while (hasMore) {
+        const response = await api.get(`${BASE_URL}/get_serial_numbers/`, { params: { since: watermark.current } });
+        response.data.data.forEach(item => changed.set(item.serialnumber, formatSerial(item)));
+        watermark.current = response.data.watermark;
+        hasMore = response.data.hasMore;
+      }
+      if (changed.size > 0) {
+        setSerialList(prev => {
+          const merged = prev.map(item => changed.get(item.serialnumber) || item);
+          const known = new Set(prev.map(item => item.serialnumber));
+          return [...merged, ...[...changed.values()].filter(item => !known.has(item.serialnumber))];
+        });
+      }
+    } catch (err) {
+      console.error("Error fetching serial number changes:", err);
+      await fetchSerialNumbers(false);
+    }
+  };
+
   // APPLY FILTERS
   const applyFilters = () => {
     let filtered = [...serialList];
@@ -94,10 +134,57 @@ export default function AddSerialNum() {
     setCurrentPage(1);
   };
 
+  // Apply a transition locally to the serials the server moved, instead of re-fetching the whole list
+  const markSerials = (serials, changes) => {
+    const moved = new Set(serials);
+    setSerialList(prev => prev.map(item => moved.has(item.serialnumber) ? { ...item, ...changes } : item));
+  };
+
+  const toggleSelected = (serialnumber) => {
+    setSelected(prev => prev.includes(serialnumber) ? prev.filter(s => s !== serialnumber) : [...prev, serialnumber]);
+  };
+
+  const BATCH_ACTIONS = {
+    approve: { method: "patch", url: "approve_serial_numbers", changes: { isapproved: 1 }, label: "approved" },
+    allocate: { method: "post", url: "allocate_serial_numbers", changes: { isallocated: 2 }, label: "allocated" },
+    deactivate: { method: "post", url: "deactivate_serial_numbers", changes: { isallocated: 3 }, label: "deactivated" },
+  };
+
+  const handleBatch = async (action) => {
+    const config = BATCH_ACTIONS[action];
+    if (action === "deactivate" && !window.confirm(`Are you sure you want to deactivate ${selected.length} devices?`)) {
+      return;
+    }
+
+    try {
+      const response = await api[config.method](`${BASE_URL}/${config.url}/`, { serialnumbers: selected });
+      const { moved, rejected } = response.data;
+      markSerials(moved, config.changes);
+      setSelected([]);
+
+      let message = `${moved.length} serial numbers ${config.label}.`;
+      if (rejected.length > 0) {
+        message += `\n${rejected.length} rejected:\n` + rejected.slice(0, 10).map(r => `${r.serialnumber}: ${r.message}`).join("\n");
+      }
+      window.alert(message);
+    } catch (err) {
+      console.error(`Error in batch ${action}:`, err);
+      window.alert(err.response?.data?.message || `Error in batch ${action}`);
+    }
+  };
+
   // PAGINATION LOGIC
   const indexOfLastItem = currentPage * itemsPerPage;
   const indexOfFirstItem = indexOfLastItem - itemsPerPage;
   const currentItems = filteredList.slice(indexOfFirstItem, indexOfLastItem);
+  const allPageSelected = currentItems.length > 0 && currentItems.every(item => selected.includes(item.serialnumber));
+
+  const togglePageSelected = () => {
+    const pageSerials = currentItems.map(item => item.serialnumber);
+    setSelected(prev => allPageSelected
+      ? prev.filter(s => !pageSerials.includes(s))
+      : [...new Set([...prev, ...pageSerials])]);
+  };
   const totalPages = Math.ceil(filteredList.length / itemsPerPage);
 
   const goToPage = (page) => {
@@ -134,7 +221,7 @@ export default function AddSerialNum() {
       if (response.data.status === "success") {
         setSlno("");
         window.alert("Serial number added successfully!");
-        await fetchSerialNumbers(false);
+        await fetchSerialChanges();
       } else {
         window.alert(response.data.message || "Unknown error occurred");
       }
@@ -162,13 +249,35 @@ export default function AddSerialNum() {
     }
   };
 
+  const handleGenerate = async (e) => {
+    e.preventDefault();
+    const [year, month] = genMonth.split("-").map(Number);
+
+    try {
+      const response = await api.post(`${BASE_URL}/generate_serial_numbers/`, { year, month, deviceType: genType, count: Number(genCount) });
+      const { serialnumbers, skipped, shortfall } = response.data;
+      let message = `${serialnumbers.length} serial numbers generated: ${serialnumbers[0]} - ${serialnumbers[serialnumbers.length - 1]}`;
+      if (skipped && skipped.length) {
+        message += `\n${skipped.length} skipped (registered meanwhile): ${skipped.join(", ")}`;
+      }
+      if (shortfall) {
+        message += `\n${shortfall} fewer than requested: no free serial numbers left for this month and type`;
+      }
+      window.alert(message);
+      await fetchSerialChanges();
+    } catch (err) {
+      console.error("Error generating serial numbers:", err);
+      window.alert(err.response ? (err.response.data.message || "An error occurred") : "Network error! Please check your connection.");
+    }
+  };
+
   const handleApprove = async (serialnumber) => {
     try {
       const response = await api.patch(`${BASE_URL}/approve_serial_number/`, { serialnumber });
       
       if (response.data.status === "success") {
         window.alert("Serial number approved successfully!");
-        await fetchSerialNumbers(false);
+        markSerials([serialnumber], { isapproved: 1 });
       } else {
         window.alert("Failed to approve serial number");
       }
@@ -184,7 +293,7 @@ export default function AddSerialNum() {
       
       if (response.data.status === "success") {
         window.alert("Serial number allocated successfully!");
-        await fetchSerialNumbers(false);
+        markSerials([serialnumber], { isallocated: 2 });
       } else {
         window.alert("Failed to allocate serial number");
       }
@@ -204,7 +313,7 @@ export default function AddSerialNum() {
       
       if (response.data.status === "success") {
         window.alert(response.data.message || "Deactivated successfully");
-        await fetchSerialNumbers(false);
+        markSerials([serialnumber], { isallocated: 3 });
       } else {
         window.alert(response.data.message || "Failed to deactivate");
       }
@@ -267,6 +376,44 @@ export default function AddSerialNum() {
             </div>
           </form>
 
+          {/* Generate Serial Range Form */}
+          <form className="serial-form" onSubmit={handleGenerate}>
+            <div className="serial-form__field serial-form__field--range">
+              <input
+                type="month"
+                className="serial-form__input"
+                required
+                value={genMonth}
+                onChange={(e) => setGenMonth(e.target.value)}
+                aria-label="Production month"
+              />
+              <select
+                className="serial-form__input"
+                value={genType}
+                onChange={(e) => setGenType(e.target.value)}
+                aria-label="Device type"
+              >
+                <option value="AMP">AMP</option>
+                <option value="API">API</option>
+              </select>
+              <input
+                type="number"
+                className="serial-form__input"
+                required
+                min="1"
+                max="50000"
+                value={genCount}
+                onChange={(e) => setGenCount(e.target.value)}
+                aria-label="Number of serials"
+              />
+            </div>
+            <div className="serial-form__actions">
+              <button type="submit" className="serial-form__submit">
+                Generate Serial Numbers
+              </button>
+            </div>
+          </form>
+
           {/* FILTERS & SEARCH SECTION */}
           <div className="serial-filters">
             <div className="serial-filters__row">
@@ -334,10 +481,37 @@ export default function AddSerialNum() {
           </div>
 
           {/* Serial Numbers Table */}
+          {/* Batch Actions */}
+          {selected.length > 0 && (
+            <div className="serial-batch">
+              <span className="serial-batch__count">{selected.length} selected</span>
+              <button type="button" className="serial-table__btn serial-table__btn--approve" onClick={() => handleBatch("approve")}>
+                <i className="fas fa-check" /> Approve
+              </button>
+              <button type="button" className="serial-table__btn serial-table__btn--allocate" onClick={() => handleBatch("allocate")}>
+                <i className="fas fa-box" /> Allocate
+              </button>
+              <button type="button" className="serial-table__btn serial-table__btn--delete" onClick={() => handleBatch("deactivate")}>
+                <i className="fas fa-ban" /> Deactivate
+              </button>
+              <button type="button" className="serial-filters__reset" onClick={() => setSelected([])}>
+                Clear
+              </button>
+            </div>
+          )}
+
           <div className="serial-table-wrapper">
             <table className="serial-table">
               <thead className="serial-table__head">
                 <tr className="serial-table__row">
+                  <th className="serial-table__header">
+                    <input
+                      type="checkbox"
+                      checked={allPageSelected}
+                      onChange={togglePageSelected}
+                      aria-label="Select all on this page"
+                    />
+                  </th>
                   <th className="serial-table__header">#</th>
                   <th className="serial-table__header">Serial Number</th>
                   <th className="serial-table__header">IMSI</th>
@@ -349,7 +523,7 @@ export default function AddSerialNum() {
               <tbody className="serial-table__body">
                 {currentItems.length === 0 ? (
                   <tr className="serial-table__row serial-table__row--empty">
-                    <td colSpan="6" className="serial-table__cell">
+                    <td colSpan="7" className="serial-table__cell">
                       {searchTerm || approvalFilter !== "all" || allocationFilter !== "all" 
                         ? "No serial numbers match your filters." 
                         : "No serial numbers added yet."}
@@ -362,6 +536,14 @@ export default function AddSerialNum() {
 
                     return (
                       <tr key={item.serialnumber} className="serial-table__row">
+                        <td className="serial-table__cell" data-label="Select">
+                          <input
+                            type="checkbox"
+                            checked={selected.includes(item.serialnumber)}
+                            onChange={() => toggleSelected(item.serialnumber)}
+                            aria-label={`Select serial ${item.serialnumber}`}
+                          />
+                        </td>
                         <td className="serial-table__cell" data-label="#">
                           {globalIndex}
                         </td>
@@ -25,6 +25,11 @@ export default function ListingPage() {
   const [pageSize, setPageSize] = useState(10)
   const [totalCount, setTotalCount] = useState(0)
 
+  // CURSOR STATE - tokens for the neighbouring pages returned with each page,
+  // and the token used to fetch the current page (null = fetch by offset)
+  const [cursors, setCursors] = useState({ next: null, prev: null })
+  const [pageCursor, setPageCursor] = useState(null)
+
   // FILTER STATE
   const [filters, setFilters] = useState({
     serialNumber: '',
@@ -66,12 +71,13 @@ export default function ListingPage() {
         customerName: filters.customerName.trim() || null,
         company: filters.company.trim() || null,
         deviceType: filters.deviceType || null,
-        fromDate: filters.fromDate || '2020-01-01', // Default old date
-        toDate: filters.toDate || new Date().toISOString().split('T')[0], // Today
+        fromDate: filters.fromDate || null, // Server default covers all dates
+        toDate: filters.toDate || null,
         approvedStatus: filters.approvedStatus === '-1' ? -1 : parseInt(filters.approvedStatus),
         searchText: filters.searchText.trim() || '',
         pageNumber: (currentPage - 1) * pageSize, // Convert to offset
         pageSize: pageSize,
+        cursor: pageCursor, // Takes precedence over the offset when set
         sortingOrderIndex: sortConfig.columnIndex,
         sortingOrderDirection: sortConfig.direction
       }
@@ -100,6 +106,7 @@ export default function ListingPage() {
         
         // Set total count for pagination
         setTotalCount(response.data.totalCount || 0)
+        setCursors({ next: response.data.nextCursor || null, prev: response.data.prevCursor || null })
       }
     } catch (err) {
       console.error("Error fetching mappings:", err)
@@ -122,6 +129,7 @@ export default function ListingPage() {
   // APPLY FILTERS (reset to page 1 and fetch)
   const applyFilters = () => {
     setCurrentPage(1) // Reset to first page
+    setPageCursor(null)
     setFilterTrigger(prev => prev + 1) // Trigger re-fetch
   }
 
@@ -139,11 +147,13 @@ export default function ListingPage() {
       searchText: ''
     })
     setCurrentPage(1)
+    setPageCursor(null)
     setFilterTrigger(prev => prev + 1) // Trigger re-fetch
   }
 
   // HANDLE SORT
   const handleSort = (columnIndex) => {
+    setPageCursor(null) // Cursors are tied to the sort order
     setSortConfig(prev => ({
       columnIndex: columnIndex,
       direction: prev.columnIndex === columnIndex && prev.direction === 0 ? 1 : 0
@@ -153,8 +163,17 @@ export default function ListingPage() {
   // PAGINATION CALCULATIONS
   const totalPages = Math.ceil(totalCount / pageSize)
   
+  // Next/previous follow the cursors, so they cost the same at any depth;
+  // jumping to another page falls back to the offset
   const goToPage = (page) => {
     if (page >= 1 && page <= totalPages) {
+      if (page === currentPage + 1 && cursors.next) {
+        setPageCursor(cursors.next)
+      } else if (page === currentPage - 1 && page > 1 && cursors.prev) {
+        setPageCursor(cursors.prev)
+      } else {
+        setPageCursor(null)
+      }
       setCurrentPage(page)
     }
   }
@@ -548,6 +567,7 @@ export default function ListingPage() {
                 onChange={(e) => {
                   setPageSize(Number(e.target.value))
                   setCurrentPage(1)
+                  setPageCursor(null)
                 }}
               >
                 <option value="5">5 per page</option>